@@ -0,0 +1,78 @@
+"""
+Пропускная способность подписанных запросов при одновременном включении парка БПЛА:
+100 БПЛА отправляют подписанные запросы, которые обрабатываются 5 потоками (как
+потоки mod_wsgi) через signed_request - проверка подписи БПЛА и подпись ответа ОРВД.
+Сравниваются подпись ответа в потоке запроса и в пуле процессов CryptoExecutor.
+Выигрыш от пула появляется только при нескольких ядрах.
+
+Запуск из каталога orvd:
+    python3 -m benchmarks.auth_storm_benchmark
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from Cryptodome.PublicKey import RSA
+from constants import ORVD_KEY_SIZE
+from db.key_cache import public_key_cache
+from utils import generate_orvd_keys, sign, verify, signed_request, crypto_executor, signature_cache
+
+UAVS = 100
+REQUESTS_PER_UAV = 5
+REQUEST_THREADS = 5
+
+
+def make_uavs():
+    """Ключи БПЛА кладутся сразу в кэш открытых ключей, поэтому БД не нужна."""
+    uavs = []
+    for uav_id in range(UAVS):
+        key = RSA.generate(ORVD_KEY_SIZE)
+        public_key_cache.put(f'kos{uav_id}', (int(key.n), int(key.e)), public_key_cache.generation())
+        uavs.append((uav_id, int(key.n), int(key.d)))
+    return uavs
+
+
+def make_requests(uavs):
+    requests = []
+    for request_index in range(REQUESTS_PER_UAV):
+        for uav_id, n, d in uavs:
+            query_str = f'/api/auth?id={uav_id}&nonce={request_index}'
+            hash = int.from_bytes(sha256(query_str.encode()).digest(), byteorder='big')
+            requests.append((uav_id, query_str, hex(pow(hash, d, n))[2:]))
+    return requests
+
+
+def handle(request):
+    uav_id, query_str, sig = request
+    # Уникальный ответ: подпись ОРВД не берется из кэша подписей
+    return signed_request(handler_func=lambda: f'$Auth id={uav_id} {query_str}', verifier_func=verify,
+                          signer_func=sign, query_str=query_str, key_group=f'kos{uav_id}', sig=sig)
+
+
+def requests_per_second(requests):
+    signature_cache.invalidate('orvd')
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=REQUEST_THREADS) as pool:
+        results = list(pool.map(handle, requests))
+    elapsed = time.perf_counter() - started
+    assert all(code == 200 for _, code in results)
+    return len(requests) / elapsed
+
+
+def run():
+    generate_orvd_keys()
+    requests = make_requests(make_uavs())
+    print(f'{len(requests)} signed requests from {UAVS} UAVs, {REQUEST_THREADS} request threads, '
+          f'{os.cpu_count()} CPU cores')
+    print(f'{"mode":>18} {"req/s":>8}')
+    print(f'{"inline":>18} {requests_per_second(requests):>8.0f}')
+    crypto_executor.workers = os.cpu_count() or 1
+    crypto_executor.start()
+    # Прогрев: запуск процессов пула не входит в измерение
+    crypto_executor.run(pow, 2, 3, 5)
+    print(f'{"process pool x" + str(crypto_executor.workers):>18} {requests_per_second(requests):>8.0f}')
+    crypto_executor.shutdown()
+
+
+if __name__ == '__main__':
+    run()
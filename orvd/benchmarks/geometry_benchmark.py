@@ -0,0 +1,64 @@
+"""
+Скалярные функции геометрии в цикле и их векторные версии на NumPy:
+расстояния между 100 000 пар точек, матрица расстояний 1 000 x 1 000 и проверка
+100 000 точек на попадание в полигон из 64 вершин.
+
+Запуск из каталога orvd:
+    python3 -m benchmarks.geometry_benchmark
+"""
+import math
+import random
+import time
+import numpy as np
+from utils.general import haversine, is_point_in_polygon
+from utils.geometry import haversine_pointwise, haversine_pairwise, points_in_polygon
+
+PAIRS = 100000
+MATRIX_SIDE = 1000
+POINTS = 100000
+VERTICES = 64
+
+
+def measure(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def report(name, scalar_time, batch_time):
+    print(f'{name:<22} {scalar_time:8.3f} s {batch_time:8.3f} s {scalar_time / batch_time:8.1f}x')
+
+
+def run():
+    rng = np.random.default_rng(0)
+    lat1, lon1 = rng.uniform(59, 61, PAIRS), rng.uniform(29, 31, PAIRS)
+    lat2, lon2 = rng.uniform(59, 61, PAIRS), rng.uniform(29, 31, PAIRS)
+    print(f'{"":<22} {"scalar":>10} {"numpy":>10} {"speedup":>9}')
+
+    lists = lat1.tolist(), lon1.tolist(), lat2.tolist(), lon2.tolist()
+    expected, scalar_time = measure(lambda: [haversine(*args) for args in zip(*lists)])
+    result, batch_time = measure(lambda: haversine_pointwise(lat1, lon1, lat2, lon2))
+    assert np.allclose(result, expected, atol=1e-3)
+    report(f'haversine {PAIRS} pairs', scalar_time, batch_time)
+
+    side = MATRIX_SIDE
+    expected, scalar_time = measure(lambda: [[haversine(a, b, c, d) for c, d in zip(lists[2][:side], lists[3][:side])]
+                                             for a, b in zip(lists[0][:side], lists[1][:side])])
+    result, batch_time = measure(lambda: haversine_pairwise(lat1[:side], lon1[:side], lat2[:side], lon2[:side]))
+    assert np.allclose(result, expected, atol=1e-3)
+    report(f'haversine {side}x{side}', scalar_time, batch_time)
+
+    polygon = []
+    for i in range(VERTICES):
+        angle, radius = 2 * math.pi * i / VERTICES, random.Random(i).uniform(0.5, 1.0)
+        polygon.append([30 + radius * math.cos(angle), 60 + radius * math.sin(angle)])
+    points = np.column_stack((rng.uniform(29, 31, POINTS), rng.uniform(59, 61, POINTS)))
+    point_list = points.tolist()
+    expected, scalar_time = measure(lambda: [is_point_in_polygon(point, polygon) for point in point_list])
+    result, batch_time = measure(lambda: points_in_polygon(points, polygon))
+    assert result.tolist() == expected
+    report(f'polygon {POINTS} points', scalar_time, batch_time)
+
+
+if __name__ == '__main__':
+    run()
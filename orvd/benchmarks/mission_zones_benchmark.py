@@ -0,0 +1,56 @@
+"""
+Проверка маршрута миссии из 500 путевых точек на пересечение с 1 000 запрещенных зон:
+полный перебор участков и зон и отбор зон по ограничивающим рамкам в ZoneGridIndex.
+
+Запуск из каталога orvd:
+    python3 -m benchmarks.mission_zones_benchmark
+"""
+import random
+import time
+from utils.geometry import _segment_intersects_polygon
+from utils.mission import get_mission_legs, get_mission_forbidden_zones, home_handler, waypoint_handler
+from utils.zone_index import ZoneGridIndex
+from .zone_index_benchmark import make_zones
+
+WAYPOINTS = 500
+RUNS = 5
+
+
+def full_scan(zones, legs):
+    names = {}
+    for (lat1, lon1), (lat2, lon2) in legs:
+        for zone in zones['features']:
+            if _segment_intersects_polygon((lon1, lat1), (lon2, lat2), zone['geometry']['coordinates'][0]):
+                names[zone['properties']['name']] = True
+    return sorted(names)
+
+
+def run():
+    rng = random.Random(0)
+    zones = make_zones(rng)
+    mission = [home_handler(60 + rng.random(), 30 + rng.random(), 100)]
+    # Случайное блуждание с шагом около 500 м
+    for _ in range(WAYPOINTS):
+        lat, lon = float(mission[-1][1]), float(mission[-1][2])
+        mission.append(waypoint_handler(min(max(lat + rng.uniform(-0.005, 0.005), 60), 61),
+                                        min(max(lon + rng.uniform(-0.01, 0.01), 30), 31), 100))
+    legs = get_mission_legs(mission)
+
+    started = time.perf_counter()
+    expected = full_scan(zones, legs)
+    full_scan_time = time.perf_counter() - started
+
+    index = ZoneGridIndex(zones)
+    started = time.perf_counter()
+    for _ in range(RUNS):
+        result = get_mission_forbidden_zones(mission, index)
+    index_time = (time.perf_counter() - started) / RUNS
+    assert sorted(result) == expected
+
+    print(f'{len(legs)} legs x {len(zones["features"])} zones, {len(expected)} zones crossed')
+    print(f'full scan:          {full_scan_time * 1000:9.1f} ms')
+    print(f'bbox-pruned index:  {index_time * 1000:9.1f} ms')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,75 @@
+"""
+Микробенчмарк диспетчеризации MQTT-сообщений: линейный перебор шаблонов
+с topic_matches_sub против префиксного дерева TopicRouter.
+
+Запуск из каталога orvd:
+    python3 -m benchmarks.mqtt_router_benchmark
+"""
+import re
+import timeit
+from paho.mqtt.client import topic_matches_sub
+from clients.topic_router import TopicRouter
+from constants import MQTTTopic
+
+PATTERN_COUNTS = (10, 100, 1000)
+MESSAGES = 2000
+
+
+def _handler(*args, **kwargs):
+    pass
+
+
+def build_patterns(count):
+    receivable = [MQTTTopic.LOGS, MQTTTopic.TELEMETRY, MQTTTopic.FMISSION_MS,
+                  MQTTTopic.NMISSION_REQUEST, MQTTTopic.ARM_REQUEST, MQTTTopic.EVENTS]
+    patterns = list(receivable)
+    idx = 0
+    while len(patterns) < count:
+        patterns.append(f'api/extra{idx}/{{id}}')
+        idx += 1
+    return patterns[:count]
+
+
+def linear_dispatch(handlers, topic):
+    """Повторяет прежнюю реализацию MQTTClientWrapper._on_message."""
+    for user_pattern, details in handlers.items():
+        if topic_matches_sub(details['mqtt_pattern'], topic):
+            topic_parts = topic.split('/')
+            path_params = {}
+            for i, part in enumerate(user_pattern.split('/')):
+                if part.startswith('{') and part.endswith('}') and i < len(topic_parts):
+                    path_params[part[1:-1]] = topic_parts[i]
+            details['handler'](**path_params)
+            return True
+    return False
+
+
+def trie_dispatch(router, topic):
+    for route, kwargs in router.match(topic):
+        route.handler(**kwargs)
+        return True
+    return False
+
+
+def run():
+    print(f'{"patterns":>10} {"linear, us/msg":>16} {"trie, us/msg":>14} {"speedup":>9}')
+    for count in PATTERN_COUNTS:
+        patterns = build_patterns(count)
+        handlers = {}
+        router = TopicRouter()
+        for pattern in patterns:
+            mqtt_pattern = re.sub(r'\{[^}]+\}', '+', pattern)
+            handlers[pattern] = {'mqtt_pattern': mqtt_pattern, 'handler': _handler}
+            router.add(pattern, mqtt_pattern, _handler)
+
+        # Телеметрия зарегистрирована одной из первых, последний шаблон - худший случай для перебора
+        topics = [MQTTTopic.TELEMETRY.format(id=i % 50) for i in range(MESSAGES // 2)]
+        topics += [patterns[-1].format(id=i % 50) for i in range(MESSAGES // 2)]
+
+        linear = timeit.timeit(lambda: [linear_dispatch(handlers, t) for t in topics], number=1)
+        trie = timeit.timeit(lambda: [trie_dispatch(router, t) for t in topics], number=1)
+        print(f'{count:>10} {linear / len(topics) * 1e6:>16.2f} {trie / len(topics) * 1e6:>14.2f} {linear / trie:>8.1f}x')
+
+
+if __name__ == '__main__':
+    run()
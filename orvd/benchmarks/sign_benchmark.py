@@ -0,0 +1,50 @@
+"""
+Скорость подписи сообщений ОРВД: полное возведение в степень pow(hash, d, n),
+подпись по китайской теореме об остатках и повторная подпись того же сообщения
+из кэша, для ключей 1024 и 2048 бит.
+
+Запуск из каталога orvd:
+    python3 -m benchmarks.sign_benchmark
+"""
+import time
+from hashlib import sha256
+from context import context
+from utils import generate_keys, sign
+from utils.keys import signature_cache
+
+KEY_SIZES = (1024, 2048)
+MESSAGES = 500
+KEY_GROUP = 'benchmark'
+
+
+def full_exponent_sign(message, key):
+    """Подпись в том виде, в каком она была до CRT."""
+    hash = int.from_bytes(sha256(message.encode()).digest(), byteorder='big', signed=False)
+    return pow(hash, key.d, key.n)
+
+
+def signs_per_second(func, messages):
+    started = time.perf_counter()
+    for message in messages:
+        func(message)
+    return len(messages) / (time.perf_counter() - started)
+
+
+def run():
+    unique_messages = [f'$Flight {i}' for i in range(MESSAGES)]
+    repeated_messages = ['$Flight 1'] * MESSAGES
+    print(f'{"key bits":>9} {"full d, sig/s":>14} {"CRT, sig/s":>11} {"cached, sig/s":>14}')
+    for key_size in KEY_SIZES:
+        generate_keys(key_size, KEY_GROUP)
+        key = context.loaded_keys[KEY_GROUP]
+        assert sign(unique_messages[0], KEY_GROUP) == full_exponent_sign(unique_messages[0], key)
+        full = signs_per_second(lambda message: full_exponent_sign(message, key), unique_messages)
+        # Уникальные сообщения не попадают в кэш: измеряется только CRT
+        signature_cache.invalidate(KEY_GROUP)
+        crt = signs_per_second(lambda message: sign(message, KEY_GROUP), unique_messages)
+        cached = signs_per_second(lambda message: sign(message, KEY_GROUP), repeated_messages)
+        print(f'{key_size:>9} {full:>14.0f} {crt:>11.0f} {cached:>14.0f}')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,42 @@
+"""
+Сравнение схем подписи ОРВД: RSA-1024 (CRT) и Ed25519 - подписи и проверки в секунду
+и длина сообщения '$Flight 1#<подпись>'.
+
+Запуск из каталога orvd:
+    python3 -m benchmarks.signature_scheme_benchmark
+"""
+import time
+from utils.signature_schemes import rsa_scheme, ed25519_scheme, signature_cache
+
+MESSAGES = 2000
+KEY_GROUP = 'benchmark'
+
+
+def per_second(func, messages):
+    started = time.perf_counter()
+    for message in messages:
+        func(message)
+    return len(messages) / (time.perf_counter() - started)
+
+
+def run():
+    # Уникальные сообщения: кэш подписей не влияет на результат
+    messages = [f'$Flight {i}'.encode() for i in range(MESSAGES)]
+    print(f'{"scheme":>8} {"sign/s":>8} {"verify/s":>9} {"message chars":>14}')
+    for scheme in (rsa_scheme, ed25519_scheme):
+        if not getattr(scheme, 'available', True):
+            print(f'{scheme.name:>8} not supported by the installed pycryptodome')
+            continue
+        key = scheme.generate()
+        public_key = (int(key.n), int(key.e)) if scheme is rsa_scheme else key.public_key()
+        signature_cache.invalidate(KEY_GROUP)
+        signatures = {}
+        sign_rate = per_second(lambda m: signatures.__setitem__(m, scheme.sign(m, key, KEY_GROUP)), messages)
+        verify_rate = per_second(lambda m: scheme.verify(m, signatures[m], public_key), messages)
+        assert all(scheme.verify(m, signatures[m], public_key) for m in messages[:10])
+        message = f'$Flight 1#{hex(signatures[messages[1]])[2:]}'
+        print(f'{scheme.name:>8} {sign_rate:>8.0f} {verify_rate:>9.0f} {len(message):>14}')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,39 @@
+"""
+Сравнение текстового ('lat=...&lon=...') и бинарного форматов телеметрии:
+размер сообщения и стоимость декодирования вместе с приведением типов.
+
+Запуск из каталога orvd:
+    python3 -m benchmarks.telemetry_codec_benchmark
+"""
+import timeit
+from utils import cast_wrapper, decode_telemetry, encode_telemetry_binary
+
+ITERATIONS = 100000
+
+TEXT_PAYLOAD = b'lat=-353632621&lon=1491652374&alt=58409&azimuth=1234567&dop=1.2&sats=12&speed=3.45'
+BINARY_PAYLOAD = encode_telemetry_binary(lat=-353632621, lon=1491652374, alt=58409, azimuth=1234567,
+                                         dop=1.2, sats=12, speed=3.45)
+BINARY_PAYLOAD_TS = encode_telemetry_binary(lat=-353632621, lon=1491652374, alt=58409, azimuth=1234567,
+                                            dop=1.2, sats=12, speed=3.45, timestamp_ms=1700000000123)
+
+
+def decode_and_cast(payload):
+    """Декодирование и приведение типов, как в telemetry_handler."""
+    telemetry = decode_telemetry(payload)
+    return (cast_wrapper(telemetry['lat'], float) / 1e7, cast_wrapper(telemetry['lon'], float) / 1e7,
+            cast_wrapper(telemetry['alt'], float) / 1e2, cast_wrapper(telemetry['azimuth'], float) / 1e7,
+            cast_wrapper(telemetry['dop'], float), cast_wrapper(telemetry['sats'], int),
+            cast_wrapper(telemetry['speed'], float))
+
+
+def run():
+    assert decode_and_cast(TEXT_PAYLOAD) == decode_and_cast(BINARY_PAYLOAD)
+    print(f'{"format":>18} {"bytes":>6} {"decode, us/msg":>15}')
+    for name, payload in (('query string', TEXT_PAYLOAD), ('binary v1', BINARY_PAYLOAD),
+                          ('binary v1 + time', BINARY_PAYLOAD_TS)):
+        elapsed = timeit.timeit(lambda: decode_and_cast(payload), number=ITERATIONS)
+        print(f'{name:>18} {len(payload):>6} {elapsed / ITERATIONS * 1e6:>15.2f}')
+
+
+if __name__ == '__main__':
+    run()
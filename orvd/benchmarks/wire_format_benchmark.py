@@ -0,0 +1,71 @@
+"""
+Размер и время кодирования строки запрещенных зон и полетного задания в текстовом
+и компактном формате (1e-7 градуса, разности, zigzag varint, base64, при выгоде zlib):
+наборы из 100, 1 000 и 10 000 зон по 50 вершин и миссия из 1 000 путевых точек.
+
+Запуск из каталога orvd:
+    python3 -m benchmarks.wire_format_benchmark
+"""
+import math
+import random
+import time
+from utils.compact_codec import encode_forbidden_zones_compact, encode_mission_compact
+from utils.general import get_new_polygon_feature, generate_forbidden_zones_string
+from utils.mission import encode_mission, home_handler, waypoint_handler, encode_mission_message
+
+ZONE_COUNTS = (100, 1000, 10000)
+VERTICES = 50
+WAYPOINTS = 1000
+
+
+def make_zones(rng, count):
+    features = []
+    for i in range(count):
+        lat, lon = 55 + 5 * rng.random(), 30 + 10 * rng.random()
+        radius = rng.uniform(0.002, 0.02)
+        ring = []
+        for j in range(VERTICES):
+            angle = 2 * math.pi * j / VERTICES
+            r = radius * rng.uniform(0.8, 1.2)
+            ring.append([round(lon + 2 * r * math.cos(angle), 7), round(lat + r * math.sin(angle), 7)])
+        features.append(get_new_polygon_feature(f'zone{i}', ring + [ring[0]]))
+    return {"type": "FeatureCollection", "features": features}
+
+
+def measure(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def report(name, text, text_time, encodings):
+    print(f'{name:<22} text     {len(text):>11} B {text_time * 1000:9.1f} ms')
+    for label, (message, encode_time) in encodings.items():
+        print(f'{"":<22} {label:<8} {len(message):>11} B {encode_time * 1000:9.1f} ms '
+              f'{len(message) / len(text):6.1%}')
+
+
+def run():
+    rng = random.Random(0)
+    for count in ZONE_COUNTS:
+        zones = make_zones(rng, count)
+        text, text_time = measure(lambda: generate_forbidden_zones_string(zones))
+        report(f'{count} zones x {VERTICES}', text, text_time, {
+            'varint': measure(lambda: encode_forbidden_zones_compact(zones, compress=False)),
+            'zlib': measure(lambda: encode_forbidden_zones_compact(zones)),
+        })
+
+    mission = [home_handler(60 + rng.random(), 30 + rng.random(), 100)]
+    for _ in range(WAYPOINTS):
+        mission.append(waypoint_handler(float(mission[-1][1]) + rng.uniform(-0.005, 0.005),
+                                        float(mission[-1][2]) + rng.uniform(-0.01, 0.01), rng.uniform(50, 150)))
+    steps = encode_mission(mission)
+    text, text_time = measure(lambda: encode_mission_message(steps))
+    report(f'mission {WAYPOINTS} waypoints', text, text_time, {
+        'varint': measure(lambda: encode_mission_compact(steps, compress=False)),
+        'zlib': measure(lambda: encode_mission_compact(steps)),
+    })
+
+
+if __name__ == '__main__':
+    run()
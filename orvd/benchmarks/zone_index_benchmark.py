@@ -0,0 +1,60 @@
+"""
+Поиск запрещенных зон, содержащих точки: полный перебор is_point_in_polygon по всем
+зонам и сеточный индекс ZoneGridIndex. 10 000 точек против 1 000 зон-восьмиугольников.
+Полный перебор измеряется на части точек и пересчитывается на весь набор.
+
+Запуск из каталога orvd:
+    python3 -m benchmarks.zone_index_benchmark
+"""
+import math
+import random
+import time
+from utils.general import get_new_polygon_feature, is_point_in_polygon
+from utils.zone_index import ZoneGridIndex
+
+POINTS = 10000
+ZONES = 1000
+FULL_SCAN_POINTS = 200
+
+
+def make_zones(rng):
+    features = []
+    for i in range(ZONES):
+        lat, lon = 60 + rng.random(), 30 + rng.random()
+        radius = rng.uniform(0.002, 0.02)
+        polygon = [[round(lon + radius * math.cos(a * math.pi / 4), 7), round(lat + radius * math.sin(a * math.pi / 4), 7)]
+                   for a in range(8)]
+        features.append(get_new_polygon_feature(f'zone{i}', polygon + [polygon[0]]))
+    return {"type": "FeatureCollection", "features": features}
+
+
+def full_scan(zones, points):
+    return [[zone['properties']['name'] for zone in zones['features']
+             if is_point_in_polygon((lon, lat), zone['geometry']['coordinates'][0])] for lat, lon in points]
+
+
+def run():
+    rng = random.Random(0)
+    zones = make_zones(rng)
+    points = [[60 + rng.random(), 30 + rng.random()] for _ in range(POINTS)]
+
+    started = time.perf_counter()
+    expected = full_scan(zones, points[:FULL_SCAN_POINTS])
+    full_scan_time = (time.perf_counter() - started) * POINTS / FULL_SCAN_POINTS
+
+    started = time.perf_counter()
+    index = ZoneGridIndex(zones)
+    build_time = time.perf_counter() - started
+    started = time.perf_counter()
+    result = index.query(points)
+    query_time = time.perf_counter() - started
+    assert result[:FULL_SCAN_POINTS] == expected
+
+    print(f'{POINTS} points x {ZONES} zones, {sum(map(len, result))} hits, index {index.stats()}')
+    print(f'full scan (extrapolated): {full_scan_time:8.3f} s')
+    print(f'grid index build:         {build_time:8.3f} s')
+    print(f'grid index query:         {query_time:8.3f} s ({POINTS / query_time:.0f} points/s)')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,50 @@
+"""
+Импорт большого набора запрещенных зон: 2 000 полигонов по 500 вершин с шумом на
+границе. Потоковый разбор и проверка зон без упрощения и с упрощением, не
+уменьшающим зоны, - время импорта, число вершин и длина строки '$ForbiddenZones'.
+
+Запуск из каталога orvd:
+    python3 -m benchmarks.zones_import_benchmark
+"""
+import io
+import json
+import math
+import random
+import time
+from utils.general import get_new_polygon_feature, generate_forbidden_zones_string
+from utils.zones_import import parse_forbidden_zones_upload
+
+ZONES = 2000
+VERTICES = 500
+TOLERANCES_M = (0, 5, 20, 50)
+
+
+def make_geojson(rng):
+    features = []
+    for i in range(ZONES):
+        lat, lon = 55 + 5 * rng.random(), 30 + 10 * rng.random()
+        radius = rng.uniform(0.005, 0.05)
+        ring = []
+        for j in range(VERTICES):
+            angle = 2 * math.pi * j / VERTICES
+            r = radius * (1 + 0.01 * rng.random())
+            ring.append([round(lon + 2 * r * math.cos(angle), 7), round(lat + r * math.sin(angle), 7)])
+        features.append(get_new_polygon_feature(f'zone{i}', ring + [ring[0]]))
+    return json.dumps({"type": "FeatureCollection", "features": features}).encode('utf-8')
+
+
+def run():
+    data = make_geojson(random.Random(0))
+    print(f'{ZONES} zones x {VERTICES} vertices, {len(data) / 1e6:.1f} MB GeoJSON')
+    print(f'{"tolerance":>10} {"time, s":>8} {"vertices":>9} {"reduction":>10} {"message, MB":>12}')
+    for tolerance in TOLERANCES_M:
+        started = time.perf_counter()
+        zones, report = parse_forbidden_zones_upload(io.BytesIO(data), tolerance)
+        elapsed = time.perf_counter() - started
+        message_size = len(generate_forbidden_zones_string(zones)) / 1e6
+        print(f'{tolerance:>8} m {elapsed:>8.2f} {report["vertices_after"]:>9} '
+              f'{report["vertex_reduction"]:>9.1%} {message_size:>12.2f}')
+
+
+if __name__ == '__main__':
+    run()
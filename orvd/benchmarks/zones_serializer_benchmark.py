@@ -0,0 +1,69 @@
+"""
+Сборка строки '$ForbiddenZones' для 10, 1 000 и 10 000 зон по 50 вершин: прежняя сборка
+конкатенацией в цикле, сборка одним join, сборка с кэшем фрагментов после правки одной
+зоны и полное построение снимка зон после правки одной зоны без кэша и с кэшем.
+
+Запуск из каталога orvd:
+    python3 -m benchmarks.zones_serializer_benchmark
+"""
+import random
+import time
+from utils.forbidden_zones import ZonesSnapshot
+from utils.general import ZoneFragmentCache, generate_forbidden_zones_string, get_new_polygon_feature
+from .wire_format_benchmark import make_zones
+
+ZONE_COUNTS = (10, 1000, 10000)
+
+
+def legacy_forbidden_zones_string(forbidden_zones):
+    result_str = f'$ForbiddenZones {len(forbidden_zones["features"])}'
+    for zone in forbidden_zones['features']:
+        name = zone['properties']['name']
+        coordinates = zone['geometry']['coordinates'][0]
+        result_str += f'&{name}&{len(coordinates)}&{"&".join(list(map(lambda e: f"{e[1]:.7f}_{e[0]:.7f}", coordinates)))}'
+    return result_str
+
+
+def measure(func, runs):
+    started = time.perf_counter()
+    for _ in range(runs):
+        result = func()
+    return result, (time.perf_counter() - started) / runs
+
+
+def edit_zone(zones, rng):
+    # Как set_zone: новый список зон, в котором заменена одна зона
+    features = list(zones['features'])
+    idx = rng.randrange(len(features))
+    ring = [[lon + 1e-4, lat] for lon, lat in features[idx]['geometry']['coordinates'][0]]
+    features[idx] = get_new_polygon_feature(features[idx]['properties']['name'], ring)
+    return {**zones, 'features': features}
+
+
+def run():
+    rng = random.Random(0)
+    print(f'{"zones":>6} {"legacy":>10} {"join":>10} {"cached edit":>12} {"snapshot":>10} {"+cache":>10}')
+    for count in ZONE_COUNTS:
+        runs = max(1, 1000 // count)
+        zones = make_zones(rng, count)
+        expected, legacy_time = measure(lambda: legacy_forbidden_zones_string(zones), runs)
+        result, join_time = measure(lambda: generate_forbidden_zones_string(zones), runs)
+        assert result == expected
+
+        cache = ZoneFragmentCache()
+        generate_forbidden_zones_string(zones, cache)
+        edits = [edit_zone(zones, rng) for _ in range(runs)]
+        started = time.perf_counter()
+        for edited in edits:
+            result = generate_forbidden_zones_string(edited, cache)
+        cached_time = (time.perf_counter() - started) / runs
+        assert result == generate_forbidden_zones_string(edits[-1])
+
+        _, snapshot_time = measure(lambda: ZonesSnapshot(2, edits[-1]), runs)
+        _, cached_snapshot_time = measure(lambda: ZonesSnapshot(2, edits[-1], cache), runs)
+        print(f'{count:>6} {legacy_time * 1000:>7.2f} ms {join_time * 1000:>7.2f} ms {cached_time * 1000:>9.2f} ms '
+              f'{snapshot_time * 1000:>7.2f} ms {cached_snapshot_time * 1000:>7.2f} ms')
+
+
+if __name__ == '__main__':
+    run()
@@ -1,84 +1,195 @@
 import os
 import re
+import time
+import zlib
 import paho.mqtt.client as mqtt
-from paho.mqtt.client import topic_matches_sub
+from .topic_router import TopicRouter
+from .mqtt_dispatcher import KeyedDispatcher
+from .mqtt_outbox import MQTTOutbox
+from .mqtt_metrics import MQTTMetrics
+
+
+def wsgi_partition_index():
+    """
+    Возвращает номер раздела процесса mod_wsgi, если его можно определить.
+
+    Переменные окружения общие для всех процессов mod_wsgi, поэтому MQTT_PARTITION_INDEX
+    не различает процессы одной группы. Для нескольких процессов ОРВД заводится по группе
+    WSGIDaemonProcess с processes=1 на каждый раздел (orvd0, orvd1, ...), и номер раздела
+    берется из числа в конце имени группы.
+
+    Returns:
+        int | None: Номер раздела или None, если процесс запущен не под mod_wsgi
+            или имя группы не оканчивается числом.
+
+    Raises:
+        ValueError: Группа mod_wsgi содержит несколько процессов, которые получили бы один номер раздела.
+    """
+    try:
+        import mod_wsgi
+    except ImportError:
+        return None
+    if getattr(mod_wsgi, 'maximum_processes', 1) > 1:
+        raise ValueError(f"mod_wsgi process group {mod_wsgi.process_group} has "
+                         f"{mod_wsgi.maximum_processes} processes, each MQTT partition needs processes=1")
+    match = re.search(r'(\d+)$', getattr(mod_wsgi, 'process_group', '') or '')
+    return int(match.group(1)) if match else None
+
 
 class MQTTClientWrapper:
     def __init__(self, app=None):
         self.client = None
         self._topic_handlers = {}
+        self._router = TopicRouter()
+        self._dispatcher = None
+        self._outbox = None
+        self._connect_callbacks = []
+        self.metrics = MQTTMetrics()
+        self.publish_qos = 0
+        self.shared_group = None
+        self.partition_count = 1
+        self.partition_index = 0
         self.app = app
 
     def _generate_mqtt_subscription_pattern(self, user_pattern):
         mqtt_pattern = re.sub(r'\{[^}]+\}', '+', user_pattern)
         return mqtt_pattern
 
-    def topic(self, user_pattern):
+    def topic(self, user_pattern, partitioned=False, replaceable=False):
+        """
+        Регистрирует обработчик MQTT-топика.
+
+        partitioned=True помечает топики, у которых должен быть единственный владелец
+        (запросы арма и новой миссии): при нескольких процессах ОРВД такой топик получают
+        все процессы, но обрабатывает только владелец раздела, вычисленного по {id}.
+        replaceable=True помечает сообщения, которые при переполненной очереди БПЛА
+        можно отбросить ради более новых (телеметрия).
+        """
         def decorator(handler_func):
             mqtt_subscription_pattern = self._generate_mqtt_subscription_pattern(user_pattern)
             self._topic_handlers[user_pattern] = {
                 'mqtt_pattern': mqtt_subscription_pattern,
-                'handler': handler_func
+                'handler': handler_func,
+                'partitioned': partitioned,
+                'replaceable': replaceable
             }
+            self._router.add(user_pattern, mqtt_subscription_pattern, handler_func, partitioned, replaceable)
             return handler_func
         return decorator
 
+    def on_connect(self, callback):
+        """
+        Регистрирует функцию, вызываемую после каждого подключения к брокеру
+        (в том числе после переподключения).
+        """
+        self._connect_callbacks.append(callback)
+        return callback
+
+    def _subscription_topics(self):
+        topics = []
+        for details in self._topic_handlers.values():
+            if self.shared_group and not details['partitioned']:
+                # Общая подписка: брокер распределяет сообщения между процессами группы
+                topics.append(f"$share/{self.shared_group}/{details['mqtt_pattern']}")
+            else:
+                topics.append(details['mqtt_pattern'])
+        return topics
+
+    def configure_partitions(self, shared_group, partition_count, partition_index):
+        """
+        Задает группу общей подписки и раздел текущего процесса.
+
+        Общая подписка имеет смысл только при нескольких разделах: иначе каждый процесс
+        считает себя владельцем всех БПЛА, и запросы арма обрабатываются несколько раз.
+
+        Args:
+            shared_group (str | None): Имя группы общей подписки MQTT.
+            partition_count (int): Число процессов ОРВД.
+            partition_index (int): Номер раздела текущего процесса, от 0 до partition_count - 1.
+
+        Raises:
+            ValueError: Некорректное сочетание параметров.
+        """
+        if partition_count < 1:
+            raise ValueError(f"MQTT_PARTITION_COUNT must be positive, got {partition_count}")
+        if shared_group and partition_count == 1:
+            raise ValueError("MQTT_SHARED_GROUP requires MQTT_PARTITION_COUNT > 1")
+        if not 0 <= partition_index < partition_count:
+            raise ValueError(f"MQTT partition index {partition_index} is out of range 0..{partition_count - 1}")
+        self.shared_group = shared_group or None
+        self.partition_count = partition_count
+        self.partition_index = partition_index
+
+    def owns_partition(self, key):
+        if self.partition_count <= 1:
+            return True
+        return zlib.crc32(str(key).encode()) % self.partition_count == self.partition_index
+
     def _on_connect(self, client, userdata, flags, rc):
         if rc == 0:
             print("Connected successfully to MQTT Broker.")
-            for user_pattern, details in self._topic_handlers.items():
-                mqtt_pattern_to_subscribe = details['mqtt_pattern']
+            for mqtt_pattern_to_subscribe in self._subscription_topics():
                 client.subscribe(mqtt_pattern_to_subscribe)
-                print(f"Subscribed to MQTT pattern: {mqtt_pattern_to_subscribe} (derived from user pattern: {user_pattern})")
+                print(f"Subscribed to MQTT pattern: {mqtt_pattern_to_subscribe}")
+            for callback in self._connect_callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Error in MQTT connect callback {callback.__name__}: {e}")
         else:
             print(f"Failed to connect to MQTT Broker, return code {rc}")
 
     def _on_message(self, client, userdata, msg):
+        matches = self._router.match(msg.topic)
+        if matches and matches[0][0].partitioned and not self.owns_partition(matches[0][1].get('id', msg.topic)):
+            return
+        if self._dispatcher and matches:
+            # Сообщения одного БПЛА обрабатываются по порядку, разных БПЛА - параллельно
+            key = matches[0][1].get('id', msg.topic)
+            self._dispatcher.submit(key, self._handle_message, client, userdata, msg, matches,
+                                    replaceable=matches[0][0].replaceable)
+        else:
+            self._handle_message(client, userdata, msg, matches)
+
+    def run_keyed(self, key, func, *args):
+        """
+        Выполняет функцию в очереди обработчиков ключа (идентификатора БПЛА) в контексте приложения.
+
+        Используется для завершения запросов, ожидавших решения оператора: ответ
+        формируется по порядку с остальными сообщениями БПЛА, но ожидание не занимает
+        поток его очереди.
+        """
+        def run():
+            try:
+                if self.app:
+                    with self.app.app_context():
+                        func(*args)
+                else:
+                    func(*args)
+            except Exception as e:
+                print(f"Error in deferred MQTT handler for {key}: {e}")
+        if not (self._dispatcher and self._dispatcher.submit(key, run)):
+            run()
+
+    def _handle_message(self, client, userdata, msg, matches):
+        if not matches:
+            self.metrics.observe_unmatched()
         message_handled = False
-        for user_pattern, details in self._topic_handlers.items():
-            mqtt_subscription_pattern = details['mqtt_pattern']
-            handler_func = details['handler']
-
-            if topic_matches_sub(mqtt_subscription_pattern, msg.topic):
-                topic_parts = msg.topic.split('/')
-                user_pattern_parts = user_pattern.split('/')
-                
-                wildcards = []
-                hash_path_parts = []
-                
-                path_params = {}
-
-                for i, part in enumerate(user_pattern_parts):
-                    if part == '+':
-                        if i < len(topic_parts):
-                            wildcards.append(topic_parts[i])
-                    elif part == '#':
-                        if i < len(topic_parts):
-                            hash_path_parts = topic_parts[i:]
-                        break
-                    elif part.startswith('{') and part.endswith('}'):
-                        param_name = part[1:-1]
-                        if i < len(topic_parts):
-                            path_params[param_name] = topic_parts[i]
-                
-                kwargs = {}
-                if wildcards:
-                    kwargs['wildcards'] = wildcards
-                if hash_path_parts:
-                    kwargs['hash_path'] = "/".join(hash_path_parts)
-                kwargs.update(path_params)
+        for route, kwargs in matches:
+            started = time.perf_counter()
+            try:
+                if self.app:
+                    with self.app.app_context():
+                        route.handler(client, userdata, msg, **kwargs)
+                else:
+                    route.handler(client, userdata, msg, **kwargs)
+                self.metrics.observe(route.user_pattern, len(msg.payload), time.perf_counter() - started)
+                message_handled = True
+                break
+            except Exception as e:
+                self.metrics.observe(route.user_pattern, len(msg.payload), time.perf_counter() - started, error=True)
+                print(f"Error processing message on topic {msg.topic} with handler for user pattern {route.user_pattern}: {e}")
 
-                try:
-                    if self.app:
-                        with self.app.app_context():
-                            handler_func(client, userdata, msg, **kwargs)
-                    else:
-                        handler_func(client, userdata, msg, **kwargs)
-                    message_handled = True
-                    break
-                except Exception as e:
-                    print(f"Error processing message on topic {msg.topic} with handler for user pattern {user_pattern}: {e}")
-        
         if not message_handled:
             print(f"No suitable handler registered or error in all handlers for topic {msg.topic}")
 
@@ -86,6 +197,26 @@ class MQTTClientWrapper:
         MQTT_BROKER = os.environ.get("MQTT_HOST", "localhost")
         MQTT_PORT = int(os.environ.get("MQTT_PORT", 1883))
         MQTT_CLIENT_ID = os.environ.get("MQTT_CLIENT_ID", f"orvd_server_mqtt_client_{os.getpid()}")
+        MQTT_HANDLER_WORKERS = int(os.environ.get("MQTT_HANDLER_WORKERS", 16))
+        # Предельная длина очереди сообщений одного БПЛА
+        MQTT_HANDLER_QUEUE_SIZE = int(os.environ.get("MQTT_HANDLER_QUEUE_SIZE", 100))
+
+        self.publish_qos = int(os.environ.get("MQTT_PUBLISH_QOS", self.publish_qos))
+        # Номер раздела должен быть своим у каждого процесса: под mod_wsgi он берется из имени группы процессов
+        partition_count = int(os.environ.get("MQTT_PARTITION_COUNT", self.partition_count))
+        partition_index = wsgi_partition_index() if partition_count > 1 else None
+        if partition_index is None:
+            partition_index = int(os.environ.get("MQTT_PARTITION_INDEX", self.partition_index))
+        self.configure_partitions(os.environ.get("MQTT_SHARED_GROUP", self.shared_group) or None,
+                                  partition_count, partition_index)
+
+        if MQTT_HANDLER_WORKERS > 0 and self._dispatcher is None:
+            self._dispatcher = KeyedDispatcher(max_workers=MQTT_HANDLER_WORKERS, max_pending=MQTT_HANDLER_QUEUE_SIZE)
+
+        # Очередь создается до подключения: обработчики подключения уже публикуют сообщения
+        if self._outbox is None:
+            self._outbox = MQTTOutbox(self._publish_now, self.app)
+            self._outbox.start()
 
         self.client = mqtt.Client(client_id=MQTT_CLIENT_ID)
         self.client.on_connect = self._on_connect
@@ -102,18 +233,56 @@ class MQTTClientWrapper:
         print("MQTT client loop started.")
         return True
 
-    def publish_message(self, topic, payload, qos=0, retain=False):
+    def publish_message(self, topic, payload, qos=None, retain=False, coalesce=False, delay=0, max_delay=None):
+        """
+        Публикует сообщение через очередь исходящих сообщений.
+
+        payload может быть строкой или функцией, строящей сообщение перед отправкой
+        (функция вызывается в контексте приложения и может вернуть None, чтобы ничего не отправлять).
+        При coalesce=True ожидающее сообщение в тот же топик заменяется новым.
+        При delay > 0 (секунды) сообщение отправляется после паузы в delay секунд без
+        новых сообщений в тот же топик, но не позже чем через max_delay секунд.
+        """
+        if qos is None:
+            qos = self.publish_qos
+        if self._outbox:
+            self._outbox.put(topic, payload, qos, retain, coalesce, delay, max_delay)
+        else:
+            if callable(payload):
+                payload = payload()
+            if payload is not None:
+                self._publish_now(topic, payload, qos, retain)
+
+    def _publish_now(self, topic, payload, qos, retain):
         if self.client and self.client.is_connected():
             self.client.publish(topic, payload, qos, retain)
-            print(f"Published message to topic {topic}: {payload}")
+            print(f"Published message to topic {topic} ({len(payload)} bytes)")
+            return True
         else:
             print("Client not connected. Cannot publish message.")
-                
+            return False
+
     def disconnect(self):
+        if self._outbox:
+            self._outbox.stop()
+            self._outbox = None
         if self.client:
             self.client.loop_stop()
             self.client.disconnect()
             print("MQTT client disconnected.")
+        if self._dispatcher:
+            self._dispatcher.shutdown()
+            self._dispatcher = None
+
+    def dispatcher_stats(self):
+        if self._dispatcher:
+            return self._dispatcher.stats()
+        return None
+
+    def outbox_stats(self):
+        if self._outbox:
+            return self._outbox.stats()
+        return None
 
     def init_app(self, app):
         self.app = app
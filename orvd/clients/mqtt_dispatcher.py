@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class KeyedDispatcher:
+    """
+    Пул потоков для обработчиков MQTT-сообщений.
+
+    Сообщения с одинаковым ключом (идентификатором БПЛА) выполняются строго
+    по очереди в порядке поступления, сообщения с разными ключами - параллельно.
+    Очередь каждого ключа ограничена max_pending сообщениями, поэтому один
+    отстающий БПЛА не вытесняет сообщения остальных. Постановка в очередь никогда
+    не блокирует сетевой поток MQTT: если очередь ключа полна, из нее удаляется
+    самое старое заменяемое сообщение (устаревшая телеметрия), а если таких нет,
+    отбрасывается новое сообщение.
+    """
+    # Сколько сообщений одного ключа обрабатывается подряд, прежде чем поток уступит другим ключам
+    DRAIN_BATCH = 32
+
+    def __init__(self, max_workers=16, max_pending=100):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mqtt_handler')
+        self._lock = threading.Lock()
+        self._queues = {}
+        self._pending = 0
+        self._running = 0
+        self._started = 0
+        self._processed = 0
+        self._dropped = 0
+        self._replaced = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._shutdown = False
+
+    def submit(self, key, func, *args, replaceable=False):
+        """
+        Ставит обработчик в очередь ключа, не блокируя вызывающий поток.
+
+        Args:
+            key (str): Ключ очереди (идентификатор БПЛА).
+            func (callable): Обработчик.
+            *args: Аргументы обработчика.
+            replaceable (bool): Сообщение можно удалить из переполненной очереди
+                ради более нового (телеметрия).
+
+        Returns:
+            bool: True, если сообщение поставлено в очередь.
+        """
+        if self._shutdown:
+            return False
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = deque()
+                schedule = True
+            else:
+                # Для ключа уже запланирован обработчик очереди, он заберет и это сообщение
+                schedule = False
+            if len(queue) >= self.max_pending:
+                stale = next((item for item in queue if item[3]), None)
+                if stale is None:
+                    self._dropped += 1
+                    print(f"MQTT handler queue for {key} is full ({self.max_pending}), message dropped")
+                    return False
+                queue.remove(stale)
+                self._pending -= 1
+                self._replaced += 1
+            self._pending += 1
+            queue.append((time.monotonic(), func, args, replaceable))
+        if schedule:
+            self._executor.submit(self._drain, key)
+        return True
+
+    def _drain(self, key):
+        handled = 0
+        while True:
+            with self._lock:
+                queue = self._queues[key]
+                if not queue:
+                    del self._queues[key]
+                    return
+                enqueued_at, func, args, _ = queue.popleft()
+                wait = time.monotonic() - enqueued_at
+                self._pending -= 1
+                self._running += 1
+                self._started += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Error in MQTT handler for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._processed += 1
+            handled += 1
+            if handled >= self.DRAIN_BATCH and not self._shutdown:
+                try:
+                    self._executor.submit(self._drain, key)
+                    return
+                except RuntimeError:
+                    # Пул уже останавливается - дорабатываем очередь в текущем потоке
+                    pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'queue_capacity_per_key': self.max_pending,
+                'queue_depth': self._pending,
+                'running': self._running,
+                'active_keys': len(self._queues),
+                'processed': self._processed,
+                'dropped': self._dropped,
+                'replaced': self._replaced,
+                'wait_avg_ms': round(self._wait_total / self._started * 1e3, 3) if self._started else 0.0,
+                'wait_max_ms': round(self._wait_max * 1e3, 3),
+            }
+
+    def shutdown(self, wait=True):
+        self._shutdown = True
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,101 @@
+import bisect
+import threading
+
+# Границы корзин гистограммы времени обработки, в секундах
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _TopicStats:
+    __slots__ = ('messages', 'bytes', 'errors', 'buckets', 'latency_sum')
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self.errors = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MQTTMetrics:
+    """
+    Метрики входящего MQTT-трафика по шаблонам топиков: число сообщений, байты,
+    гистограмма времени работы обработчика и число исключений.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = {}
+        self._unmatched = 0
+
+    def observe(self, pattern, size, duration, error=False):
+        index = bisect.bisect_left(LATENCY_BUCKETS, duration)
+        with self._lock:
+            stats = self._topics.get(pattern)
+            if stats is None:
+                stats = self._topics[pattern] = _TopicStats()
+            stats.messages += 1
+            stats.bytes += size
+            stats.buckets[index] += 1
+            stats.latency_sum += duration
+            if error:
+                stats.errors += 1
+
+    def observe_unmatched(self):
+        with self._lock:
+            self._unmatched += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                pattern: {
+                    'messages': stats.messages,
+                    'bytes': stats.bytes,
+                    'errors': stats.errors,
+                    'buckets': list(stats.buckets),
+                    'latency_sum': stats.latency_sum,
+                }
+                for pattern, stats in self._topics.items()
+            }, self._unmatched
+
+    def to_prometheus(self):
+        """
+        Возвращает метрики в текстовом формате Prometheus.
+        """
+        topics, unmatched = self.snapshot()
+        lines = [
+            '# HELP orvd_mqtt_messages_total Received MQTT messages per topic pattern.',
+            '# TYPE orvd_mqtt_messages_total counter',
+        ]
+        lines += [f'orvd_mqtt_messages_total{{topic="{_escape_label(p)}"}} {s["messages"]}' for p, s in topics.items()]
+        lines += [
+            '# HELP orvd_mqtt_received_bytes_total Received MQTT payload bytes per topic pattern.',
+            '# TYPE orvd_mqtt_received_bytes_total counter',
+        ]
+        lines += [f'orvd_mqtt_received_bytes_total{{topic="{_escape_label(p)}"}} {s["bytes"]}' for p, s in topics.items()]
+        lines += [
+            '# HELP orvd_mqtt_handler_errors_total Exceptions raised by MQTT handlers per topic pattern.',
+            '# TYPE orvd_mqtt_handler_errors_total counter',
+        ]
+        lines += [f'orvd_mqtt_handler_errors_total{{topic="{_escape_label(p)}"}} {s["errors"]}' for p, s in topics.items()]
+        lines += [
+            '# HELP orvd_mqtt_handler_duration_seconds MQTT handler execution time per topic pattern.',
+            '# TYPE orvd_mqtt_handler_duration_seconds histogram',
+        ]
+        for pattern, stats in topics.items():
+            label = _escape_label(pattern)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats['buckets']):
+                cumulative += count
+                lines.append(f'orvd_mqtt_handler_duration_seconds_bucket{{topic="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'orvd_mqtt_handler_duration_seconds_bucket{{topic="{label}",le="+Inf"}} {stats["messages"]}')
+            lines.append(f'orvd_mqtt_handler_duration_seconds_sum{{topic="{label}"}} {stats["latency_sum"]}')
+            lines.append(f'orvd_mqtt_handler_duration_seconds_count{{topic="{label}"}} {stats["messages"]}')
+        lines += [
+            '# HELP orvd_mqtt_unmatched_messages_total Received MQTT messages without a registered handler.',
+            '# TYPE orvd_mqtt_unmatched_messages_total counter',
+            f'orvd_mqtt_unmatched_messages_total {unmatched}',
+        ]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,137 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+
+class MQTTOutbox:
+    """
+    Очередь исходящих MQTT-сообщений с отдельным потоком публикации.
+
+    Сообщение можно передать готовой строкой или функцией, которая строит его
+    непосредственно перед публикацией. Сообщения с coalesce=True заменяют
+    ожидающее сообщение в тот же топик: после серии изменений состояния БПЛА
+    будет построено, подписано и отправлено только последнее. Сообщение с delay > 0
+    отправляется после паузы в delay секунд без новых сообщений в тот же топик,
+    но не позже чем через max_delay секунд после первого из них.
+    """
+    def __init__(self, publish_func, app=None):
+        self._publish_func = publish_func
+        self.app = app
+        self._queue = OrderedDict()
+        # Отложенные сообщения: топик -> [срок отправки, крайний срок, топик, сообщение, qos, retain]
+        self._delayed = {}
+        self._cond = threading.Condition()
+        self._sequence = itertools.count()
+        self._thread = None
+        self._stopping = False
+        self._published = 0
+        self._coalesced = 0
+        self._dropped = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='mqtt_outbox', daemon=True)
+            self._thread.start()
+
+    def put(self, topic, payload, qos, retain=False, coalesce=False, delay=0, max_delay=None):
+        if delay > 0:
+            self._put_delayed(topic, payload, qos, retain, delay, max_delay)
+            return
+        key = ('topic', topic) if coalesce else ('seq', next(self._sequence))
+        with self._cond:
+            entry = self._queue.get(key)
+            if entry is not None:
+                # Заменяем устаревшее сообщение, сохраняя его место в очереди и время постановки
+                self._queue[key] = (entry[0], topic, payload, qos, retain)
+                self._coalesced += 1
+            else:
+                self._queue[key] = (time.monotonic(), topic, payload, qos, retain)
+                self._cond.notify()
+
+    def _put_delayed(self, topic, payload, qos, retain, delay, max_delay):
+        now = time.monotonic()
+        with self._cond:
+            entry = self._delayed.get(topic)
+            if entry is not None:
+                # Новое сообщение откладывает отправку, но не дальше крайнего срока первого
+                entry[0] = min(now + delay, entry[1])
+                entry[3:] = [payload, qos, retain]
+                self._coalesced += 1
+            else:
+                deadline = now + max(delay, max_delay or delay)
+                self._delayed[topic] = [now + delay, deadline, topic, payload, qos, retain]
+                self._cond.notify()
+
+    def _release_delayed(self, now):
+        # Вызывается под self._cond; возвращает время до ближайшего срока отправки.
+        # Задержка отправки намеренная, поэтому задержка очереди отсчитывается от этого момента
+        timeout = None
+        for topic, entry in list(self._delayed.items()):
+            if entry[0] <= now or self._stopping:
+                del self._delayed[topic]
+                self._queue[('topic', topic)] = (now, *entry[2:])
+            elif timeout is None or entry[0] - now < timeout:
+                timeout = entry[0] - now
+        return timeout
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    timeout = self._release_delayed(time.monotonic()) if self._delayed else None
+                    if self._queue or (self._stopping and timeout is None):
+                        break
+                    self._cond.wait(timeout)
+                if not self._queue:
+                    return
+                _, (enqueued_at, topic, payload, qos, retain) = self._queue.popitem(last=False)
+            self._send(enqueued_at, topic, payload, qos, retain)
+
+    def _send(self, enqueued_at, topic, payload, qos, retain):
+        try:
+            if callable(payload):
+                if self.app:
+                    with self.app.app_context():
+                        payload = payload()
+                else:
+                    payload = payload()
+            if payload is None or not self._publish_func(topic, payload, qos, retain):
+                self._dropped += 1
+                return
+        except Exception as e:
+            self._dropped += 1
+            print(f"Error publishing message to topic {topic}: {e}")
+            return
+        latency = time.monotonic() - enqueued_at
+        self._published += 1
+        self._latency_total += latency
+        self._latency_max = max(self._latency_max, latency)
+
+    def stats(self):
+        with self._cond:
+            depth = len(self._queue)
+            delayed = len(self._delayed)
+        return {
+            'queue_depth': depth,
+            'delayed': delayed,
+            'published': self._published,
+            'coalesced': self._coalesced,
+            'dropped': self._dropped,
+            'latency_avg_ms': round(self._latency_total / self._published * 1e3, 3) if self._published else 0.0,
+            'latency_max_ms': round(self._latency_max * 1e3, 3),
+        }
+
+    def stop(self):
+        """
+        Останавливает поток публикации, предварительно отправив накопленные сообщения.
+        """
+        if self._thread is not None:
+            with self._cond:
+                self._stopping = True
+                self._cond.notify()
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,119 @@
+import re
+
+_PARAM_RE = re.compile(r'^\{([^}]+)\}$')
+
+
+class _Route:
+    __slots__ = ('user_pattern', 'mqtt_pattern', 'handler', 'order', 'partitioned', 'replaceable',
+                 'params', 'wildcards', 'hash_index')
+
+    def __init__(self, user_pattern, mqtt_pattern, handler, order, partitioned=False, replaceable=False):
+        self.user_pattern = user_pattern
+        self.mqtt_pattern = mqtt_pattern
+        self.handler = handler
+        self.order = order
+        self.partitioned = partitioned
+        self.replaceable = replaceable
+        self.params = []
+        self.wildcards = []
+        self.hash_index = None
+
+    def extract_kwargs(self, topic_parts):
+        kwargs = {}
+        if self.wildcards:
+            kwargs['wildcards'] = [topic_parts[i] for i in self.wildcards]
+        if self.hash_index is not None and self.hash_index < len(topic_parts):
+            kwargs['hash_path'] = '/'.join(topic_parts[self.hash_index:])
+        for i, name in self.params:
+            kwargs[name] = topic_parts[i]
+        return kwargs
+
+
+class _Node:
+    __slots__ = ('children', 'single', 'multi', 'routes')
+
+    def __init__(self):
+        self.children = {}
+        self.single = None
+        self.multi = None
+        self.routes = []
+
+
+class TopicRouter:
+    """
+    Префиксное дерево шаблонов MQTT-топиков.
+
+    Шаблоны вида 'api/telemetry/{id}' компилируются один раз при регистрации,
+    поэтому поиск обработчика и извлечение параметров пути выполняются
+    за O(глубина топика) независимо от количества зарегистрированных шаблонов.
+    """
+    def __init__(self):
+        self._root = _Node()
+        self._routes = []
+
+    def __len__(self):
+        return len(self._routes)
+
+    def add(self, user_pattern, mqtt_pattern, handler, partitioned=False, replaceable=False):
+        route = _Route(user_pattern, mqtt_pattern, handler, len(self._routes), partitioned, replaceable)
+        node = self._root
+        parts = user_pattern.split('/')
+        for i, part in enumerate(parts):
+            param = _PARAM_RE.match(part)
+            if part == '#':
+                if i != len(parts) - 1:
+                    raise ValueError(f"'#' must be the last level of topic pattern {user_pattern}")
+                route.hash_index = i
+                if node.multi is None:
+                    node.multi = _Node()
+                node = node.multi
+                break
+            elif part == '+' or param:
+                if param:
+                    route.params.append((i, param.group(1)))
+                else:
+                    route.wildcards.append(i)
+                if node.single is None:
+                    node.single = _Node()
+                node = node.single
+            else:
+                node = node.children.setdefault(part, _Node())
+        node.routes.append(route)
+        self._routes.append(route)
+        return route
+
+    def routes(self):
+        return list(self._routes)
+
+    def match(self, topic):
+        """
+        Находит все шаблоны, подходящие под топик.
+
+        Args:
+            topic (str): Топик полученного сообщения.
+
+        Returns:
+            list: Пары (маршрут, kwargs) в порядке регистрации шаблонов.
+        """
+        topic_parts = topic.split('/')
+        depth = len(topic_parts)
+        # Как и topic_matches_sub, шаблоны с '+'/'#' на первом уровне не совпадают с топиками '$SYS/...'
+        allow_wildcard_root = not topic.startswith('$')
+        found = []
+        stack = [(self._root, 0)]
+        while stack:
+            node, level = stack.pop()
+            wildcard_allowed = level > 0 or allow_wildcard_root
+            if node.multi is not None and wildcard_allowed:
+                found.extend(node.multi.routes)
+            if level == depth:
+                found.extend(node.routes)
+                continue
+            child = node.children.get(topic_parts[level])
+            if child is not None:
+                stack.append((child, level + 1))
+            if node.single is not None and wildcard_allowed:
+                stack.append((node.single, level + 1))
+        if len(found) > 1:
+            found.sort(key=lambda route: route.order)
+        return [(route, route.extract_kwargs(topic_parts)) for route in found]
@@ -15,10 +15,14 @@ NOT_FOUND = '$-1'
 OK = '$OK'
 
 LOGS_PATH = './logs'
+KEYS_PATH = './keys'
 FORBIDDEN_ZONES_PATH = './static/resources/forbidden_zones.json'
 FORBIDDEN_ZONES_DELTA_PATH = './static/resources/forbidden_zones_delta.json'
 TILES_PATH = './static/resources/tiles'
 
+# Максимальное количество точек в одном запросе поиска запрещенных зон
+MAX_ZONE_QUERY_POINTS = 100000
+
 log_level_map = {
     'CRITICAL': logging.CRITICAL,
     'FATAL': logging.FATAL,
@@ -34,12 +38,22 @@ class KeyGroup:
     KOS = 'kos'
     MS = 'ms'
     ORVD = 'orvd'
+    ORVD_ED25519 = 'orvd_ed25519'
+
+class SignatureSchemeName:
+    RSA = 'rsa'
+    ED25519 = 'ed25519'
+
+class WireFormat:
+    TEXT = 'text'
+    COMPACT = 'compact'
 
 class MissionVerificationStatus:
     OK = 'Mission accepted.'
     NON_ZERO_DELAY_WAYPOINT = 'Error: The mission contains a waypoint with non-zero delay.'
     WRONG_DELAY = 'Error: Delay in the mission can contain only one parameter (delay in seconds).'
     UNKNOWN_COMMAND = 'Error: The mission contains an unknown command. Allowed commands: 16, 21, 22, 93, 183.'
+    FORBIDDEN_ZONE_INTERSECTION = 'Error: The mission route crosses a forbidden zone.'
 
 class MQTTTopic:
     # receivable
@@ -56,6 +70,10 @@ class MQTTTopic:
     NMISSION_RESPONSE = 'api/nmission/response/{id}'
     FLIGHT_STATUS = 'api/flight_status/{id}'
     FORBIDDEN_ZONES = 'api/forbidden_zones'
+    FORBIDDEN_ZONES_COMPACT = 'api/forbidden_zones/compact'
+    # Зоны, подписанные ключом ОРВД Ed25519, для БПЛА, выбравших эту схему при обмене ключами
+    FORBIDDEN_ZONES_ED25519 = 'api/forbidden_zones/ed25519'
+    FORBIDDEN_ZONES_COMPACT_ED25519 = 'api/forbidden_zones/compact/ed25519'
     FMISSION_KOS = 'api/fmission_kos/{id}'
     AUTH = 'api/auth/{id}'
     
@@ -95,6 +113,7 @@ class AdminRoute:
     GET_FORBIDDEN_ZONES_NAMES = '/admin/get_forbidden_zones_names'
     SET_FORBIDDEN_ZONE = '/admin/set_forbidden_zone'
     DELETE_FORBIDDEN_ZONE = '/admin/delete_forbidden_zone'
+    FIND_FORBIDDEN_ZONES = '/admin/find_forbidden_zones'
     FORBIDDEN_ZONES = '/admin/forbidden_zones'
     EXPORT_FORBIDDEN_ZONES = '/admin/export_forbidden_zones'
     IMPORT_FORBIDDEN_ZONES = '/admin/import_forbidden_zones'
@@ -106,6 +125,8 @@ class AdminRoute:
     GET_FLIGHT_INFO_RESPONSE_MODE = '/admin/get_flight_info_response_mode'
     TOGGLE_FLIGHT_INFO_RESPONSE_MODE = '/admin/toggle_flight_info_response_mode'
     GET_ALL_DATA = '/admin/get_all_data'
+    GET_METRICS = '/admin/get_metrics'
+    METRICS = '/admin/metrics'
 
 class GeneralRoute:
     INDEX = '/'
@@ -1,13 +1,53 @@
 import logging
+import threading
 from dataclasses import dataclass, field
 
+
+class DecisionQueue:
+    """
+    БПЛА, ожидающие решения оператора (арм, новая миссия).
+
+    Обработчик запроса не ждет решения в цикле, а ставит БПЛА в очередь вместе
+    с функцией обратного вызова. Функция вызывается без аргументов, когда оператор
+    принимает решение и БПЛА удаляется из очереди.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Идентификатор БПЛА -> функции, ожидающие решения
+        self._waiters = {}
+
+    def add(self, id, callback=None):
+        with self._lock:
+            callbacks = self._waiters.setdefault(id, [])
+            if callback is not None:
+                callbacks.append(callback)
+
+    def remove(self, id):
+        with self._lock:
+            callbacks = self._waiters.pop(id)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in decision callback for {id}: {e}")
+
+    def __contains__(self, id):
+        return id in self._waiters
+
+    def __len__(self):
+        return len(self._waiters)
+
+    def __iter__(self):
+        return iter(list(self._waiters))
+
+
 @dataclass
 class Context:
     log_level: int = logging.INFO
     display_only: bool = False
     flight_info_response: bool = True
-    arm_queue: set = field(default_factory=set)
-    revise_mission_queue: set = field(default_factory=set)
+    arm_queue: DecisionQueue = field(default_factory=DecisionQueue)
+    revise_mission_queue: DecisionQueue = field(default_factory=DecisionQueue)
     loaded_keys: dict = field(default_factory=dict)
 
 context = Context()
\ No newline at end of file
@@ -1,7 +1,13 @@
 from extensions import db, migrate
 from .dao import *
 from .models import *
+from .telemetry_writer import telemetry_writer
+from .telemetry_cache import latest_telemetry
+from .key_cache import public_key_cache
+from .keystore import keystore
 
 def init_app(app):
     db.init_app(app)
-    migrate.init_app(app, db)
\ No newline at end of file
+    migrate.init_app(app, db)
+    telemetry_writer.init_app(app)
+    keystore.init_app(app)
\ No newline at end of file
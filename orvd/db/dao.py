@@ -2,9 +2,15 @@ import os
 import secrets
 from extensions import db
 from hashlib import sha256
-from constants import KeyGroup
+try:
+    from Cryptodome.Signature import eddsa
+except ImportError:
+    eddsa = None
+from constants import KeyGroup, SignatureSchemeName
 from context import context
 from .models import User, UavTelemetry, MissionStep, Mission, MissionSenderPublicKeys, UavPublicKeys, Uav, Event
+from .key_cache import public_key_cache
+from .keystore import keystore
 
 
 def add_and_commit(entity: db.Model):
@@ -159,13 +165,68 @@ def clean_db():
         db.session.commit()
     except Exception:
         db.session.rollback()
+    public_key_cache.invalidate()
+
+# Столбцы, добавленные в существующие таблицы после первой версии схемы:
+# (таблица, столбец, определение для ALTER TABLE ... ADD COLUMN)
+SCHEMA_UPGRADES = [
+    ('uav', 'wire_format', "VARCHAR(16) NOT NULL DEFAULT 'text'"),
+    ('uav_public_keys', 'scheme', "VARCHAR(16) NOT NULL DEFAULT 'rsa'"),
+    ('uav_telemetry', 'drone_time', 'DATETIME'),
+]
+
+
+def upgrade_schema():
+    """
+    Добавляет в таблицы БД, созданной прежней версией сервера, недостающие столбцы.
+
+    db.create_all создает только отсутствующие таблицы, поэтому новые столбцы
+    существующих таблиц добавляются отдельно.
+
+    Returns:
+        list: Добавленные столбцы в виде 'таблица.столбец'.
+    """
+    inspector = db.inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    added = []
+    for table, column, definition in SCHEMA_UPGRADES:
+        if table not in tables:
+            continue
+        if column not in {existing['name'] for existing in inspector.get_columns(table)}:
+            db.session.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {column} {definition}'))
+            added.append(f'{table}.{column}')
+    if added:
+        db.session.commit()
+        print(f"Database schema upgraded: added {', '.join(added)}")
+    return added
+
 
 def create_all():
     try:
         db.create_all()
-    except Exception:
+        upgrade_schema()
+    except Exception as e:
+        print(f"Error creating database schema: {e}")
         db.session.rollback()
     
+def import_ed25519_public_key(public_key_hex: str):
+    """
+    Разбирает открытый ключ Ed25519.
+
+    Args:
+        public_key_hex (str): 32 байта открытого ключа в шестнадцатеричном виде.
+
+    Returns:
+        EccKey: Открытый ключ или None, если ключ некорректен или EdDSA не поддерживается.
+    """
+    if eddsa is None:
+        return None
+    try:
+        return eddsa.import_public_key(bytes.fromhex(public_key_hex))
+    except (ValueError, TypeError):
+        return None
+
+
 def get_key(key_group: str, private: bool):
     """
     Получает ключ из указанной группы.
@@ -175,32 +236,48 @@ def get_key(key_group: str, private: bool):
         private (bool): Флаг для получения приватного ключа.
 
     Returns:
-        Ключ или кортеж (n, e) для публичного ключа, или -1 в случае ошибки.
+        Ключ, кортеж (n, e) для открытого ключа RSA, открытый ключ EccKey для Ed25519
+        или -1 в случае ошибки.
     """
     if private is True:
         if key_group in context.loaded_keys:
             return context.loaded_keys[key_group]
-        else:
-            return None
+        # Ключ мог быть создан до перезапуска или другим процессом сервера
+        key = keystore.load(key_group)
+        if key is not None:
+            context.loaded_keys.setdefault(key_group, key)
+            return context.loaded_keys[key_group]
+        return None
     
     else:
-        if KeyGroup.KOS in key_group:
-            id = key_group.split(KeyGroup.KOS)[1]
-            key = get_entity_by_key(UavPublicKeys, id)
-            if key is None:
-                return -1
-            n, e = int(key.n), int(key.e)
-            
-        elif KeyGroup.MS in key_group:
-            id = key_group.split(KeyGroup.MS)[1]
-            key = get_entity_by_key(MissionSenderPublicKeys, id)
+        if KeyGroup.KOS in key_group or KeyGroup.MS in key_group:
+            cached_key = public_key_cache.get(key_group)
+            if cached_key is not None:
+                return cached_key
+            generation = public_key_cache.generation()
+            if KeyGroup.KOS in key_group:
+                id = key_group.split(KeyGroup.KOS)[1]
+                key = get_entity_by_key(UavPublicKeys, id)
+            else:
+                id = key_group.split(KeyGroup.MS)[1]
+                key = get_entity_by_key(MissionSenderPublicKeys, id)
             if key is None:
                 return -1
+            if getattr(key, 'scheme', SignatureSchemeName.RSA) == SignatureSchemeName.ED25519:
+                public_key = import_ed25519_public_key(key.n)
+                if public_key is None:
+                    return -1
+                public_key_cache.put(key_group, public_key, generation)
+                return public_key
             n, e = int(key.n), int(key.e)
+            public_key_cache.put(key_group, (n, e), generation)
         
         elif key_group == KeyGroup.ORVD:
             key = context.loaded_keys[key_group].publickey()
             n, e = key.n, key.e
+
+        elif key_group == KeyGroup.ORVD_ED25519:
+            return context.loaded_keys[key_group].public_key()
             
         else:
             print('Wrong group')
@@ -209,24 +286,26 @@ def get_key(key_group: str, private: bool):
         return n, e
 
 
-def save_public_key(n: str, e: str, key_group: str) -> None:
+def save_public_key(n: str, e: str, key_group: str, scheme: str = SignatureSchemeName.RSA) -> None:
     """
     Сохраняет публичный ключ в базу данных.
 
     Args:
-        n (str): Модуль ключа.
+        n (str): Модуль ключа (для Ed25519 - открытый ключ в шестнадцатеричном виде).
         e (str): Открытая экспонента.
         key_group (str): Группа ключей.
+        scheme (str, optional): Схема подписи БПЛА.
     """
     if KeyGroup.KOS in key_group:
         id = key_group.split(KeyGroup.KOS)[1]
-        entity = UavPublicKeys(uav_id=id, n=n, e=e)
+        entity = UavPublicKeys(uav_id=id, n=n, e=e, scheme=scheme)
     elif KeyGroup.MS in key_group:
         id = key_group.split(KeyGroup.MS)[1]
         entity = MissionSenderPublicKeys(uav_id=id, n=n, e=e)
     else:
         print('Wrong group in utils.save_public_key')
     add_and_commit(entity)
+    public_key_cache.invalidate(key_group)
 
 
 def save_event(uav_id: str, log_message: str) -> None:
@@ -0,0 +1,62 @@
+import threading
+
+
+class PublicKeyCache:
+    """
+    Кэш разобранных открытых ключей БПЛА и Mission Sender по группе ключей.
+
+    Хранит кортежи (n, e) из целых чисел, поэтому проверка подписи не обращается
+    к БД и не разбирает десятичную строку модуля при каждом запросе.
+    """
+    def __init__(self):
+        self._keys = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key_group):
+        key = self._keys.get(key_group)
+        if key is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return key
+
+    def generation(self):
+        return self._generation
+
+    def put(self, key_group, key, generation):
+        """
+        Сохраняет ключ, прочитанный из БД.
+
+        Args:
+            key_group (str): Группа ключей.
+            key (tuple): Кортеж (n, e).
+            generation (int): Значение generation() до чтения ключа из БД. Если за
+                время чтения кэш был сброшен, ключ мог устареть и не сохраняется.
+        """
+        with self._lock:
+            if generation == self._generation:
+                self._keys[key_group] = key
+
+    def invalidate(self, key_group=None):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if key_group is None:
+                self._keys.clear()
+            else:
+                self._keys.pop(key_group, None)
+
+    def stats(self):
+        return {
+            'keys': len(self._keys),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+
+public_key_cache = PublicKeyCache()
@@ -0,0 +1,141 @@
+import fcntl
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from Cryptodome.PublicKey import RSA, ECC
+from constants import KEYS_PATH
+
+# Группы ключей, которые можно использовать как имя файла
+_KEY_GROUP_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class KeyStore:
+    """
+    Файловое хранилище приватных ключей ОРВД в формате PEM.
+
+    Каждый ключ хранится в отдельном файле <группа ключей>.pem с правами 0600 и
+    записывается атомарно через временный файл. Создание ключа выполняется под
+    файловой блокировкой, поэтому все процессы mod_wsgi используют один и тот же
+    ключ, а перезапуск сервера не меняет ключ ОРВД.
+    Если путь не задан, хранилище отключено и ключи живут только в памяти процесса.
+    """
+    def __init__(self, path=KEYS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = 0
+        self._saved = 0
+
+    def init_app(self, app):
+        self.path = os.environ.get("KEYSTORE_PATH", self.path)
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _key_path(self, key_group):
+        if not self.enabled or not _KEY_GROUP_RE.match(key_group):
+            return None
+        return os.path.join(self.path, f'{key_group}.pem')
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self, key_group):
+        """
+        Читает приватный ключ группы из хранилища.
+
+        Args:
+            key_group (str): Группа ключей.
+
+        Returns:
+            RsaKey | EccKey: Ключ или None, если ключа нет или хранилище отключено.
+        """
+        key_path = self._key_path(key_group)
+        if key_path is None:
+            return None
+        try:
+            with open(key_path, 'rb') as key_file:
+                encoded_key = key_file.read()
+        except FileNotFoundError:
+            return None
+        try:
+            # Ключи Ed25519 хранятся в PKCS#8, ключи RSA - в PKCS#1
+            key = ECC.import_key(encoded_key) if b'BEGIN PRIVATE KEY' in encoded_key else RSA.import_key(encoded_key)
+        except (ValueError, IndexError, TypeError) as e:
+            print(f"Error loading key {key_group} from keystore: {e}")
+            return None
+        self._loaded += 1
+        return key
+
+    def _write(self, key_path, key):
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix='.tmp-', suffix='.pem')
+        try:
+            # mkstemp создает файл с правами 0600
+            with os.fdopen(fd, 'wb') as key_file:
+                key_file.write(key.export_key(format='PEM').encode() if isinstance(key, ECC.EccKey)
+                               else key.export_key(format='PEM'))
+                key_file.flush()
+                os.fsync(key_file.fileno())
+            os.replace(tmp_path, key_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._saved += 1
+
+    def save(self, key_group, key):
+        """
+        Сохраняет приватный ключ группы, заменяя прежний.
+
+        Args:
+            key_group (str): Группа ключей.
+            key (RsaKey | EccKey): Приватный ключ.
+        """
+        key_path = self._key_path(key_group)
+        if key_path is None:
+            return
+        with self._locked():
+            self._write(key_path, key)
+
+    def load_or_create(self, key_group, create_key):
+        """
+        Читает ключ группы из хранилища, а если его нет - создает и сохраняет.
+
+        Args:
+            key_group (str): Группа ключей.
+            create_key (callable): Функция без аргументов, возвращающая новый ключ.
+
+        Returns:
+            RsaKey | EccKey: Ключ, общий для всех процессов сервера.
+        """
+        key_path = self._key_path(key_group)
+        if key_path is None:
+            return create_key()
+        key = self.load(key_group)
+        if key is not None:
+            return key
+        with self._locked():
+            # Ключ мог создать другой процесс, пока мы ждали блокировку
+            key = self.load(key_group)
+            if key is None:
+                key = create_key()
+                self._write(key_path, key)
+        return key
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'loaded': self._loaded,
+            'saved': self._saved,
+        }
+
+
+keystore = KeyStore()
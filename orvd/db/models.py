@@ -1,5 +1,6 @@
 import datetime
 from extensions import db
+from constants import SignatureSchemeName, WireFormat
 
 class User(db.Model):
     """
@@ -29,6 +30,7 @@ class Uav(db.Model):
         state: текущее состояние БПЛА
         kill_switch_state: состояние аварийного выключателя
         delay: время до следующего сеанса связи в секундах
+        wire_format: формат зон и миссий для БПЛА ('text' или 'compact'), выбирается при аутентификации
         created_date: дата создания записи
     """
     __tablename__ = 'uav'
@@ -37,6 +39,8 @@ class Uav(db.Model):
     state = db.Column(db.String(64))
     kill_switch_state = db.Column(db.Boolean, default=False)
     delay = db.Column(db.Integer, default=5)
+    wire_format = db.Column(db.String(16), nullable=False, default=WireFormat.TEXT,
+                            server_default=WireFormat.TEXT)
     created_date = db.Column(db.DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.timezone.utc))
     
     def __repr__(self):
@@ -49,13 +53,16 @@ class UavPublicKeys(db.Model):
     
     Attributes:
         uav_id: идентификатор БПЛА (первичный ключ)
-        n: модуль открытого ключа
+        n: модуль открытого ключа (для Ed25519 - открытый ключ в шестнадцатеричном виде)
         e: экспонента открытого ключа
+        scheme: схема подписи БПЛА ('rsa' или 'ed25519')
     """
     __tablename__ = 'uav_public_keys'
     uav_id = db.Column(db.String(64), primary_key=True)
     n = db.Column(db.String(1024))
     e = db.Column(db.String(1024))
+    scheme = db.Column(db.String(16), nullable=False, default=SignatureSchemeName.RSA,
+                       server_default=SignatureSchemeName.RSA)
     
     def __repr__(self):
         return f'UAV id={self.uav_id}, KOS key={self.n} {self.e}'
@@ -132,6 +139,7 @@ class UavTelemetry(db.Model):
         dop: снижение точности
         sats: количество спутников
         speed: скорость
+        drone_time: время БПЛА из бинарного формата телеметрии, если БПЛА его передал
     """
     __tablename__ = 'uav_telemetry'
     uav_id = db.Column(db.String(64), db.ForeignKey('uav.id'))
@@ -143,6 +151,7 @@ class UavTelemetry(db.Model):
     dop = db.Column(db.Float(precision=8))
     sats = db.Column(db.Integer)
     speed = db.Column(db.Float(precision=8))
+    drone_time = db.Column(db.DateTime(timezone=True), nullable=True)
     
     __table_args__ = (
         db.PrimaryKeyConstraint(
@@ -0,0 +1,97 @@
+import threading
+from .models import UavTelemetry
+from .dao import get_entities_by_field_with_order
+
+
+class TelemetrySample:
+    """
+    Последний образец телеметрии БПЛА.
+    """
+    __slots__ = ('record_time', 'lat', 'lon', 'alt', 'azimuth', 'dop', 'sats', 'speed')
+
+    def __init__(self, record_time, lat, lon, alt, azimuth, dop, sats, speed):
+        self.record_time = record_time
+        self.lat = lat
+        self.lon = lon
+        self.alt = alt
+        self.azimuth = azimuth
+        self.dop = dop
+        self.sats = sats
+        self.speed = speed
+
+    def to_dict(self):
+        return {
+            'lat': self.lat,
+            'lon': self.lon,
+            'alt': self.alt,
+            'azimuth': self.azimuth,
+            'dop': self.dop,
+            'sats': self.sats,
+            'speed': self.speed
+        }
+
+
+# Маркер БПЛА, для которого в БД нет телеметрии
+_MISSING = object()
+
+
+class LatestTelemetryCache:
+    """
+    Кэш последних образцов телеметрии для чтения из панели администратора.
+
+    Обновляется на пути приема телеметрии. Образец заменяется целиком новым
+    объектом, поэтому читатели никогда не видят частично обновленную запись.
+    При первом обращении к БПЛА без образца в кэше значение читается из БД.
+    """
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, uav_id, record_time, lat, lon, alt, azimuth, dop, sats, speed):
+        # Телеметрия одного БПЛА обрабатывается по порядку, поэтому новый образец всегда последний
+        sample = TelemetrySample(record_time, lat, lon, alt, azimuth, dop, sats, speed)
+        with self._lock:
+            self._samples[uav_id] = sample
+
+    def get(self, uav_id):
+        """
+        Возвращает последний образец телеметрии БПЛА.
+
+        Args:
+            uav_id (str): Идентификатор БПЛА.
+
+        Returns:
+            TelemetrySample: Последний образец или None, если телеметрии нет.
+        """
+        sample = self._samples.get(uav_id)
+        if sample is not None:
+            self.hits += 1
+            return None if sample is _MISSING else sample
+        self.misses += 1
+        entity = get_entities_by_field_with_order(UavTelemetry, UavTelemetry.uav_id, uav_id,
+                                                  UavTelemetry.record_time.desc()).first()
+        with self._lock:
+            if uav_id not in self._samples:
+                if entity is None:
+                    self._samples[uav_id] = _MISSING
+                else:
+                    self._samples[uav_id] = TelemetrySample(entity.record_time, entity.lat, entity.lon, entity.alt,
+                                                            entity.azimuth, entity.dop, entity.sats, entity.speed)
+            sample = self._samples[uav_id]
+        return None if sample is _MISSING else sample
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def stats(self):
+        return {
+            'uavs': len(self._samples),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+latest_telemetry = LatestTelemetryCache()
@@ -0,0 +1,164 @@
+import atexit
+import os
+import threading
+import time
+from extensions import db
+from .models import UavTelemetry
+
+
+class TelemetryWriter:
+    """
+    Буферизующая запись телеметрии в БД.
+
+    Образцы телеметрии накапливаются в памяти и записываются одной транзакцией,
+    как только набирается batch_size записей или самая старая запись ждет
+    дольше max_latency_ms. При остановке процесса буфер сбрасывается в БД.
+
+    Если БД не успевает принимать записи и в буфере набирается max_buffer образцов,
+    самые старые образцы отбрасываются (счетчик dropped): обработчик телеметрии
+    не должен ждать БД, а последние значения остаются в кэше телеметрии.
+    """
+    def __init__(self, batch_size=200, max_latency_ms=500, max_buffer=10000):
+        self.batch_size = batch_size
+        self.max_latency_ms = max_latency_ms
+        self.max_buffer = max_buffer
+        self.app = None
+        self._buffer = []
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._batches = 0
+        self._rows = 0
+        self._last_batch_size = 0
+        self._max_batch_size = 0
+        self._flush_time_total = 0.0
+        self._flush_time_max = 0.0
+        self._errors = 0
+        self._dropped = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = int(os.environ.get("TELEMETRY_BATCH_SIZE", self.batch_size))
+        self.max_latency_ms = int(os.environ.get("TELEMETRY_MAX_LATENCY_MS", self.max_latency_ms))
+        self.max_buffer = int(os.environ.get("TELEMETRY_MAX_BUFFER", self.max_buffer))
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='telemetry_writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def add(self, uav_id, record_time, lat, lon, alt, azimuth, dop, sats, speed, drone_time=None):
+        """
+        Ставит образец телеметрии в очередь на запись.
+
+        Если фоновый поток не запущен, запись выполняется сразу в текущем контексте приложения.
+        """
+        row = {
+            'uav_id': uav_id, 'record_time': record_time, 'lat': lat, 'lon': lon, 'alt': alt,
+            'azimuth': azimuth, 'dop': dop, 'sats': sats, 'speed': speed, 'drone_time': drone_time
+        }
+        if self._thread is None:
+            self._write([row])
+            return
+        with self._cond:
+            if not self._buffer:
+                # Первый образец в буфере задает срок сброса
+                self._oldest = time.monotonic()
+                self._cond.notify()
+            self._buffer.append(row)
+            excess = len(self._buffer) - self.max_buffer
+            if excess > 0:
+                del self._buffer[:excess]
+                self._dropped += excess
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+    def _take_batch(self):
+        with self._cond:
+            batch, self._buffer = self._buffer, []
+            self._oldest = None
+            return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if len(self._buffer) >= self.batch_size:
+                        break
+                    if self._oldest is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self.max_latency_ms / 1e3 - (time.monotonic() - self._oldest)
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping:
+                    return
+            self.flush()
+
+    def flush(self):
+        """
+        Синхронно записывает накопленную телеметрию в БД.
+        """
+        with self._flush_lock:
+            batch = self._take_batch()
+            if not batch:
+                return
+            if self.app:
+                with self.app.app_context():
+                    self._write(batch)
+            else:
+                self._write(batch)
+
+    def _write(self, batch):
+        # Первичный ключ (uav_id, record_time): при совпадении остается последний образец
+        rows = list({(row['uav_id'], row['record_time']): row for row in batch}.values())
+        started = time.perf_counter()
+        try:
+            db.session.execute(UavTelemetry.__table__.insert().prefix_with('OR REPLACE', dialect='sqlite'), rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self._errors += 1
+            print(f"Error writing telemetry batch of {len(rows)} rows: {e}")
+            return
+        elapsed = time.perf_counter() - started
+        self._batches += 1
+        self._rows += len(rows)
+        self._last_batch_size = len(rows)
+        self._max_batch_size = max(self._max_batch_size, len(rows))
+        self._flush_time_total += elapsed
+        self._flush_time_max = max(self._flush_time_max, elapsed)
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._buffer)
+        return {
+            'batch_size': self.batch_size,
+            'max_latency_ms': self.max_latency_ms,
+            'pending': pending,
+            'max_buffer': self.max_buffer,
+            'dropped': self._dropped,
+            'batches': self._batches,
+            'rows': self._rows,
+            'last_batch_size': self._last_batch_size,
+            'max_batch_size': self._max_batch_size,
+            'avg_batch_size': round(self._rows / self._batches, 2) if self._batches else 0.0,
+            'flush_avg_ms': round(self._flush_time_total / self._batches * 1e3, 3) if self._batches else 0.0,
+            'flush_max_ms': round(self._flush_time_max * 1e3, 3),
+            'errors': self._errors,
+        }
+
+    def shutdown(self):
+        if self._thread is not None:
+            with self._cond:
+                self._stopping = True
+                self._cond.notify()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+telemetry_writer = TelemetryWriter()
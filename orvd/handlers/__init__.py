@@ -2,6 +2,10 @@ from .api_handlers import *
 from .admin_handlers import *
 from .general_handlers import *
 from .mqtt_handlers import *
+from utils import telemetry_decimator, crypto_executor, key_factory, forbidden_zones_store
 
 def init_app(app):
-    pass
\ No newline at end of file
+    telemetry_decimator.init_app(app)
+    crypto_executor.init_app(app)
+    key_factory.init_app(app)
+    forbidden_zones_store.init_app(app)
\ No newline at end of file
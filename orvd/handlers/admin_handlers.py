@@ -1,17 +1,21 @@
-import json
-from flask import jsonify
+from flask import jsonify, Response
 from context import context
-from extensions import task_scheduler_client as scheduler
-from db.models import User, UavTelemetry, Mission, MissionStep, Uav
+from extensions import task_scheduler_client as scheduler, mqtt_client
+from db.models import User, Mission, MissionStep, Uav
+from db.telemetry_writer import telemetry_writer
+from db.telemetry_cache import latest_telemetry
+from db.key_cache import public_key_cache
+from db.keystore import keystore
 from constants import (
-    ARMED, NOT_FOUND, OK, FORBIDDEN_ZONES_PATH,
+    ARMED, NOT_FOUND, OK,
     MISSION_ACCEPTED, MISSION_NOT_ACCEPTED
 )
 from db.dao import (
     commit_changes, get_entity_by_key, get_entities_by_field_with_order, flush
 )
 from utils import (
-    get_sha256_hex, get_new_polygon_feature, compute_and_save_forbidden_zones_delta
+    get_sha256_hex, forbidden_zones_store,
+    telemetry_decimator, signature_cache, crypto_executor, key_factory
 )
 from .mqtt_handlers import (
     mqtt_publish_flight_state, mqtt_publish_forbidden_zones, mqtt_publish_ping, mqtt_send_mission
@@ -148,20 +152,11 @@ def get_telemetry_handler(id: str):
     Returns:
         json: JSON-объект с телеметрическими данными или NOT_FOUND.
     """
-    uav_telemetry_entity = get_entities_by_field_with_order(UavTelemetry, UavTelemetry.uav_id, id, UavTelemetry.record_time.desc()).first()
-    if not uav_telemetry_entity:
+    sample = latest_telemetry.get(id)
+    if not sample:
         return jsonify({'error': 'NOT_FOUND'})
     else:
-        telemetry = {
-            'lat': uav_telemetry_entity.lat,
-            'lon': uav_telemetry_entity.lon,
-            'alt': uav_telemetry_entity.alt,
-            'azimuth': uav_telemetry_entity.azimuth,
-            'dop': uav_telemetry_entity.dop,
-            'sats': uav_telemetry_entity.sats,
-            'speed': uav_telemetry_entity.speed
-        }
-        return jsonify(telemetry)
+        return jsonify(sample.to_dict())
 
 
 def get_waiter_number_handler():
@@ -294,17 +289,9 @@ def get_forbidden_zone_handler(name: str):
     Returns:
         json: JSON-массив с координатами зоны или NOT_FOUND.
     """
-    with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-        forbidden_zones = json.load(f)
-        matching_zone = None
-        for zone in forbidden_zones['features']:
-            if zone['properties'].get('name') == name:
-                matching_zone = zone
-                break
-        if matching_zone:
-            return jsonify(matching_zone['geometry']['coordinates'][0])
-        else:
-            return NOT_FOUND
+    matching_zone = forbidden_zones_store.snapshot().zones_by_name.get(name)
+    if matching_zone:
+        return jsonify(matching_zone['geometry']['coordinates'][0])
     return NOT_FOUND
 
 
@@ -315,9 +302,7 @@ def get_forbidden_zones_handler():
     Returns:
         dict: GeoJSON с запрещенными зонами
     """
-    with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-        forbidden_zones = json.load(f)
-    return forbidden_zones
+    return forbidden_zones_store.snapshot().zones
 
 
 def get_forbidden_zones_names_handler():
@@ -327,14 +312,7 @@ def get_forbidden_zones_names_handler():
     Returns:
         json: JSON-массив с именами запрещенных зон или NOT_FOUND.
     """
-    with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-        forbidden_zones = json.load(f)
-        zones_names = []
-        for zone in forbidden_zones['features']:
-            zones_names.append(zone['properties'].get('name'))
-        return jsonify(zones_names)
-        
-    return NOT_FOUND
+    return jsonify(forbidden_zones_store.snapshot().names)
 
 
 def set_forbidden_zone_handler(name: str, geometry: list):
@@ -355,29 +333,7 @@ def set_forbidden_zone_handler(name: str, geometry: list):
         geometry[idx][0] = round(geometry[idx][0], 7)
         geometry[idx][1] = round(geometry[idx][1], 7)
         
-    forbidden_zones = None
-    
-    with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-        old_zones = json.load(f)
-    
-    with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-        forbidden_zones = json.load(f)
-        existing_zone = False
-        for zone in forbidden_zones['features']:
-            if zone['properties'].get('name') == name:
-                zone['geometry']['coordinates'][0] = geometry
-                existing_zone = True
-        
-        if not existing_zone:
-            new_feature = get_new_polygon_feature(name, geometry)
-            forbidden_zones['features'].append(new_feature)
-    
-    if forbidden_zones is not None:
-        with open(FORBIDDEN_ZONES_PATH, 'w', encoding='utf-8') as f:
-            json.dump(forbidden_zones, f, ensure_ascii=False, indent=4)
-            
-        compute_and_save_forbidden_zones_delta(old_zones, forbidden_zones)
-    
+    forbidden_zones_store.set_zone(name, geometry)
     mqtt_publish_forbidden_zones()
     return OK
 
@@ -392,27 +348,22 @@ def delete_forbidden_zone_handler(name: str):
     Returns:
         str: OK в случае успешного удаления или NOT_FOUND.
     """
-    forbidden_zones = None
-    
-    with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-        old_zones = json.load(f)
-    
-    with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-        forbidden_zones = json.load(f)
-        for idx, zone in enumerate(forbidden_zones['features']):
-            if zone['properties'].get('name') == name:
-                forbidden_zones['features'].pop(idx)
-                break
-        
-    if forbidden_zones is not None:
-        with open(FORBIDDEN_ZONES_PATH, 'w', encoding='utf-8') as f:
-            json.dump(forbidden_zones, f, ensure_ascii=False, indent=4)
-            
-        compute_and_save_forbidden_zones_delta(old_zones, forbidden_zones)
-        mqtt_publish_forbidden_zones()
-        return OK
-    
-    return NOT_FOUND
+    forbidden_zones_store.delete_zone(name)
+    mqtt_publish_forbidden_zones()
+    return OK
+
+
+def find_forbidden_zones_handler(points: list):
+    """
+    Обрабатывает запрос на поиск запрещенных зон, содержащих точки.
+
+    Args:
+        points (list): Список точек [широта, долгота].
+
+    Returns:
+        json: JSON-массив, в котором для каждой точки указан массив имен содержащих ее зон.
+    """
+    return jsonify(forbidden_zones_store.snapshot().index.query(points))
 
 
 def get_delay_handler(id: str):
@@ -512,23 +463,58 @@ def get_all_data_handler():
         
         uav_data['state'] = uav.state
 
-        uav_telemetry_entity = get_entities_by_field_with_order(UavTelemetry, UavTelemetry.uav_id, uav.id, UavTelemetry.record_time.desc()).first()
-        if uav_telemetry_entity:
-            uav_data['telemetry'] = {
-                'lat': uav_telemetry_entity.lat,
-                'lon': uav_telemetry_entity.lon,
-                'alt': uav_telemetry_entity.alt,
-                'azimuth': uav_telemetry_entity.azimuth,
-                'dop': uav_telemetry_entity.dop,
-                'sats': uav_telemetry_entity.sats,
-                'speed': uav_telemetry_entity.speed
-            }
-        else:
-            uav_data['telemetry'] = None
+        sample = latest_telemetry.get(uav.id)
+        uav_data['telemetry'] = sample.to_dict() if sample else None
 
         uav_data['mission_state'] = get_mission_state_handler(uav.id)
 
         uav_data['delay'] = str(uav.delay)
 
         all_data['uav_data'][uav.id] = uav_data
-    return jsonify(all_data)
\ No newline at end of file
+    return jsonify(all_data)
+
+
+def _get_subsystem_stats():
+    return {
+        'mqtt_dispatcher': mqtt_client.dispatcher_stats(),
+        'mqtt_outbox': mqtt_client.outbox_stats(),
+        'telemetry_writer': telemetry_writer.stats(),
+        'telemetry_cache': latest_telemetry.stats(),
+        'telemetry_filter': telemetry_decimator.stats(),
+        'public_key_cache': public_key_cache.stats(),
+        'signature_cache': signature_cache.stats(),
+        'crypto_executor': crypto_executor.stats(),
+        'key_factory': key_factory.stats(),
+        'keystore': keystore.stats(),
+        'forbidden_zones': forbidden_zones_store.stats()
+    }
+
+
+def get_metrics_handler():
+    """
+    Обрабатывает запрос на получение внутренних метрик сервера.
+
+    Returns:
+        json: JSON-объект с метриками подсистем.
+    """
+    return jsonify(_get_subsystem_stats())
+
+
+def get_prometheus_metrics_handler():
+    """
+    Обрабатывает запрос на получение метрик сервера в текстовом формате Prometheus.
+
+    Returns:
+        Response: Метрики входящего MQTT-трафика по шаблонам топиков и числовые
+            показатели подсистем в виде gauge-метрик orvd_<подсистема>_<показатель>.
+    """
+    lines = []
+    for subsystem, stats in _get_subsystem_stats().items():
+        for key, value in (stats or {}).items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f'orvd_{subsystem}_{key}'
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+    body = mqtt_client.metrics.to_prometheus() + '\n'.join(lines) + ('\n' if lines else '')
+    return Response(body, mimetype='text/plain; version=0.0.4')
@@ -1,64 +1,84 @@
 import datetime
 import json
 import os
-import time
 from context import context
 from extensions import task_scheduler_client as scheduler
 from constants import (
     ARMED, DISARMED, NOT_FOUND, OK, LOGS_PATH,
-    FORBIDDEN_ZONES_PATH, FORBIDDEN_ZONES_DELTA_PATH,
+    FORBIDDEN_ZONES_DELTA_PATH, KeyGroup, SignatureSchemeName, WireFormat
 )
 from db.dao import (
     add_and_commit, add_changes, commit_changes, delete_entity, get_entity_by_key,
     get_entities_by_field, get_entities_by_field_with_order, save_public_key,
-    get_key, flush, save_event
+    get_key, flush, save_event, import_ed25519_public_key
 )
-from db.models import UavTelemetry, MissionStep, Mission, UavPublicKeys, Uav
+from db.models import MissionStep, Mission, UavPublicKeys, Uav
+from db.telemetry_writer import telemetry_writer
+from db.telemetry_cache import latest_telemetry
 from utils import (
-    cast_wrapper, generate_forbidden_zones_string,
-    get_sha256_hex
+    cast_wrapper, telemetry_decimator, get_signature_scheme, forbidden_zones_store,
+    generate_forbidden_zones_delta_string, encode_forbidden_zones_delta_compact, encode_mission_message
 )
-from .mqtt_handlers import mqtt_publish_flight_state, mqtt_publish_ping, mqtt_publish_forbidden_zones, mqtt_publish_auth
+from .mqtt_handlers import mqtt_publish_flight_state, mqtt_publish_ping, mqtt_publish_auth
     
-def key_kos_exchange_handler(id: str, n: str, e: str):
+def key_kos_exchange_handler(id: str, n: str, e: str, scheme: str = None):
     """
     Обрабатывает обмен ключами с KOS.
 
     Args:
         id (str): Идентификатор БПЛА.
-        n (str): Модуль открытого ключа.
-        e (str): Экспонента открытого ключа.
+        n (str): Модуль открытого ключа (для Ed25519 - 32 байта открытого ключа в шестнадцатеричном виде).
+        e (str): Экспонента открытого ключа (для Ed25519 не используется).
+        scheme (str, optional): Схема подписи БПЛА: 'rsa' (по умолчанию) или 'ed25519'.
 
     Returns:
-        str: Строка с открытым ключом ORVD.
+        str: Строка с открытым ключом ORVD выбранной схемы. БПЛА со схемой Ed25519 проверяют
+            этим ключом и рассылку запрещенных зон, которую читают с топиков
+            MQTTTopic.FORBIDDEN_ZONES_ED25519 и MQTTTopic.FORBIDDEN_ZONES_COMPACT_ED25519.
     """
-    n, e = str(int(n, 16)), str(int(e, 16))
+    if scheme == SignatureSchemeName.ED25519:
+        if import_ed25519_public_key(n) is None or get_key(KeyGroup.ORVD_ED25519, private=True) is None:
+            return '$Key: unsupported scheme'
+        n, e = n.lower(), ''
+    else:
+        scheme = SignatureSchemeName.RSA
+        n, e = str(int(n, 16)), str(int(e, 16))
     key_entity = get_entity_by_key(UavPublicKeys, id)
     if key_entity is None:
-        save_public_key(n, e, f'kos{id}')
-    orvd_n, orvd_e = get_key('orvd', private=False)
-    str_to_send = f'$Key: {hex(orvd_n)[2:]} {hex(orvd_e)[2:]}'
+        save_public_key(n, e, f'kos{id}', scheme)
+    else:
+        # Ключ БПЛА не перезаписывается: отвечаем ключом ОРВД той же схемы, что и сохраненный ключ
+        scheme = key_entity.scheme
+    orvd_key_group = KeyGroup.ORVD_ED25519 if scheme == SignatureSchemeName.ED25519 else KeyGroup.ORVD
+    orvd_key = get_key(orvd_key_group, private=True)
+    str_to_send = f'$Key: {get_signature_scheme(orvd_key).public_key_string(orvd_key)}'
     return str_to_send
 
 
-def auth_handler(id: str):
+def auth_handler(id: str, wire_format: str = None):
     """
     Обрабатывает аутентификацию БПЛА.
 
     Args:
         id (str): Идентификатор БПЛА.
+        wire_format (str, optional): Формат зон и миссий, который поддерживает БПЛА:
+            'text' (по умолчанию) или 'compact'.
 
     Returns:
-        str: Строка подтверждения аутентификации.
+        str: Строка подтверждения аутентификации; при выборе компактного формата
+            в ней подтверждается формат (' format=compact').
     """
+    if wire_format != WireFormat.COMPACT:
+        wire_format = WireFormat.TEXT
     uav_entity = get_entity_by_key(Uav, id)
     if not uav_entity:
-        uav_entity = Uav(id=id, is_armed=False, state='В сети', kill_switch_state=False)
+        uav_entity = Uav(id=id, is_armed=False, state='В сети', kill_switch_state=False, wire_format=wire_format)
         add_and_commit(uav_entity)
     else:
         uav_entity.is_armed = False
         uav_entity.state = 'В сети'
         uav_entity.kill_switch_state = False
+        uav_entity.wire_format = wire_format
         commit_changes()
         
     flush()
@@ -69,20 +89,26 @@ def auth_handler(id: str):
         func=mqtt_publish_ping,
         args=(id,)
     )
-    mqtt_publish_forbidden_zones()
     mqtt_publish_auth(id)
     
+    if wire_format == WireFormat.COMPACT:
+        return f'$Auth id={id} format={wire_format}'
     return f'$Auth id={id}'
 
-def arm_handler(id: str, **kwargs):
+def arm_handler(id: str, on_decision=None, **kwargs):
     """
     Обрабатывает запрос на арм БПЛА.
 
+    Если арм требует решения оператора, БПЛА ставится в очередь, а обработчик
+    сразу возвращает None: после решения вызывается on_decision, и ответ строит
+    arm_decision_result_handler.
+
     Args:
         id (str): Идентификатор БПЛА.
+        on_decision (callable, optional): Функция, вызываемая после решения оператора.
 
     Returns:
-        str: Статус арма БПЛА.
+        str: Статус арма БПЛА или None, если ожидается решение оператора.
     """
     uav_entity = get_entity_by_key(Uav, id)
     if not uav_entity:
@@ -92,39 +118,37 @@ def arm_handler(id: str, **kwargs):
     else:
         mission = get_entity_by_key(Mission, id)
         if mission and mission.is_accepted:
-            context.arm_queue.add(id)
+            context.arm_queue.add(id, on_decision)
             uav_entity.state = 'Ожидает'
             commit_changes()
-            decision = _arm_wait_decision(id)
-            if decision == ARMED:
-                uav_entity.state = 'В полете'
-            else:
-                uav_entity.state = 'В сети'
-            commit_changes()
-            flush()
-            mqtt_publish_flight_state(id)
-            return f'$Arm {decision}$Delay {uav_entity.delay}'
+            return None
         else:
             return f'$Arm {DISARMED}$Delay {uav_entity.delay}'
 
 
-def _arm_wait_decision(id: str):
+def arm_decision_result_handler(id: str):
     """
-    Ожидает решения об арме БПЛА.
+    Завершает запрос на арм БПЛА после решения оператора.
 
     Args:
         id (str): Идентификатор БПЛА.
 
     Returns:
-        str: Решение об арме (ARMED или DISARMED).
+        str: Статус арма БПЛА.
     """
-    while id in context.arm_queue:
-        time.sleep(0.1)
     uav_entity = get_entity_by_key(Uav, id)
+    if not uav_entity:
+        return NOT_FOUND
     if uav_entity.is_armed:
-        return ARMED
+        decision = ARMED
+        uav_entity.state = 'В полете'
     else:
-        return DISARMED
+        decision = DISARMED
+        uav_entity.state = 'В сети'
+    commit_changes()
+    flush()
+    mqtt_publish_flight_state(id)
+    return f'$Arm {decision}$Delay {uav_entity.delay}'
 
 
 def flight_info_handler(id: str) -> str:
@@ -153,7 +177,8 @@ def flight_info_handler(id: str) -> str:
 
 
 def telemetry_handler(id: str, lat: float, lon: float, alt: float,
-                      azimuth: float, dop: float, sats: float, speed: float, **kwargs):
+                      azimuth: float, dop: float, sats: float, speed: float,
+                      drone_time: datetime.datetime = None, **kwargs):
     """
     Обрабатывает телеметрию БПЛА.
 
@@ -166,6 +191,8 @@ def telemetry_handler(id: str, lat: float, lon: float, alt: float,
         dop (float): Снижение точности.
         sats (float): Количество спутников.
         speed (float): Скорость.
+        drone_time (datetime, optional): Время БПЛА из бинарного формата телеметрии, сохраняется
+            рядом с временем получения образца сервером.
 
     Returns:
         str: Статус арма БПЛА.
@@ -193,21 +220,14 @@ def telemetry_handler(id: str, lat: float, lon: float, alt: float,
         dop = cast_wrapper(dop, float)
         sats = cast_wrapper(sats, int)
         speed = cast_wrapper(speed, float)
+        # Время БПЛА не входит в ключ записи: иначе неверные часы БПЛА перезаписывали бы чужие образцы
         record_time = datetime.datetime.now(datetime.timezone.utc)
-        uav_telemetry_entity = get_entity_by_key(UavTelemetry, (uav_entity.id, record_time))
-        if not uav_telemetry_entity:
-            uav_telemetry_entity = UavTelemetry(uav_id=uav_entity.id, lat=lat, lon=lon, alt=alt,
-                                                azimuth=azimuth, dop=dop, sats=sats, speed=speed, record_time=record_time)
-            add_and_commit(uav_telemetry_entity)
-        else:
-            uav_telemetry_entity.lat = lat
-            uav_telemetry_entity.lon = lon
-            uav_telemetry_entity.alt = alt
-            uav_telemetry_entity.azimuth = azimuth
-            uav_telemetry_entity.dop = dop
-            uav_telemetry_entity.sats = sats
-            uav_telemetry_entity.speed = speed
-            commit_changes()
+        latest_telemetry.update(uav_id=uav_entity.id, record_time=record_time, lat=lat, lon=lon, alt=alt,
+                                azimuth=azimuth, dop=dop, sats=sats, speed=speed)
+        # Кэш последних значений обновляется всегда, в БД попадают только значимые образцы
+        if telemetry_decimator.should_store(uav_entity.id, record_time, lat, lon, alt, speed):
+            telemetry_writer.add(uav_id=uav_entity.id, record_time=record_time, lat=lat, lon=lon, alt=alt,
+                                 azimuth=azimuth, dop=dop, sats=sats, speed=speed, drone_time=drone_time)
         if not uav_entity.is_armed:
             return f'$Arm: {DISARMED}'
         else:
@@ -231,47 +251,65 @@ def fmission_kos_handler(id: str):
             mission_steps = get_entities_by_field_with_order(MissionStep, MissionStep.mission_id, id, order_by_field=MissionStep.step)
             if mission_steps and mission_steps.count() != 0:
                 mission_steps = list(map(lambda e: e.operation, mission_steps))
-                return f'$FlightMission {"&".join(mission_steps)}'
+                return encode_mission_message(mission_steps, uav_entity.wire_format)
     return NOT_FOUND
 
             
-def get_all_forbidden_zones_handler(*args, **kwargs):
+def _get_wire_format(id: str):
+    uav_entity = get_entity_by_key(Uav, id) if id else None
+    return uav_entity.wire_format if uav_entity else WireFormat.TEXT
+
+
+def get_all_forbidden_zones_handler(id: str = None, *args, **kwargs):
     """
     Обрабатывает запрос на получение всех запрещенных для полета зон.
 
+    Args:
+        id (str, optional): Идентификатор БПЛА; зоны передаются в выбранном им формате.
+
     Returns:
-        str: Строка с информацией о запрещенных зонах или NOT_FOUND.
+        str: Строка с информацией о запрещенных зонах, перед которой передается версия зон
+            ('$ForbiddenZonesVersion N'), или NOT_FOUND.
     """
     try:
-        with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-            forbidden_zones = json.load(f)
-            result_str = generate_forbidden_zones_string(forbidden_zones)
-            return result_str
+        return forbidden_zones_store.snapshot().versioned_message(_get_wire_format(id))
 
     except Exception as e:
         print(e)
         return NOT_FOUND
 
 
-def get_forbidden_zones_delta_handler(*args, **kwargs):
+def get_forbidden_zones_delta_handler(version: int = None, id: str = None, *args, **kwargs):
     """
     Обрабатывает запрос на получение дельты изменений в запрещенных для полета зонах.
 
+    Args:
+        version (int, optional): Версия зон, известная БПЛА. Если не указана, возвращается
+            дельта последнего изменения.
+        id (str, optional): Идентификатор БПЛА; дельта передается в выбранном им формате.
+
     Returns:
-        str: Строка с дельтой изменений в запрещенных зонах или NOT_FOUND.
+        str: Строка с дельтой изменений в запрещенных зонах или NOT_FOUND. Если указана версия,
+            перед дельтой передается текущая версия зон ('$ForbiddenZonesVersion N'), а при
+            слишком старой версии вместо дельты передается полная строка запрещенных зон.
     """
     try:
-        with open(FORBIDDEN_ZONES_DELTA_PATH, 'r', encoding='utf-8') as f:
-            delta_zones = json.load(f)
-        
-        delta_str = f'$ForbiddenZonesDelta {len(delta_zones["features"])}'
-        for zone in delta_zones['features']:
-            name = zone['properties']['name']
-            change_type = zone['properties']['change_type']
-            coordinates = zone['geometry']['coordinates'][0]
-            delta_str += f'&{name}&{change_type}&{len(coordinates)}&{"&".join(list(map(lambda e: f"{e[1]:.7f}_{e[0]:.7f}", coordinates)))}'
-        
-        return delta_str
+        wire_format = _get_wire_format(id)
+        generate_delta = encode_forbidden_zones_delta_compact if wire_format == WireFormat.COMPACT \
+            else generate_forbidden_zones_delta_string
+        if version is None:
+            with open(FORBIDDEN_ZONES_DELTA_PATH, 'r', encoding='utf-8') as f:
+                delta_zones = json.load(f)
+            return generate_delta(delta_zones)
+
+        snapshot, delta_zones = forbidden_zones_store.delta_since(version)
+        zones_str = snapshot.encoded_message(wire_format)
+        if delta_zones is not None:
+            delta_str = generate_delta(delta_zones)
+            # Дельта, которая длиннее полного списка зон, не экономит канал
+            if len(delta_str) < len(zones_str):
+                zones_str = delta_str
+        return f'$ForbiddenZonesVersion {snapshot.version}{zones_str}'
     except Exception as e:
         print(e)
         return NOT_FOUND
@@ -285,18 +323,29 @@ def get_forbidden_zones_hash_handler(*args, **kwargs):
         str: SHA-256 хэш строки запрещенных зон или NOT_FOUND.
     """
     try:
-        with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-            forbidden_zones = json.load(f)
-            result_str = generate_forbidden_zones_string(forbidden_zones)
-            hash_value = get_sha256_hex(result_str)
-            return f'$ForbiddenZonesHash {hash_value}'
+        return f'$ForbiddenZonesHash {forbidden_zones_store.snapshot().hash}'
 
     except Exception as e:
         print(e)
         return NOT_FOUND
 
 
-def revise_mission_handler(id: str, mission: str, **kwargs):
+def revise_mission_handler(id: str, mission: str, on_decision=None, **kwargs):
+    """
+    Обрабатывает запрос БПЛА на замену полетного задания.
+
+    Новая миссия сохраняется и ставится в очередь на решение оператора, обработчик
+    сразу возвращает None: после решения вызывается on_decision, и ответ строит
+    revise_mission_result_handler.
+
+    Args:
+        id (str): Идентификатор БПЛА.
+        mission (str): Команды миссии, разделенные '*'.
+        on_decision (callable, optional): Функция, вызываемая после решения оператора.
+
+    Returns:
+        None
+    """
     mission_list = mission.split('*')
     
     mission_entity = get_entity_by_key(Mission, id)
@@ -320,10 +369,20 @@ def revise_mission_handler(id: str, mission: str, **kwargs):
         flush()
         mqtt_publish_flight_state(id)
         
-    context.revise_mission_queue.add(id)
-    while id in context.revise_mission_queue:
-        time.sleep(0.1)
-        
+    context.revise_mission_queue.add(id, on_decision)
+    return None
+
+
+def revise_mission_result_handler(id: str):
+    """
+    Завершает запрос на замену полетного задания после решения оператора.
+
+    Args:
+        id (str): Идентификатор БПЛА.
+
+    Returns:
+        str: '$Approve 0', если миссия принята, иначе '$Approve 1'.
+    """
     mission_entity = get_entity_by_key(Mission, id)
     if mission_entity:
         if mission_entity.is_accepted:
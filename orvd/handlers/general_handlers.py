@@ -1,6 +1,6 @@
 from context import context
 from constants import (
-    ORVD_KEY_SIZE, NOT_FOUND, LOGS_PATH, MissionVerificationStatus
+    NOT_FOUND, LOGS_PATH, MissionVerificationStatus
 )
 from db.dao import (
     add_and_commit, add_changes, commit_changes, delete_entity, get_entity_by_key,
@@ -8,8 +8,11 @@ from db.dao import (
     get_key
 )
 from db.models import Mission, MissionStep, MissionSenderPublicKeys, Uav, UavTelemetry, Event
+from db.key_cache import public_key_cache
+from db.keystore import keystore
 from utils import (
-    generate_keys, read_mission, encode_mission, create_csv_from_telemetry
+    load_keys, key_factory, read_mission, encode_mission, create_csv_from_telemetry,
+    get_mission_forbidden_zones, forbidden_zones_store
 )
 
 
@@ -24,8 +27,8 @@ def key_ms_exchange_handler(id: str):
         str: Строка с открытым ключом ORVD.
     """
     key_group = f'ms{id}'
-    if f'ms{id}' not in context.loaded_keys:
-        generate_keys(ORVD_KEY_SIZE, key_group)
+    if get_key(key_group, private=True) is None:
+        load_keys(keystore.load_or_create(key_group, key_factory.take), key_group)
     key = context.loaded_keys[key_group].publickey()
     n, e = str(key.n), str(key.e)
     key_entity = get_entity_by_key(MissionSenderPublicKeys, id)
@@ -35,6 +38,7 @@ def key_ms_exchange_handler(id: str):
         key_entity.n = n
         key_entity.e = e
         commit_changes()
+        public_key_cache.invalidate(key_group)
     orvd_key_pk = get_key('orvd', private=True).publickey()
     orvd_n, orvd_e = orvd_key_pk.n, orvd_key_pk.e
     str_to_send = f'$Key: {hex(orvd_n)[2:]} {hex(orvd_e)[2:]}'
@@ -53,6 +57,11 @@ def fmission_ms_handler(id: str, mission_str: str, **kwargs):
         str: Статус верификации миссии.
     """
     mission_list, mission_verification_status = read_mission(mission_str)
+    if mission_verification_status == MissionVerificationStatus.OK:
+        crossed_zones = get_mission_forbidden_zones(mission_list, forbidden_zones_store.snapshot().index)
+        if crossed_zones:
+            print(f"Mission for {id} crosses forbidden zones: {', '.join(map(str, crossed_zones))}")
+            mission_verification_status = MissionVerificationStatus.FORBIDDEN_ZONE_INTERSECTION
     
     if mission_verification_status == MissionVerificationStatus.OK:
         uav_entity = get_entity_by_key(Uav, id)
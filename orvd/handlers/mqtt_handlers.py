@@ -1,14 +1,13 @@
-import json
 from extensions import mqtt_client as mqtt
-from utils import sign, generate_forbidden_zones_string
+from utils import sign, get_orvd_key_group, forbidden_zones_store, encode_mission_message
 from db.dao import get_entity_by_key, get_entities_by_field_with_order
 from db.models import Uav, Mission, MissionStep
-from constants import MQTTTopic, KeyGroup, FORBIDDEN_ZONES_PATH
+from constants import MQTTTopic, KeyGroup, WireFormat
 
-def mqtt_publish_flight_state(id: str, *args, **kwargs):
+def _build_flight_state_message(id: str):
     uav_entity = get_entity_by_key(Uav, id)
     if not uav_entity:
-        return
+        return None
     else:
         if uav_entity.kill_switch_state:
             message = '$Flight -1'
@@ -16,37 +15,87 @@ def mqtt_publish_flight_state(id: str, *args, **kwargs):
             message = '$Flight 0'
         else:
             message = '$Flight 1'
-            
-    message = f'{message}#{hex(sign(message, KeyGroup.ORVD))[2:]}'
-    mqtt.publish_message(MQTTTopic.FLIGHT_STATUS.format(id=id), message)
-    
-def mqtt_publish_ping(id: str, *args, **kwargs):
+    return f'{message}#{hex(sign(message, get_orvd_key_group(KeyGroup.KOS + id)))[2:]}'
+
+
+def mqtt_publish_flight_state(id: str, *args, **kwargs):
+    # Состояние читается и подписывается непосредственно перед отправкой,
+    # поэтому серия изменений состояния БПЛА дает одно сообщение
+    mqtt.publish_message(MQTTTopic.FLIGHT_STATUS.format(id=id), lambda: _build_flight_state_message(id), coalesce=True)
+
+
+def _build_ping_message(id: str):
     uav_entity = get_entity_by_key(Uav, id)
     if not uav_entity:
-        return
+        return None
     else:
         message = f'$Delay {uav_entity.delay}'
-    message = f'{message}#{hex(sign(message, KeyGroup.ORVD))[2:]}'
-    mqtt.publish_message(MQTTTopic.PING.format(id=id), message)
-    
-def mqtt_publish_auth(id: str, *args, **kwargs):
+    return f'{message}#{hex(sign(message, get_orvd_key_group(KeyGroup.KOS + id)))[2:]}'
+
+
+def mqtt_publish_ping(id: str, *args, **kwargs):
+    mqtt.publish_message(MQTTTopic.PING.format(id=id), lambda: _build_ping_message(id), coalesce=True)
+
+
+def _build_auth_message(id: str):
     message = f'$Auth {id}'
-    signed_message = f'{message}#{hex(sign(message, KeyGroup.ORVD))[2:]}'
-    mqtt.publish_message(MQTTTopic.AUTH.format(id=id), signed_message)
+    return f'{message}#{hex(sign(message, get_orvd_key_group(KeyGroup.KOS + id)))[2:]}'
 
-def mqtt_publish_forbidden_zones(*args, **kwargs):
+
+def mqtt_publish_auth(id: str, *args, **kwargs):
+    mqtt.publish_message(MQTTTopic.AUTH.format(id=id), lambda: _build_auth_message(id))
+
+# Версия зон в последнем построенном retained-сообщении каждого варианта (формат, ключ подписи)
+_published_zones_versions = {}
+# Топики retained-сообщений с зонами для каждого формата и ключа ОРВД: БПЛА со схемой
+# Ed25519 получают при обмене ключами только ключ Ed25519 и читают зоны со своих топиков
+_FORBIDDEN_ZONES_TOPICS = {
+    (WireFormat.TEXT, KeyGroup.ORVD): MQTTTopic.FORBIDDEN_ZONES,
+    (WireFormat.COMPACT, KeyGroup.ORVD): MQTTTopic.FORBIDDEN_ZONES_COMPACT,
+    (WireFormat.TEXT, KeyGroup.ORVD_ED25519): MQTTTopic.FORBIDDEN_ZONES_ED25519,
+    (WireFormat.COMPACT, KeyGroup.ORVD_ED25519): MQTTTopic.FORBIDDEN_ZONES_COMPACT_ED25519,
+}
+
+
+def _build_forbidden_zones_message(wire_format: str = WireFormat.TEXT, key_group: str = KeyGroup.ORVD):
     try:
-        with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-            forbidden_zones = json.load(f)
-            message = generate_forbidden_zones_string(forbidden_zones)
-            message = f'{message}#{hex(sign(message, KeyGroup.ORVD))[2:]}'
-            mqtt.publish_message(MQTTTopic.FORBIDDEN_ZONES, message)
+        snapshot = forbidden_zones_store.snapshot()
+        if snapshot.version == _published_zones_versions.get((wire_format, key_group)):
+            return None
+        # Без ключа Ed25519 вариант не публикуется
+        message = snapshot.signed_message(wire_format, key_group)
+        if message is not None:
+            _published_zones_versions[(wire_format, key_group)] = snapshot.version
+        return message
 
     except Exception as e:
         print(e)
-        return
-    
-def mqtt_send_mission(id: str, *args, **kwargs):
+        return None
+
+
+def mqtt_publish_forbidden_zones(*args, **kwargs):
+    # Зоны публикуются retained-сообщением: брокер сам отдает последнюю версию каждому
+    # новому подписчику, поэтому рассылка нужна только при смене версии. Серия правок
+    # администратора дает одно сообщение после паузы publish_delay_ms.
+    version = forbidden_zones_store.snapshot().version
+    for variant, topic in _FORBIDDEN_ZONES_TOPICS.items():
+        if version == _published_zones_versions.get(variant):
+            continue
+        mqtt.publish_message(topic, lambda variant=variant: _build_forbidden_zones_message(*variant),
+                             retain=True, delay=forbidden_zones_store.publish_delay_ms / 1000,
+                             max_delay=forbidden_zones_store.publish_max_delay_ms / 1000)
+
+
+@mqtt.on_connect
+def mqtt_republish_forbidden_zones(*args, **kwargs):
+    # После переподключения брокер мог потерять retained-сообщения (перезапуск без хранения)
+    _published_zones_versions.clear()
+    for variant, topic in _FORBIDDEN_ZONES_TOPICS.items():
+        mqtt.publish_message(topic, lambda variant=variant: _build_forbidden_zones_message(*variant),
+                             retain=True, coalesce=True)
+
+
+def _build_mission_message(id: str):
     uav_entity = get_entity_by_key(Uav, id)
     if uav_entity:
         mission = get_entity_by_key(Mission, id)
@@ -54,6 +103,10 @@ def mqtt_send_mission(id: str, *args, **kwargs):
             mission_steps = get_entities_by_field_with_order(MissionStep, MissionStep.mission_id, id, order_by_field=MissionStep.step)
             if mission_steps and mission_steps.count() != 0:
                 mission_steps = list(map(lambda e: e.operation, mission_steps))
-                message = f'$FlightMission {"&".join(mission_steps)}'
-                message = f'{message}#{hex(sign(message, KeyGroup.ORVD))[2:]}'
-                mqtt.publish_message(MQTTTopic.FMISSION_KOS.format(id=id), message)
+                message = encode_mission_message(mission_steps, uav_entity.wire_format)
+                return f'{message}#{hex(sign(message, get_orvd_key_group(KeyGroup.KOS + id)))[2:]}'
+    return None
+
+
+def mqtt_send_mission(id: str, *args, **kwargs):
+    mqtt.publish_message(MQTTTopic.FMISSION_KOS.format(id=id), lambda: _build_mission_message(id), coalesce=True)
@@ -28,7 +28,8 @@ apt-get -y install python3 \
         python3-jinja2 \
         python3-pytest \
         python3-flasgger \
-        python3-paho-mqtt
+        python3-paho-mqtt \
+        python3-numpy
 
 cp ./default.conf /etc/mosquitto/conf.d/default.conf
 systemctl restart mosquitto
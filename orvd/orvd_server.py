@@ -4,11 +4,11 @@ from flask import Flask
 
 from context import context
 from extensions import swagger
-from db import clean_db, generate_user, create_all, init_app as db_init_app
+from db import clean_db, generate_user, create_all, latest_telemetry, init_app as db_init_app
 from handlers import init_app as handlers_init_app
 from routes import init_app as routes_init_app
 from constants import log_level_map
-from utils import generate_orvd_keys
+from utils import load_orvd_keys, telemetry_decimator
 
 class FlaskConfig:
     SQLALCHEMY_ECHO = False
@@ -31,7 +31,7 @@ def create_app():
     handlers_init_app(app)
     routes_init_app(app)
     
-    generate_orvd_keys()
+    load_orvd_keys()
     
     return app
 
@@ -39,6 +39,8 @@ def clean_app_db(app):
     with app.app_context():
         create_all()
         clean_db()
+        latest_telemetry.clear()
+        telemetry_decimator.clear()
         generate_user()
 
 
@@ -1,12 +1,14 @@
 import os
 import json
-from flask import request, render_template, redirect, jsonify, send_file
+import time
+from flask import request, render_template, redirect, jsonify, Response
 from db.dao import check_user_token
 from constants import (
-    APIRoute, AdminRoute, GeneralRoute, KeyGroup, FORBIDDEN_ZONES_PATH, TILES_PATH
+    APIRoute, AdminRoute, GeneralRoute, KeyGroup, TILES_PATH,
+    MAX_ZONE_QUERY_POINTS
 )
 from utils import (
-    cast_wrapper, sign, verify, mock_verifier, compute_and_save_forbidden_zones_delta,
+    cast_wrapper, sign, verify, mock_verifier, forbidden_zones_store, parse_forbidden_zones_upload, ZonesImportError,
     bad_request, regular_request, signed_request, authorized_request
 )
 from handlers.api_handlers import (
@@ -21,10 +23,11 @@ from handlers.admin_handlers import (
     get_mission_state_handler, change_fly_accept_handler,
     get_forbidden_zone_handler, get_forbidden_zones_handler,
     get_forbidden_zones_names_handler, set_forbidden_zone_handler,
-    delete_forbidden_zone_handler, get_delay_handler, set_delay_handler,
+    delete_forbidden_zone_handler, find_forbidden_zones_handler, get_delay_handler, set_delay_handler,
     revise_mission_decision_handler, get_display_mode_handler,
     toggle_display_mode_handler, get_flight_info_response_mode_handler,
-    get_all_data_handler, toggle_flight_info_response_mode_handler
+    get_all_data_handler, toggle_flight_info_response_mode_handler,
+    get_metrics_handler, get_prometheus_metrics_handler
 )
 from handlers.general_handlers import (
     key_ms_exchange_handler, fmission_ms_handler, get_logs_handler,
@@ -838,6 +841,58 @@ def delete_forbidden_zone():
         return authorized_request(handler_func=delete_forbidden_zone_handler, token=token, name=name)
     else:
         return bad_request('Wrong name')
+
+
+@bp.route(AdminRoute.FIND_FORBIDDEN_ZONES, methods=['POST'])
+def find_forbidden_zones():
+    """
+    Определяет, в каких запрещенных зонах находится каждая из переданных точек.
+    ---
+    tags:
+      - admin
+    parameters:
+      - name: points
+        in: body
+        type: array
+        items:
+          type: array
+          items:
+            type: number
+        required: true
+        description: Точки в виде пар [широта, долгота].
+      - name: token
+        in: body
+        type: string
+        required: true
+        description: Токен аутентификации.
+    responses:
+      200:
+        description: Для каждой точки массив имен зон, в которых она находится.
+        schema:
+          type: array
+          items:
+            type: array
+            items:
+              type: string
+          example: [["zone1"], []]
+      400:
+        description: Какие-то параметры неверные
+        schema:
+          type: string
+          example: "Wrong points"
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return bad_request('Wrong points')
+    points = data.get('points')
+    token = data.get('token')
+    if isinstance(points, list) and len(points) <= MAX_ZONE_QUERY_POINTS and all(
+            isinstance(point, list) and len(point) == 2
+            and all(isinstance(coord, (int, float)) and not isinstance(coord, bool) for coord in point)
+            for point in points):
+        return authorized_request(handler_func=find_forbidden_zones_handler, token=token, points=points)
+    else:
+        return bad_request('Wrong points')
   
 
 @bp.route(AdminRoute.FORBIDDEN_ZONES)
@@ -1060,11 +1115,17 @@ def key_kos_exchange():
       - name: e
         in: query
         type: string
-        required: true
-        description: Параметр e для ключа.
+        required: false
+        description: Параметр e для ключа (не нужен для ed25519).
+      - name: scheme
+        in: query
+        type: string
+        required: false
+        enum: [rsa, ed25519]
+        description: Схема подписи БПЛА. Для ed25519 в n передается открытый ключ (32 байта, hex).
     responses:
       200:
-        description: Строка с открытым ключом ОРВД (hex, без 0x).
+        description: Строка с открытым ключом ОРВД (hex, без 0x); для ed25519 - открытый ключ Ed25519 ОРВД.
         schema:
           type: string
           example: "$Key: {n} {e}"
@@ -1079,8 +1140,9 @@ def key_kos_exchange():
     id = cast_wrapper(request.args.get('id'), str)
     n = request.args.get('n')
     e = request.args.get('e')
+    scheme = request.args.get('scheme')
     if id:
-        return regular_request(handler_func=key_kos_exchange_handler, id=id, n=n, e=e)
+        return regular_request(handler_func=key_kos_exchange_handler, id=id, n=n, e=e, scheme=scheme)
     else:
         return bad_request('Wrong id')
 
@@ -1098,6 +1160,13 @@ def auth():
         type: string
         required: true
         description: Идентификатор БПЛА.
+      - name: format
+        in: query
+        type: string
+        required: false
+        enum: [text, compact]
+        description: Формат запрещенных зон и миссий для БПЛА. Компактный формат - base64 от целых
+          координат (1e-7 градуса), закодированных разностями в zigzag varint и при выгоде сжатых zlib.
       - name: sig
         in: query
         type: string
@@ -1105,10 +1174,10 @@ def auth():
         description: Подпись запроса.
     responses:
       200:
-        description: Строка подтверждения аутентификации.
+        description: Строка подтверждения аутентификации; при выборе компактного формата - с подтверждением формата.
         schema:
           type: string
-          example: "$Auth id={id}#{signature}"
+          example: "$Auth id={id} format=compact#{signature}"
       400:
         description: Неверный идентификатор.
         schema:
@@ -1120,8 +1189,13 @@ def auth():
     id = cast_wrapper(request.args.get('id'), str)
     if id is not None:
         sig = request.args.get('sig')
+        wire_format = request.args.get('format')
+        query_str = f'{APIRoute.AUTH}?id={id}'
+        if wire_format is not None:
+            query_str += f'&format={wire_format}'
         return signed_request(handler_func=auth_handler, verifier_func=verify, signer_func=sign,
-                          query_str=f'{APIRoute.AUTH}?id={id}', key_group=f'{KeyGroup.KOS}{id}', sig=sig, id=id)
+                              query_str=query_str, key_group=f'{KeyGroup.KOS}{id}', sig=sig, id=id,
+                              wire_format=wire_format)
     else:
         return bad_request('Wrong id')
 
@@ -1395,10 +1469,11 @@ def get_all_forbidden_zones():
         description: Подпись запроса.
     responses:
       200:
-        description: Информация о запрещенных зонах.
+        description: Версия и информация о запрещенных зонах в формате, выбранном БПЛА при аутентификации
+          ('$ForbiddenZonesC <base64>' для компактного формата).
         schema:
           type: string
-          example: "$ForbiddenZones 1&test_name&2&50_100&0_100#{signature}"
+          example: "$ForbiddenZonesVersion 7$ForbiddenZones 1&test_name&2&50_100&0_100#{signature}"
       400:
         description: Неверный идентификатор.
         schema:
@@ -1429,6 +1504,11 @@ def get_forbidden_zones_delta():
         type: string
         required: true
         description: Идентификатор БПЛА.
+      - name: version
+        in: query
+        type: integer
+        required: false
+        description: Версия запрещенных зон, известная БПЛА. Если указана, возвращается суммарная дельта с этой версии.
       - name: sig
         in: query
         type: string
@@ -1436,12 +1516,13 @@ def get_forbidden_zones_delta():
         description: Подпись запроса.
     responses:
       200:
-        description: Дельта изменений в запрещенных зонах.
+        description: Дельта изменений в запрещенных зонах в формате, выбранном БПЛА при аутентификации
+          ('$ForbiddenZonesDeltaC <base64>' для компактного формата).
         schema:
           type: string
-          example: "$ForbiddenZonesDelta 1&test_name&modified&2&50_100&0_100#{signature}"
+          example: "$ForbiddenZonesVersion 7$ForbiddenZonesDelta 1&test_name&modified&2&50_100&0_100#{signature}"
       400:
-        description: Неверный идентификатор.
+        description: Неверный идентификатор или версия.
         schema:
           type: string
           example: "Wrong id"
@@ -1449,10 +1530,17 @@ def get_forbidden_zones_delta():
         description: Ошибка проверки подписи.
     """
     id = cast_wrapper(request.args.get('id'), str)
+    raw_version = request.args.get('version')
+    version = cast_wrapper(raw_version, int)
     sig = request.args.get('sig')
-    if id:
+    if id and (raw_version is None or version is not None):
+        query_str = f'{APIRoute.GET_FORBIDDEN_ZONES_DELTA}?id={id}'
+        if raw_version is not None:
+            query_str += f'&version={raw_version}'
         return signed_request(handler_func=get_forbidden_zones_delta_handler, verifier_func=verify, signer_func=sign,
-                              query_str=f'{APIRoute.GET_FORBIDDEN_ZONES_DELTA}?id={id}', key_group=f'{KeyGroup.KOS}{id}', sig=sig, id=id)
+                              query_str=query_str, key_group=f'{KeyGroup.KOS}{id}', sig=sig, id=id, version=version)
+    elif id:
+        return bad_request('Wrong version')
     else:
         return bad_request('Wrong id')
       
@@ -1525,7 +1613,11 @@ def export_forbidden_zones():
     if token is None or not check_user_token(token):
         return jsonify({"error": "Unauthorized"}), 401
 
-    return send_file(FORBIDDEN_ZONES_PATH, as_attachment=True, attachment_filename='forbidden_zones.json')
+    # Файл зон на диске не содержит правок из журнала, поэтому выгружается текущий снимок
+    snapshot = forbidden_zones_store.snapshot()
+    body = json.dumps({**snapshot.zones, 'version': snapshot.version}, ensure_ascii=False, indent=4)
+    return Response(body, mimetype='application/json',
+                    headers={'Content-Disposition': 'attachment; filename=forbidden_zones.json'})
 
 
 @bp.route(AdminRoute.IMPORT_FORBIDDEN_ZONES, methods=['POST'])
@@ -1546,9 +1638,17 @@ def import_forbidden_zones():
         type: string
         required: true
         description: Токен аутентификации
+      - name: tolerance
+        in: formData
+        type: number
+        required: false
+        description: Допустимое отклонение упрощения полигонов в метрах (0 - без упрощения). Упрощение не уменьшает зоны.
     responses:
       200:
         description: Успешный импорт зон
+        schema:
+          type: object
+          example: {"status": "success", "zones": 2, "vertices_before": 1200, "vertices_after": 240, "vertex_reduction": 0.8, "import_time_s": 0.153}
       400:
         description: Ошибка импорта зон
       401:
@@ -1561,20 +1661,22 @@ def import_forbidden_zones():
     file = request.files.get('file')
     if file is None:
         return jsonify({"error": "No file provided"}), 400
+    tolerance = cast_wrapper(request.form.get('tolerance', 0), float)
+    if tolerance is None or not 0 <= tolerance < float('inf'):
+        return jsonify({"error": "Wrong tolerance"}), 400
 
     try:
-        with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-            old_zones = json.load(f)
-        
-        file.save(FORBIDDEN_ZONES_PATH)
-        
-        with open(FORBIDDEN_ZONES_PATH, 'r', encoding='utf-8') as f:
-            new_zones = json.load(f)
-        
-        compute_and_save_forbidden_zones_delta(old_zones, new_zones)
+        started = time.perf_counter()
+        new_zones, report = parse_forbidden_zones_upload(file.stream, tolerance)
+        forbidden_zones_store.replace(new_zones)
+        report['import_time_s'] = round(time.perf_counter() - started, 3)
+        print(f"Forbidden zones imported: {report}")
         mqtt_publish_forbidden_zones()
         
-        return jsonify({"status": "success"}), 200
+        return jsonify({"status": "success", **report}), 200
+    except ZonesImportError as e:
+        print(e)
+        return jsonify({"error": "Invalid forbidden zones", "details": e.errors}), 400
     except Exception as e:
         print(e)
         return jsonify({"error": "Failed to save file"}), 400
@@ -1698,4 +1800,56 @@ def toggle_flight_info_response_mode():
 @bp.route(AdminRoute.GET_ALL_DATA)
 def get_all_data():
     token = request.args.get('token')
-    return authorized_request(handler_func=get_all_data_handler, token=token)
\ No newline at end of file
+    return authorized_request(handler_func=get_all_data_handler, token=token)
+
+
+@bp.route(AdminRoute.GET_METRICS)
+def get_metrics():
+    """
+    Возвращает внутренние метрики сервера ОРВД.
+    ---
+    tags:
+      - admin
+    parameters:
+      - name: token
+        in: query
+        type: string
+        required: true
+        description: Токен аутентификации.
+    responses:
+      200:
+        description: Метрики подсистем сервера.
+        schema:
+          type: object
+          example: {"mqtt_dispatcher": {"queue_depth": 0, "wait_avg_ms": 0.4}}
+    """
+    token = request.args.get('token')
+    return authorized_request(handler_func=get_metrics_handler, token=token)
+
+
+@bp.route(AdminRoute.METRICS)
+def prometheus_metrics():
+    """
+    Возвращает метрики сервера ОРВД в текстовом формате Prometheus.
+    ---
+    tags:
+      - admin
+    parameters:
+      - name: token
+        in: query
+        type: string
+        required: true
+        description: Токен аутентификации.
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Число сообщений, байты, гистограммы времени обработки и число ошибок по шаблонам MQTT-топиков, показатели подсистем.
+        schema:
+          type: string
+          example: "orvd_mqtt_messages_total{topic=\"api/telemetry/{id}\"} 42"
+      401:
+        description: Неверный токен.
+    """
+    token = request.args.get('token')
+    return authorized_request(handler_func=get_prometheus_metrics_handler, token=token)
@@ -2,11 +2,11 @@ import json
 from urllib.parse import parse_qs
 from constants import MQTTTopic, APIRoute, KeyGroup
 from extensions import mqtt_client as mqtt
-from utils import verify, sign, signed_request
+from utils import verify, sign, signed_request, sign_answer, decode_telemetry
 from handlers.general_handlers import fmission_ms_handler
 from handlers.api_handlers import (
     telemetry_handler, arm_handler, save_logs_handler, revise_mission_handler,
-    save_events_handler
+    save_events_handler, arm_decision_result_handler, revise_mission_result_handler
 )
 
 def extract_id_from_kwargs(kwargs):
@@ -16,16 +16,16 @@ def extract_id_from_kwargs(kwargs):
     else:
         raise Exception("No id provided.")
 
-@mqtt.topic(MQTTTopic.TELEMETRY)
+def _respond_after_decision(result_handler, response_topic, id, key_group):
+    answer = result_handler(id)
+    mqtt.publish_message(response_topic.format(id=id), sign_answer(answer, key_group, sign))
+
+
+@mqtt.topic(MQTTTopic.TELEMETRY, replaceable=True)
 def telemetry(client, userdata, msg, **kwargs):
-    try:
-        query_string = msg.payload.decode()
-        query_params = parse_qs(query_string)
-        payload = {k: v[0] for k, v in query_params.items()}
-        payload['id'] = extract_id_from_kwargs(kwargs)
-        telemetry_handler(**payload)
-    except Exception as e:
-        print(f"Error handling telemetry message: {e}")
+    payload = decode_telemetry(msg.payload)
+    payload['id'] = extract_id_from_kwargs(kwargs)
+    telemetry_handler(**payload)
 
 @mqtt.topic(MQTTTopic.FMISSION_MS)
 def mission(client, userdata, msg, **kwargs):
@@ -36,27 +36,28 @@ def mission(client, userdata, msg, **kwargs):
         fmission_ms_handler(**payload)
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON from mission message: {e}. Payload: {payload_str}")
-    except Exception as e:
-        print(f"Error handling mission message: {e}")
+        raise
 
 
-@mqtt.topic(MQTTTopic.ARM_REQUEST)
+@mqtt.topic(MQTTTopic.ARM_REQUEST, partitioned=True)
 def arm_request(client, userdata, msg, **kwargs):
     """
     Обрабатывает запрос на арм от БПЛА.
     """
-    try:
-        query_string = msg.payload.decode()
-        query_params = parse_qs(query_string)
-        payload = {k: v[0] for k, v in query_params.items()}
-        id = extract_id_from_kwargs(kwargs)
-        
-        response = signed_request(handler_func=arm_handler, verifier_func=verify, signer_func=sign,
-                            query_str=f"{APIRoute.ARM}?id={id}", key_group=f"{KeyGroup.KOS}{id}", sig=payload['sig'], id=id)
-        if len(response) == 2 and response[1] == 200:
-            mqtt.publish_message(MQTTTopic.ARM_RESPONSE.format(id=id), response[0])
-    except Exception as e:
-        print(f"Error handling mission message: {e}")
+    query_string = msg.payload.decode()
+    query_params = parse_qs(query_string)
+    payload = {k: v[0] for k, v in query_params.items()}
+    id = extract_id_from_kwargs(kwargs)
+    key_group = f"{KeyGroup.KOS}{id}"
+    # Решение оператора ожидается вне очереди БПЛА, ответ отправляется из функции обратного вызова
+    on_decision = lambda: mqtt.run_keyed(id, _respond_after_decision, arm_decision_result_handler,
+                                         MQTTTopic.ARM_RESPONSE, id, key_group)
+    
+    response = signed_request(handler_func=arm_handler, verifier_func=verify, signer_func=sign,
+                        query_str=f"{APIRoute.ARM}?id={id}", key_group=key_group, sig=payload['sig'], id=id,
+                        on_decision=on_decision)
+    if len(response) == 2 and response[1] == 200:
+        mqtt.publish_message(MQTTTopic.ARM_RESPONSE.format(id=id), response[0])
 
 @mqtt.topic(MQTTTopic.LOGS)
 def save_logs(client, userdata, msg, **kwargs):
@@ -80,18 +81,19 @@ def save_events(client, userdata, msg, **kwargs):
     }
     save_events_handler(**payload)
 
-@mqtt.topic(MQTTTopic.NMISSION_REQUEST)
+@mqtt.topic(MQTTTopic.NMISSION_REQUEST, partitioned=True)
 def revise_mission(client, userdata, msg, **kwargs):
-    try:
-        query_string = msg.payload.decode()
-        query_params = parse_qs(query_string)
-        payload = {k: v[0] for k, v in query_params.items()}
-        id = extract_id_from_kwargs(kwargs)
-        
-        response = signed_request(handler_func=revise_mission_handler, verifier_func=verify, signer_func=sign,
-                                    query_str=f"{APIRoute.NMISSION}?id={id}&mission={payload.get('mission')}",
-                                    key_group=f'{KeyGroup.KOS}{id}', sig=payload['sig'], id=id, mission=payload.get('mission'))
-        if len(response) == 2 and response[1] == 200:
-            mqtt.publish_message(MQTTTopic.NMISSION_RESPONSE.format(id=id), response[0])
-    except Exception as e:
-        print(f"Error handling mission message: {e}")
\ No newline at end of file
+    query_string = msg.payload.decode()
+    query_params = parse_qs(query_string)
+    payload = {k: v[0] for k, v in query_params.items()}
+    id = extract_id_from_kwargs(kwargs)
+    key_group = f'{KeyGroup.KOS}{id}'
+    on_decision = lambda: mqtt.run_keyed(id, _respond_after_decision, revise_mission_result_handler,
+                                         MQTTTopic.NMISSION_RESPONSE, id, key_group)
+    
+    response = signed_request(handler_func=revise_mission_handler, verifier_func=verify, signer_func=sign,
+                                query_str=f"{APIRoute.NMISSION}?id={id}&mission={payload.get('mission')}",
+                                key_group=key_group, sig=payload['sig'], id=id, mission=payload.get('mission'),
+                                on_decision=on_decision)
+    if len(response) == 2 and response[1] == 200:
+        mqtt.publish_message(MQTTTopic.NMISSION_RESPONSE.format(id=id), response[0])
\ No newline at end of file
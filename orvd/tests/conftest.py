@@ -0,0 +1,25 @@
+import pytest
+from flask import Flask
+from extensions import db
+from db.key_cache import public_key_cache
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Фикстура приложения с отдельной файловой БД SQLite."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "test.db"}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    # Кэш открытых ключей общий для процесса и не должен переживать БД предыдущего теста
+    public_key_cache.invalidate()
+    yield app
+
+
+@pytest.fixture
+def app_context(app):
+    """Приложение с активным контекстом на время теста."""
+    with app.app_context():
+        yield app
@@ -1,3 +1,10 @@
+import handlers.api_handlers as api_handlers
+from constants import ARMED
+from context import context
+from db.dao import get_entity_by_key
+from db.models import Mission, Uav
+from extensions import db
+from handlers.admin_handlers import arm_decision_handler
 from utils import bad_request, regular_request
 
 
@@ -32,4 +39,19 @@ def test_regular_request_exception():
     response, status_code = regular_request(handler_func_exception)
 
     assert response == "Conflict."
-    assert status_code == 409
\ No newline at end of file
+    assert status_code == 409
+def test_arm_request_waits_for_operator_without_blocking(app_context, monkeypatch):
+    monkeypatch.setattr(api_handlers, 'mqtt_publish_flight_state', lambda id: None)
+    db.session.add(Uav(id='1', is_armed=False, state='В сети', kill_switch_state=False))
+    db.session.add(Mission(uav_id='1', is_accepted=True))
+    db.session.commit()
+    decided = []
+
+    assert api_handlers.arm_handler('1', on_decision=lambda: decided.append('1')) is None
+    assert '1' in context.arm_queue and get_entity_by_key(Uav, '1').state == 'Ожидает'
+    assert decided == []
+
+    assert arm_decision_handler('1', ARMED) == f'$Arm: {ARMED}'
+    assert decided == ['1'] and '1' not in context.arm_queue
+    assert api_handlers.arm_decision_result_handler('1') == f'$Arm {ARMED}$Delay 5'
+    assert get_entity_by_key(Uav, '1').state == 'В полете'
@@ -0,0 +1,62 @@
+import base64
+import math
+import random
+import pytest
+from utils import (
+    get_new_polygon_feature, generate_forbidden_zones_string, encode_forbidden_zones_compact,
+    decode_forbidden_zones_compact, encode_forbidden_zones_delta_compact, decode_forbidden_zones_delta_compact,
+    encode_mission_compact, decode_mission_compact, encode_mission, encode_mission_message, home_handler,
+    takeoff_handler, waypoint_handler, servo_handler, delay_handler, land_handler
+)
+from utils.mission import roi_handler
+
+
+def _zones(count, vertices, seed=0):
+    rng = random.Random(seed)
+    features = []
+    for i in range(count):
+        lat, lon = rng.uniform(-89, 89), rng.uniform(-179, 179)
+        ring = [[round(lon + 0.01 * math.cos(2 * math.pi * j / vertices), 7),
+                 round(lat + 0.01 * math.sin(2 * math.pi * j / vertices), 7)] for j in range(vertices)]
+        features.append(get_new_polygon_feature(f'зона {i}', ring + [ring[0]]))
+    return {"type": "FeatureCollection", "features": features}
+
+
+def test_zones_round_trip_is_exact_to_1e7():
+    zones = _zones(50, 40)
+    for compress in (False, True):
+        message = encode_forbidden_zones_compact(zones, compress)
+        assert message.startswith('$ForbiddenZonesC ')
+        decoded = decode_forbidden_zones_compact(message)
+        assert generate_forbidden_zones_string(decoded) == generate_forbidden_zones_string(zones)
+    assert len(encode_forbidden_zones_compact(zones)) < len(generate_forbidden_zones_string(zones)) / 2
+
+def test_delta_round_trip_keeps_change_types():
+    delta = _zones(3, 5)
+    for zone, change_type in zip(delta['features'], ('added', 'modified', 'deleted')):
+        zone['properties']['change_type'] = change_type
+    decoded = decode_forbidden_zones_delta_compact(encode_forbidden_zones_delta_compact(delta))
+    assert [zone['properties'] for zone in decoded['features']] == [zone['properties'] for zone in delta['features']]
+    assert decode_forbidden_zones_compact(encode_forbidden_zones_compact({"features": []}))['features'] == []
+
+def test_mission_round_trip():
+    mission = [home_handler(60.1234567, -30.5, 100), takeoff_handler(20.5), waypoint_handler(60.13, -30.49, 120.25),
+               servo_handler(5.0, 1500.0), delay_handler(3), roi_handler(60.2, -30.4, 0),
+               land_handler(0, 0, 0, home_handler(60.1234567, -30.5, 100))]
+    steps = encode_mission(mission)
+    decoded = decode_mission_compact(encode_mission_compact(steps))
+    assert decoded == [[step[0], *map(float, step[1:].split('_'))] for step in steps]
+    assert encode_mission_message(steps) == f'$FlightMission {"&".join(steps)}'
+    assert encode_mission_message(steps, 'compact') == encode_mission_compact(steps)
+    with pytest.raises(ValueError):
+        encode_mission_compact(['X1_2'])
+
+def test_corrupted_messages_are_rejected():
+    message = encode_forbidden_zones_compact(_zones(2, 4), compress=False)
+    payload = base64.b64decode(message.split(' ')[1])
+    with pytest.raises(ValueError, match='version'):
+        decode_forbidden_zones_compact('$ForbiddenZonesC ' + base64.b64encode(b'\x02' + payload[1:]).decode())
+    with pytest.raises(ValueError, match='Truncated'):
+        decode_forbidden_zones_compact('$ForbiddenZonesC ' + base64.b64encode(payload[:-1]).decode())
+    with pytest.raises(ValueError):
+        decode_forbidden_zones_delta_compact(message)
@@ -0,0 +1,316 @@
+import json
+import os
+import random
+from hashlib import sha256
+import pytest
+from context import context
+from constants import KeyGroup
+from utils import (
+    ForbiddenZonesStore, generate_forbidden_zones_string, get_new_polygon_feature,
+    get_sha256_hex, generate_orvd_keys, is_point_in_polygon, ZoneGridIndex,
+    get_mission_forbidden_zones, home_handler, waypoint_handler, land_handler
+)
+
+
+def _square(lat, lon, size=0.01):
+    return [[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Хранилище зон с отдельными файлами зон и дельты."""
+    zones = {"type": "FeatureCollection", "features": [get_new_polygon_feature('zone1', _square(60.0, 30.0))]}
+    path = tmp_path / 'forbidden_zones.json'
+    path.write_text(json.dumps(zones), encoding='utf-8')
+    return ForbiddenZonesStore(str(path), str(tmp_path / 'forbidden_zones_delta.json'))
+
+
+def test_snapshot_precomputes_message_and_hash(store):
+    snapshot = store.snapshot()
+    assert snapshot.version == 1
+    assert snapshot.names == ['zone1']
+    assert snapshot.message == generate_forbidden_zones_string(snapshot.zones)
+    assert snapshot.hash == get_sha256_hex(snapshot.message)
+    assert store.snapshot() is snapshot
+
+def test_signed_message_follows_orvd_key(store):
+    generate_orvd_keys()
+    snapshot = store.snapshot()
+    signed = snapshot.signed_message()
+    message, signature = signed.split('#')
+    key = context.loaded_keys[KeyGroup.ORVD]
+    assert message == f'$ForbiddenZonesVersion 1{snapshot.message}'
+    assert pow(int(signature, 16), key.e, key.n) == int.from_bytes(sha256(message.encode()).digest(), 'big')
+    assert snapshot.signed_message() is signed
+
+    generate_orvd_keys()
+    assert snapshot.signed_message() != signed
+
+def test_update_swaps_snapshot_and_writes_files(store, tmp_path):
+    old_snapshot = store.snapshot()
+    new_snapshot = store.update(lambda zones: zones['features'].append(get_new_polygon_feature('zone2', _square(61.0, 31.0))))
+    assert new_snapshot.version == 2
+    assert store.snapshot() is new_snapshot
+    # Старый снимок не изменился
+    assert old_snapshot.names == ['zone1']
+    assert new_snapshot.names == ['zone1', 'zone2']
+    assert 'change_type' not in new_snapshot.zones_by_name['zone2']['properties']
+
+    on_disk = json.loads((tmp_path / 'forbidden_zones.json').read_text(encoding='utf-8'))
+    assert [zone['properties']['name'] for zone in on_disk['features']] == ['zone1', 'zone2']
+    delta = json.loads((tmp_path / 'forbidden_zones_delta.json').read_text(encoding='utf-8'))
+    assert [(zone['properties']['name'], zone['properties']['change_type']) for zone in delta['features']] == \
+        [('zone2', 'added')]
+
+def test_invalid_update_keeps_snapshot_and_file(store, tmp_path):
+    before = (tmp_path / 'forbidden_zones.json').read_text(encoding='utf-8')
+    with pytest.raises(Exception):
+        store.replace({"type": "FeatureCollection", "features": [{"properties": {}}]})
+    assert store.snapshot().version == 1
+    assert (tmp_path / 'forbidden_zones.json').read_text(encoding='utf-8') == before
+
+def test_zone_index_matches_full_scan():
+    rng = random.Random(1)
+    features = [get_new_polygon_feature(f'zone{i}', _square(60 + rng.random(), 30 + rng.random(), rng.uniform(0.005, 0.05)))
+                for i in range(200)]
+    # Зона, покрывающая весь район, попадает в список крупных зон
+    features.append(get_new_polygon_feature('big', _square(59.5, 29.5, 2)))
+    index = ZoneGridIndex({"type": "FeatureCollection", "features": features})
+    assert index.stats()['large_zones'] == 1
+
+    points = [[60 + rng.random(), 30 + rng.random()] for _ in range(500)]
+    expected = [[zone['properties']['name'] for zone in features
+                 if is_point_in_polygon((lon, lat), zone['geometry']['coordinates'][0])] for lat, lon in points]
+    assert index.query(points) == expected
+    assert any(len(names) > 1 for names in expected)
+
+def test_zone_index_follows_snapshot(store):
+    assert store.snapshot().index.query([[60.005, 30.005], [61.005, 31.005]]) == [['zone1'], []]
+    store.update(lambda zones: zones['features'].append(get_new_polygon_feature('zone2', _square(61.0, 31.0))))
+    assert store.snapshot().index.query([[60.005, 30.005], [61.005, 31.005]]) == [['zone1'], ['zone2']]
+    assert ZoneGridIndex({"type": "FeatureCollection", "features": []}).query([[60.0, 30.0]]) == [[]]
+
+def test_mission_crossing_forbidden_zone(store):
+    index = store.snapshot().index
+    # Участок проходит через зону, но обе его точки вне зоны
+    crossing = [home_handler(60.005, 29.99, 100), waypoint_handler(60.005, 30.02, 100), land_handler(60.02, 30.02, 0)]
+    assert get_mission_forbidden_zones(crossing, index) == ['zone1']
+    around = [home_handler(59.99, 29.99, 100), waypoint_handler(59.99, 30.02, 100), land_handler(60.02, 30.02, 0)]
+    assert get_mission_forbidden_zones(around, index) == []
+    assert get_mission_forbidden_zones([home_handler(60.005, 30.005, 100)], index) == ['zone1']
+
+def _add_zone(name, lat, lon):
+    return lambda zones: zones['features'].append(get_new_polygon_feature(name, _square(lat, lon)))
+
+def _delete_zone(name):
+    def mutate(zones):
+        zones['features'] = [zone for zone in zones['features'] if zone['properties']['name'] != name]
+    return mutate
+
+def _move_zone(name, lat, lon):
+    def mutate(zones):
+        for zone in zones['features']:
+            if zone['properties']['name'] == name:
+                zone['geometry']['coordinates'][0] = _square(lat, lon)
+    return mutate
+
+def _changes(delta_zones):
+    return {zone['properties']['name']: zone['properties']['change_type'] for zone in delta_zones['features']}
+
+def test_delta_since_combines_changes(store):
+    store.update(_add_zone('zone2', 61.0, 31.0))       # 2
+    store.update(_move_zone('zone2', 61.5, 31.5))      # 3
+    store.update(_move_zone('zone1', 60.5, 30.5))      # 4
+    store.update(_add_zone('zone3', 62.0, 32.0))       # 5
+    store.update(_delete_zone('zone3'))                # 6
+    store.update(_delete_zone('zone1'))                # 7
+
+    snapshot, delta_zones = store.delta_since(1)
+    assert snapshot.version == 7
+    assert _changes(delta_zones) == {'zone2': 'added', 'zone1': 'deleted'}
+    assert _changes(store.delta_since(3)[1]) == {'zone1': 'deleted'}
+    # zone3 добавлена и удалена после версии 4
+    assert _changes(store.delta_since(4)[1]) == {'zone1': 'deleted'}
+    assert store.delta_since(7)[1]['features'] == []
+    assert store.delta_since(8)[1] is None
+    # Журнал хранит копии: снимок не содержит change_type
+    assert 'change_type' not in snapshot.zones_by_name['zone2']['properties']
+
+def test_delta_history_compaction_and_restart(store, tmp_path):
+    store.max_history = 2
+    store.update(_add_zone('zone2', 61.0, 31.0))
+    store.update(_add_zone('zone3', 62.0, 32.0))
+    store.update(_delete_zone('zone2'))
+    assert store.delta_since(1)[1] is None
+    assert _changes(store.delta_since(2)[1]) == {'zone3': 'added', 'zone2': 'deleted'}
+    assert store.stats()['history'] == 2
+
+    # Версия сохраняется в файле зон, журнал после перезапуска пуст
+    restarted = ForbiddenZonesStore(str(tmp_path / 'forbidden_zones.json'), str(tmp_path / 'forbidden_zones_delta.json'))
+    assert restarted.snapshot().version == 4
+    assert restarted.snapshot().names == ['zone1', 'zone3']
+    assert restarted.delta_since(3)[1] is None
+    assert restarted.delta_since(4)[1]['features'] == []
+
+def test_delta_history_rebuilt_from_journal_on_restart(store):
+    store.set_zone('zone2', _square(61.0, 31.0))
+    store.set_zone('zone3', _square(62.0, 32.0))
+    store.delete_zone('zone2')
+
+    restarted = ForbiddenZonesStore(store.path, store.delta_path)
+    assert restarted.snapshot().version == 4
+    assert _changes(restarted.delta_since(1)[1]) == {'zone3': 'added'}
+    assert _changes(restarted.delta_since(2)[1]) == {'zone3': 'added', 'zone2': 'deleted'}
+    assert restarted.delta_since(0)[1] is None
+
+    # Уплотнение журнала не обрывает историю, уже прочитанную процессом
+    store.set_zone('zone4', _square(63.0, 33.0))
+    restarted.compact_every = 1
+    restarted.set_zone('zone5', _square(64.0, 34.0))
+    assert _journal_lines(restarted) == []
+    assert _changes(restarted.delta_since(1)[1]) == {'zone3': 'added', 'zone4': 'added', 'zone5': 'added'}
+
+def test_full_zones_message_carries_version(store):
+    store.set_zone('zone2', _square(61.0, 31.0))
+    snapshot = store.snapshot()
+    assert snapshot.versioned_message() == f'$ForbiddenZonesVersion 2{snapshot.message}'
+    assert snapshot.hash == get_sha256_hex(snapshot.message)
+
+def _journal_lines(store):
+    with open(store.journal_path, 'rb') as f:
+        return f.read().splitlines(keepends=True)
+
+def test_zone_edits_are_journaled_and_replayed(store, tmp_path):
+    snapshot_before = (tmp_path / 'forbidden_zones.json').read_text(encoding='utf-8')
+    store.set_zone('zone2', _square(61.0, 31.0))
+    store.set_zone('zone1', _square(60.5, 30.5))
+    assert store.set_zone('zone1', _square(60.5, 30.5)) is None
+    store.delete_zone('zone2')
+    assert store.delete_zone('zone2') is None
+
+    # Правки дописываются в журнал, снимок на диске не переписывается
+    assert (tmp_path / 'forbidden_zones.json').read_text(encoding='utf-8') == snapshot_before
+    assert [json.loads(line)['version'] for line in _journal_lines(store)] == [2, 3, 4]
+    assert _changes(store.delta_since(1)[1]) == {'zone1': 'modified'}
+
+    restarted = ForbiddenZonesStore(store.path, store.delta_path)
+    assert restarted.snapshot().version == 4
+    assert restarted.snapshot().message == store.snapshot().message
+
+def test_torn_journal_tail_is_discarded(store):
+    store.set_zone('zone2', _square(61.0, 31.0))
+    store.set_zone('zone3', _square(62.0, 32.0))
+    lines = _journal_lines(store)
+    # Сбой во время записи последней строки
+    with open(store.journal_path, 'wb') as f:
+        f.write(lines[0] + lines[1][:-10])
+
+    restarted = ForbiddenZonesStore(store.path, store.delta_path)
+    assert restarted.snapshot().version == 2
+    assert restarted.snapshot().names == ['zone1', 'zone2']
+    assert _journal_lines(restarted) == [lines[0]]
+    restarted.set_zone('zone4', _square(63.0, 33.0))
+    assert ForbiddenZonesStore(store.path, store.delta_path).snapshot().names == ['zone1', 'zone2', 'zone4']
+
+def test_journal_version_gap_refuses_to_load(store):
+    for i in range(2, 5):
+        store.set_zone(f'zone{i}', _square(60.0 + i, 30.0 + i))
+    lines = _journal_lines(store)
+    with open(store.journal_path, 'wb') as f:
+        f.write(lines[0] + lines[2])
+
+    with pytest.raises(ValueError, match='skips from version 2 to 4'):
+        ForbiddenZonesStore(store.path, store.delta_path).snapshot()
+    # Записи после разрыва не отбрасываются
+    assert _journal_lines(store) == [lines[0], lines[2]]
+
+def test_failed_journal_write_is_rolled_back(store, monkeypatch):
+    store.set_zone('zone2', _square(61.0, 31.0))
+    lines = _journal_lines(store)
+
+    def failing_fsync(fd):
+        raise OSError('No space left on device')
+
+    with monkeypatch.context() as m:
+        m.setattr(os, 'fsync', failing_fsync)
+        with pytest.raises(OSError):
+            store.set_zone('zone3', _square(62.0, 32.0))
+    assert _journal_lines(store) == lines
+    assert store.snapshot().names == ['zone1', 'zone2']
+    store.set_zone('zone4', _square(63.0, 33.0))
+    assert ForbiddenZonesStore(store.path, store.delta_path).snapshot().names == ['zone1', 'zone2', 'zone4']
+
+def test_concurrent_stores_do_not_lose_edits(store):
+    # Второй процесс загрузил зоны до правки первого
+    other = ForbiddenZonesStore(store.path, store.delta_path)
+    assert other.snapshot().version == 1
+    store.set_zone('zoneA', _square(61.0, 31.0))
+    snapshot = other.set_zone('zoneB', _square(62.0, 32.0))
+
+    assert snapshot.version == 3 and snapshot.names == ['zone1', 'zoneA', 'zoneB']
+    assert [json.loads(line)['version'] for line in _journal_lines(store)] == [2, 3]
+    assert _changes(other.delta_since(1)[1]) == {'zoneA': 'added', 'zoneB': 'added'}
+    # Читатель видит изменения другого процесса без собственной записи
+    assert store.snapshot().names == ['zone1', 'zoneA', 'zoneB']
+    assert ForbiddenZonesStore(store.path, store.delta_path).snapshot().names == ['zone1', 'zoneA', 'zoneB']
+
+def test_concurrent_store_follows_compaction(store, tmp_path):
+    store.compact_every = 2
+    other = ForbiddenZonesStore(store.path, store.delta_path)
+    other.snapshot()
+    store.set_zone('zone2', _square(61.0, 31.0))
+    store.set_zone('zone3', _square(62.0, 32.0))
+    assert _journal_lines(store) == [] and store.stats()['compactions'] == 1
+
+    assert other.delete_zone('zone2').version == 4
+    assert ForbiddenZonesStore(store.path, store.delta_path).snapshot().names == ['zone1', 'zone3']
+
+def test_duplicate_journal_version_refuses_to_load(store):
+    store.set_zone('zone2', _square(61.0, 31.0))
+    line = _journal_lines(store)[0]
+    duplicate = line.replace(b'zone2', b'zone3')
+    with open(store.journal_path, 'ab') as f:
+        f.write(duplicate)
+
+    with pytest.raises(ValueError, match='has version 2 after 2'):
+        ForbiddenZonesStore(store.path, store.delta_path).snapshot()
+    assert _journal_lines(store) == [line, duplicate]
+
+def test_journal_compaction(store, tmp_path):
+    store.compact_every = 2
+    store.set_zone('zone2', _square(61.0, 31.0))
+    lines = _journal_lines(store)
+    store.set_zone('zone3', _square(62.0, 32.0))
+    assert _journal_lines(store) == []
+    assert json.loads((tmp_path / 'forbidden_zones.json').read_text(encoding='utf-8'))['version'] == 3
+    assert store.stats()['compactions'] == 1
+
+    # Сбой после записи снимка, но до очистки журнала: старые записи пропускаются
+    with open(store.journal_path, 'wb') as f:
+        f.write(lines[0])
+    restarted = ForbiddenZonesStore(store.path, store.delta_path)
+    assert restarted.snapshot().version == 3
+    assert restarted.snapshot().names == ['zone1', 'zone2', 'zone3']
+
+def test_fragment_cache_rerenders_only_changed_zones(store):
+    store.set_zone('zone2', _square(61.0, 31.0))
+    store.set_zone('zone3', _square(62.0, 32.0))
+    misses = store.stats()['fragment_misses']
+    snapshot = store.set_zone('zone2', _square(61.5, 31.5))
+    assert store.stats()['fragment_misses'] == misses + 1
+    assert snapshot.message == generate_forbidden_zones_string(snapshot.zones)
+    # Возврат прежней геометрии: фрагмент старой версии зоны удален из кэша после сборки
+    snapshot = store.set_zone('zone2', _square(61.0, 31.0))
+    assert store.stats()['fragment_misses'] == misses + 2
+    store.delete_zone('zone3')
+    stats = store.stats()
+    assert stats['fragment_misses'] == misses + 2 and stats['fragment_fragments'] == 2
+    assert store.snapshot().message == generate_forbidden_zones_string(store.snapshot().zones)
+
+def test_fragment_cache_compares_coordinates_not_hashes(store):
+    # hash(-1.0) == hash(-2.0): кэш, сверяющий только хеш координат, вернул бы старый фрагмент
+    ring = _square(60.0, 10.0)
+    store.set_zone('a', [[-1.0 if lon == ring[0][0] else lon, lat] for lon, lat in ring])
+    snapshot = store.set_zone('a', [[-2.0 if lon == ring[0][0] else lon, lat] for lon, lat in ring])
+    assert snapshot.message == generate_forbidden_zones_string(snapshot.zones)
+    assert '_-2.0000000' in snapshot.message
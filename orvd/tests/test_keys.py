@@ -0,0 +1,218 @@
+import json
+import os
+import stat
+import sys
+import time
+from hashlib import sha256
+from Cryptodome.PublicKey import RSA, ECC
+from Cryptodome.Signature import eddsa
+from extensions import db
+from db.dao import get_key, save_public_key
+from db.models import UavPublicKeys
+from db.key_cache import public_key_cache
+from db.keystore import KeyStore, keystore
+from constants import KEYS_PATH, KeyGroup, MQTTTopic
+from context import context
+from utils import (
+    generate_keys, load_keys, sign, verify, signature_cache, get_orvd_key_group, ForbiddenZonesStore,
+    get_new_polygon_feature
+)
+from handlers.api_handlers import key_kos_exchange_handler
+import handlers.mqtt_handlers as mqtt_handlers
+from utils.signature_schemes import sign_hash_crt, rsa_scheme
+from utils.crypto_executor import CryptoExecutor, default_python_executable
+from utils.key_factory import KeyFactory
+
+
+def test_public_key_cached_after_first_lookup(app_context):
+    save_public_key('3233', '17', 'kos1')
+    misses = public_key_cache.stats()['misses']
+    hits = public_key_cache.stats()['hits']
+    assert get_key('kos1', private=False) == (3233, 17)
+
+    # Изменение в обход save_public_key не видно, пока ключ в кэше
+    UavPublicKeys.query.filter_by(uav_id='1').update({'n': '1'})
+    db.session.commit()
+    assert get_key('kos1', private=False) == (3233, 17)
+    assert public_key_cache.stats()['misses'] == misses + 1
+    assert public_key_cache.stats()['hits'] == hits + 1
+
+def test_public_key_cache_invalidated_on_save(app_context):
+    assert get_key('kos2', private=False) == -1
+    save_public_key('3233', '17', 'kos2')
+    assert get_key('kos2', private=False) == (3233, 17)
+    UavPublicKeys.query.filter_by(uav_id='2').delete()
+    db.session.commit()
+    save_public_key('55', '3', 'kos2')
+    assert get_key('kos2', private=False) == (55, 3)
+
+def test_public_key_cache_skips_stale_put():
+    generation = public_key_cache.generation()
+    public_key_cache.invalidate('kos3')
+    public_key_cache.put('kos3', (1, 1), generation)
+    assert public_key_cache.get('kos3') is None
+
+def test_crt_signature_matches_full_exponentiation():
+    generate_keys(1024, 'test_crt')
+    key = context.loaded_keys['test_crt']
+    for message in ('$Flight 1', '$Delay 5', ''):
+        hash = int.from_bytes(sha256(message.encode()).digest(), byteorder='big')
+        assert sign_hash_crt(hash, *signature_cache.key_params('test_crt', key, rsa_scheme)[1:]) == pow(hash, key.d, key.n)
+        assert sign(message, 'test_crt') == pow(hash, key.d, key.n)
+
+def test_repeated_message_signature_cached():
+    generate_keys(1024, 'test_crt')
+    hits = signature_cache.stats()['hits']
+    signature = sign('$Flight 0', 'test_crt')
+    assert sign('$Flight 0', 'test_crt') == signature
+    assert signature_cache.stats()['hits'] == hits + 1
+
+    # После перегенерации ключа подпись вычисляется заново новым ключом
+    generate_keys(1024, 'test_crt')
+    key = context.loaded_keys['test_crt']
+    hash = int.from_bytes(sha256(b'$Flight 0').digest(), byteorder='big')
+    assert sign('$Flight 0', 'test_crt') == pow(hash, key.d, key.n)
+
+def test_crypto_executor_offloads_and_falls_back_inline():
+    executor = CryptoExecutor(workers=1)
+    executor.start()
+    try:
+        assert executor.run(pow, 3, 5, 7) == pow(3, 5, 7)
+        assert executor.stats()['offloaded'] == 1
+    finally:
+        executor.shutdown()
+    assert executor.run(pow, 3, 5, 7) == pow(3, 5, 7)
+    assert executor.stats()['inline'] == 1
+    assert executor.stats()['workers'] == 0
+
+def test_crypto_executor_falls_back_inline_on_timeout():
+    executor = CryptoExecutor(workers=1, timeout=0.01)
+    executor.start()
+    try:
+        assert executor.run(time.sleep, 0.2) is None
+        assert executor.stats()['fallbacks'] == 1
+        assert executor.stats()['inline'] == 1
+        # Зависший пул больше не используется
+        assert executor.stats()['workers'] == 0
+    finally:
+        executor.shutdown()
+
+def test_crypto_executor_uses_python_under_embedding_host(monkeypatch):
+    monkeypatch.setattr(sys, 'executable', '/usr/sbin/apache2')
+    assert default_python_executable() == os.path.join(sys.prefix, 'bin', 'python3')
+
+def test_key_factory_hands_out_pregenerated_keys():
+    factory = KeyFactory(keysize=1024, pool_size=2)
+    factory.start()
+    try:
+        deadline = time.time() + 30
+        while factory.stats()['depth'] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert factory.stats()['depth'] == 2
+        first, second = factory.take(), factory.take()
+        assert first.n != second.n and first.has_private()
+        assert factory.stats()['misses'] == 0
+    finally:
+        factory.stop()
+
+def test_key_factory_generates_inline_when_disabled():
+    factory = KeyFactory(keysize=1024, pool_size=0)
+    factory.start()
+    key = factory.take()
+    load_keys(key, 'test_factory')
+    assert context.loaded_keys['test_factory'] is key
+    assert factory.stats()['misses'] == 1
+
+def test_keystore_persists_key_with_private_permissions(tmp_path):
+    created = []
+    def create_key():
+        created.append(RSA.generate(1024))
+        return created[-1]
+
+    store = KeyStore(str(tmp_path / 'keys'))
+    key = store.load_or_create('orvd', create_key)
+    key_path = tmp_path / 'keys' / 'orvd.pem'
+    assert stat.S_IMODE(os.stat(key_path).st_mode) == 0o600
+    assert not [name for name in os.listdir(tmp_path / 'keys') if name.startswith('.tmp-')]
+
+    # Другой процесс или перезапуск получают тот же ключ без генерации
+    other_store = KeyStore(str(tmp_path / 'keys'))
+    assert other_store.load_or_create('orvd', create_key).n == key.n
+    assert len(created) == 1
+
+def test_keystore_ignores_unsafe_key_groups(tmp_path):
+    store = KeyStore(str(tmp_path / 'keys'))
+    key = store.load_or_create('ms../../x', lambda: RSA.generate(1024))
+    assert key.has_private()
+    assert store.load('ms../../x') is None
+    assert not (tmp_path / 'keys').exists()
+
+def test_get_key_loads_private_key_from_keystore(tmp_path):
+    key = RSA.generate(1024)
+    keystore.path = str(tmp_path / 'keys')
+    try:
+        keystore.save('ms77', key)
+        context.loaded_keys.pop('ms77', None)
+        assert get_key('ms77', private=True).n == key.n
+        assert 'ms77' in context.loaded_keys
+    finally:
+        keystore.path = KEYS_PATH
+        context.loaded_keys.pop('ms77', None)
+
+def test_ed25519_key_exchange_and_signatures(app_context):
+    load_keys(ECC.generate(curve='Ed25519'), KeyGroup.ORVD_ED25519)
+    generate_keys(1024, KeyGroup.ORVD)
+    uav_key = ECC.generate(curve='Ed25519')
+    uav_public_hex = uav_key.public_key().export_key(format='raw').hex()
+
+    answer = key_kos_exchange_handler('5', uav_public_hex, None, scheme='ed25519')
+    orvd_public = eddsa.import_public_key(bytes.fromhex(answer.split(' ')[1]))
+    assert get_orvd_key_group('kos5') == KeyGroup.ORVD_ED25519
+    assert get_orvd_key_group('kos6') == KeyGroup.ORVD
+
+    # Подпись БПЛА проверяется его открытым ключом Ed25519
+    signature = int.from_bytes(eddsa.new(uav_key, 'rfc8032').sign(b'/api/auth?id=5'), byteorder='big')
+    assert verify('/api/auth?id=5', signature, 'kos5') is True
+    assert verify('/api/auth?id=6', signature, 'kos5') is False
+
+    # Ответ ОРВД подписан ключом Ed25519 и в два раза короче ответа RSA-1024
+    orvd_signature = sign('$Flight 1', get_orvd_key_group('kos5'))
+    eddsa.new(orvd_public, 'rfc8032').verify(b'$Flight 1', orvd_signature.to_bytes(64, byteorder='big'))
+    assert len(hex(orvd_signature)) <= 130 < len(hex(sign('$Flight 1', KeyGroup.ORVD)))
+
+def test_rsa_key_exchange_unchanged(app_context):
+    generate_keys(1024, KeyGroup.ORVD)
+    uav_key = RSA.generate(1024)
+    answer = key_kos_exchange_handler('7', hex(uav_key.n)[2:], hex(uav_key.e)[2:])
+    orvd_key = context.loaded_keys[KeyGroup.ORVD]
+    assert answer == f'$Key: {hex(orvd_key.n)[2:]} {hex(orvd_key.e)[2:]}'
+    assert get_key('kos7', private=False) == (uav_key.n, uav_key.e)
+    assert get_orvd_key_group('kos7') == KeyGroup.ORVD
+
+def test_ed25519_uav_verifies_forbidden_zones_broadcast(app_context, tmp_path, monkeypatch):
+    load_keys(ECC.generate(curve='Ed25519'), KeyGroup.ORVD_ED25519)
+    generate_keys(1024, KeyGroup.ORVD)
+    uav_key = ECC.generate(curve='Ed25519')
+    answer = key_kos_exchange_handler('8', uav_key.public_key().export_key(format='raw').hex(), None, scheme='ed25519')
+    orvd_public = eddsa.import_public_key(bytes.fromhex(answer.split(' ')[1]))
+
+    path = tmp_path / 'forbidden_zones.json'
+    zone = get_new_polygon_feature('zone', [[30.0, 60.0], [30.1, 60.0], [30.1, 60.1], [30.0, 60.0]])
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": [zone]}), encoding='utf-8')
+    published = {}
+    monkeypatch.setattr(mqtt_handlers, 'forbidden_zones_store',
+                        ForbiddenZonesStore(str(path), str(tmp_path / 'forbidden_zones_delta.json')))
+    monkeypatch.setattr(mqtt_handlers, '_published_zones_versions', {})
+    monkeypatch.setattr(mqtt_handlers.mqtt, 'publish_message',
+                        lambda topic, payload, **kwargs: published.__setitem__(topic, payload()))
+    mqtt_handlers.mqtt_publish_forbidden_zones()
+
+    # Рассылка для БПЛА Ed25519 проверяется ключом, полученным при обмене ключами
+    message, signature = published[MQTTTopic.FORBIDDEN_ZONES_ED25519].split('#')
+    assert message.startswith('$ForbiddenZonesVersion 1$ForbiddenZones 1&zone&')
+    eddsa.new(orvd_public, 'rfc8032').verify(message.encode(), int(signature, 16).to_bytes(64, byteorder='big'))
+    message, signature = published[MQTTTopic.FORBIDDEN_ZONES_COMPACT_ED25519].split('#')
+    eddsa.new(orvd_public, 'rfc8032').verify(message.encode(), int(signature, 16).to_bytes(64, byteorder='big'))
+    # Рассылка для БПЛА RSA по-прежнему подписана ключом ОРВД RSA
+    message, signature = published[MQTTTopic.FORBIDDEN_ZONES].split('#')
+    assert verify(message, int(signature, 16), KeyGroup.ORVD) is True
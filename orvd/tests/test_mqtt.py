@@ -4,6 +4,7 @@ import paho.mqtt.client as mqtt
 import time
 import json
 from unittest.mock import patch
+from clients import MQTTClientWrapper
 
 MQTT_BROKER = os.environ.get("MQTT_HOST", "localhost")
 MQTT_PORT = 1883
@@ -125,3 +126,36 @@ class TestMQTTPublish:
         client = mqtt.Client()
         with pytest.raises(ConnectionRefusedError):
             client.connect("invalid_host", 1883)
+
+
+@pytest.mark.skip(reason="local mosquitto test")
+class TestMQTTSharedSubscription:
+    def test_shared_subscription_splits_telemetry(self):
+        """Тест распределения телеметрии между двумя процессами ОРВД с общей подпиской."""
+        received = [[], []]
+        wrappers = []
+        for index in range(2):
+            wrapper = MQTTClientWrapper()
+            wrapper.topic('api/telemetry/{id}')(
+                lambda client, userdata, msg, index=index, **kwargs: received[index].append(kwargs['id']))
+            with patch.dict(os.environ, {"MQTT_SHARED_GROUP": "orvd_test", "MQTT_HANDLER_WORKERS": "0",
+                                         "MQTT_CLIENT_ID": f"orvd_shared_test_{index}"}):
+                assert wrapper.init_client()
+            wrappers.append(wrapper)
+        time.sleep(1)
+
+        publisher = mqtt.Client()
+        publisher.connect(MQTT_BROKER, MQTT_PORT, 60)
+        publisher.loop_start()
+        for uav_id in range(100):
+            publisher.publish(f'api/telemetry/{uav_id}', 'lat=0&lon=0', qos=1)
+        start_time = time.time()
+        while len(received[0]) + len(received[1]) < 100 and time.time() - start_time < TIMEOUT:
+            time.sleep(0.1)
+        publisher.loop_stop()
+        publisher.disconnect()
+        for wrapper in wrappers:
+            wrapper.disconnect()
+
+        assert len(received[0]) + len(received[1]) == 100
+        assert received[0] and received[1]
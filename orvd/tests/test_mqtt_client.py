@@ -0,0 +1,303 @@
+import sys
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from clients import MQTTClientWrapper
+from clients.mqtt_client import wsgi_partition_index
+from clients.topic_router import TopicRouter
+from clients.mqtt_dispatcher import KeyedDispatcher
+from clients.mqtt_outbox import MQTTOutbox
+from clients.mqtt_metrics import MQTTMetrics
+from constants import MQTTTopic
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+def test_router_extracts_path_params():
+    router = TopicRouter()
+    router.add(MQTTTopic.TELEMETRY, 'api/telemetry/+', _noop)
+    matches = router.match('api/telemetry/42')
+    assert len(matches) == 1
+    route, kwargs = matches[0]
+    assert route.user_pattern == MQTTTopic.TELEMETRY
+    assert kwargs == {'id': '42'}
+
+def test_router_no_match():
+    router = TopicRouter()
+    router.add(MQTTTopic.TELEMETRY, 'api/telemetry/+', _noop)
+    assert router.match('api/telemetry') == []
+    assert router.match('api/telemetry/1/2') == []
+    assert router.match('api/logs/1') == []
+
+def test_router_plus_and_hash():
+    router = TopicRouter()
+    router.add('a/+/c', 'a/+/c', _noop)
+    router.add('a/#', 'a/#', _noop)
+    matches = router.match('a/b/c')
+    assert [route.user_pattern for route, _ in matches] == ['a/+/c', 'a/#']
+    assert matches[0][1] == {'wildcards': ['b']}
+    assert matches[1][1] == {'hash_path': 'b/c'}
+    assert [route.user_pattern for route, _ in router.match('a')] == ['a/#']
+
+def test_router_wildcards_do_not_match_sys_topics():
+    router = TopicRouter()
+    router.add('#', '#', _noop)
+    router.add('+/x', '+/x', _noop)
+    assert router.match('$SYS/x') == []
+
+def test_router_preserves_registration_order():
+    router = TopicRouter()
+    router.add('api/{kind}/{id}', 'api/+/+', _noop)
+    router.add(MQTTTopic.TELEMETRY, 'api/telemetry/+', _noop)
+    matches = router.match('api/telemetry/7')
+    assert [route.order for route, _ in matches] == [0, 1]
+    assert matches[0][1] == {'kind': 'telemetry', 'id': '7'}
+
+def test_wrapper_dispatches_and_falls_through_on_error():
+    wrapper = MQTTClientWrapper()
+    calls = []
+
+    @wrapper.topic('api/{kind}/{id}')
+    def failing(client, userdata, msg, **kwargs):
+        raise Exception('fail')
+
+    @wrapper.topic(MQTTTopic.TELEMETRY)
+    def telemetry(client, userdata, msg, **kwargs):
+        calls.append(kwargs)
+
+    wrapper._on_message(None, None, SimpleNamespace(topic='api/telemetry/5', payload=b''))
+    assert calls == [{'id': '5'}]
+
+
+def test_dispatcher_keeps_per_key_order_and_runs_keys_in_parallel():
+    dispatcher = KeyedDispatcher(max_workers=4, max_pending=100)
+    release = threading.Event()
+    results = {'1': [], '2': []}
+
+    def blocking(key, value):
+        release.wait(timeout=5)
+        results[key].append(value)
+
+    def record(key, value):
+        results[key].append(value)
+
+    dispatcher.submit('1', blocking, '1', 0)
+    for i in range(1, 10):
+        dispatcher.submit('1', record, '1', i)
+    for i in range(10):
+        dispatcher.submit('2', record, '2', i)
+
+    deadline = time.time() + 5
+    while len(results['2']) < 10 and time.time() < deadline:
+        time.sleep(0.01)
+    # БПЛА 2 обработан, пока обработчик БПЛА 1 заблокирован
+    assert results['2'] == list(range(10))
+    assert results['1'] == []
+    assert dispatcher.stats()['queue_depth'] == 9
+
+    release.set()
+    dispatcher.shutdown()
+    assert results['1'] == list(range(10))
+    stats = dispatcher.stats()
+    assert stats['processed'] == 20
+    assert stats['queue_depth'] == 0
+
+def test_dispatcher_caps_each_key_without_blocking():
+    dispatcher = KeyedDispatcher(max_workers=2, max_pending=2)
+    started, release = threading.Event(), threading.Event()
+    handled = []
+    dispatcher.submit('1', lambda: started.set() or release.wait(5))
+    assert started.wait(5)
+
+    # Очередь БПЛА 1 переполнена: устаревшая телеметрия вытесняется новой
+    for i in range(5):
+        assert dispatcher.submit('1', handled.append, ('telemetry', i), replaceable=True)
+    # Запросы не отбрасываются, пока в очереди есть телеметрия
+    assert dispatcher.submit('1', handled.append, ('arm', 1))
+    assert dispatcher.submit('1', handled.append, ('arm', 2))
+    assert dispatcher.submit('1', handled.append, ('arm', 3)) is False
+
+    # Переполненная очередь БПЛА 1 не задерживает и не вытесняет сообщения БПЛА 2
+    submitted = time.monotonic()
+    assert dispatcher.submit('2', handled.append, ('arm', 'uav2'))
+    assert time.monotonic() - submitted < 0.1
+    deadline = time.time() + 5
+    while not handled and time.time() < deadline:
+        time.sleep(0.01)
+    assert handled == [('arm', 'uav2')]
+
+    release.set()
+    dispatcher.shutdown()
+    assert handled == [('arm', 'uav2'), ('arm', 1), ('arm', 2)]
+    stats = dispatcher.stats()
+    assert stats['replaced'] == 5 and stats['dropped'] == 1
+
+def test_outbox_coalesces_pending_state_messages():
+    published = []
+    release = threading.Event()
+
+    def publish(topic, payload, qos, retain):
+        release.wait(timeout=5)
+        published.append((topic, payload))
+        return True
+
+    outbox = MQTTOutbox(publish)
+    outbox.put('ping/0', 'first', 0)
+    outbox.start()
+    time.sleep(0.05)
+    built = []
+    for i in range(5):
+        outbox.put('api/flight_status/1', lambda i=i: built.append(i) or f'$Flight {i}', 0, coalesce=True)
+    outbox.put('api/auth/1', '$Auth 1', 0)
+    assert outbox.stats()['coalesced'] == 4
+
+    release.set()
+    outbox.stop()
+    assert published == [('ping/0', 'first'), ('api/flight_status/1', '$Flight 4'), ('api/auth/1', '$Auth 1')]
+    # Промежуточные состояния не строились и не подписывались
+    assert built == [4]
+    assert outbox.stats()['published'] == 3
+
+def test_outbox_skips_empty_payload():
+    published = []
+    outbox = MQTTOutbox(lambda *args: published.append(args) or True)
+    outbox.start()
+    outbox.put('ping/1', lambda: None, 0, coalesce=True)
+    outbox.stop()
+    assert published == []
+    assert outbox.stats()['dropped'] == 1
+
+def test_outbox_debounces_delayed_messages():
+    published = []
+    outbox = MQTTOutbox(lambda topic, payload, qos, retain: published.append((topic, payload, retain)) or True)
+    outbox.start()
+    for i in range(5):
+        outbox.put('api/forbidden_zones', f'zones {i}', 0, retain=True, delay=0.1, max_delay=1)
+        time.sleep(0.02)
+    assert published == []
+    assert outbox.stats()['delayed'] == 1
+    time.sleep(0.3)
+    assert published == [('api/forbidden_zones', 'zones 4', True)]
+
+    # Непрерывные изменения откладывают отправку не дольше max_delay
+    started = time.monotonic()
+    while len(published) < 2 and time.monotonic() - started < 2:
+        outbox.put('api/forbidden_zones', 'zones 5', 0, retain=True, delay=0.1, max_delay=0.3)
+        time.sleep(0.02)
+    assert published[1:] == [('api/forbidden_zones', 'zones 5', True)]
+    assert time.monotonic() - started < 0.6
+    outbox.stop()
+
+def test_outbox_stop_flushes_delayed_messages():
+    published = []
+    outbox = MQTTOutbox(lambda *args: published.append(args) or True)
+    outbox.start()
+    outbox.put('api/forbidden_zones', 'zones', 0, delay=60)
+    outbox.stop()
+    assert published == [('api/forbidden_zones', 'zones', 0, False)]
+
+def test_wrapper_runs_connect_callbacks():
+    wrapper = MQTTClientWrapper()
+    calls = []
+    wrapper.on_connect(lambda: calls.append('first'))
+
+    @wrapper.on_connect
+    def failing():
+        raise Exception('fail')
+    wrapper.on_connect(lambda: calls.append('second'))
+
+    client = SimpleNamespace(subscribe=_noop)
+    wrapper._on_connect(client, None, None, 5)
+    assert calls == []
+    wrapper._on_connect(client, None, None, 0)
+    wrapper._on_connect(client, None, None, 0)
+    assert calls == ['first', 'second', 'first', 'second']
+
+def test_shared_subscription_topics():
+    wrapper = MQTTClientWrapper()
+    wrapper.topic(MQTTTopic.TELEMETRY)(_noop)
+    wrapper.topic(MQTTTopic.ARM_REQUEST, partitioned=True)(_noop)
+    assert wrapper._subscription_topics() == ['api/telemetry/+', 'api/arm/request/+']
+    wrapper.shared_group = 'orvd'
+    assert wrapper._subscription_topics() == ['$share/orvd/api/telemetry/+', 'api/arm/request/+']
+
+def test_partitioned_topic_handled_by_single_owner():
+    handled = []
+    wrappers = []
+    for index in range(3):
+        wrapper = MQTTClientWrapper()
+        wrapper.partition_count = 3
+        wrapper.partition_index = index
+        wrapper.topic(MQTTTopic.ARM_REQUEST, partitioned=True)(
+            lambda client, userdata, msg, index=index, **kwargs: handled.append((kwargs['id'], index)))
+        wrappers.append(wrapper)
+
+    for uav_id in range(30):
+        for wrapper in wrappers:
+            wrapper._on_message(None, None, SimpleNamespace(topic=f'api/arm/request/{uav_id}', payload=b''))
+
+    owners = dict(handled)
+    assert len(handled) == 30
+    assert len(set(owners.values())) == 3
+    # Владелец раздела не зависит от процесса и запуска
+    assert all(wrappers[owner].owns_partition(uav_id) for uav_id, owner in owners.items())
+
+def test_partition_config_rejected_unless_consistent():
+    wrapper = MQTTClientWrapper()
+    with pytest.raises(ValueError):
+        wrapper.configure_partitions('orvd', 1, 0)
+    with pytest.raises(ValueError):
+        wrapper.configure_partitions('orvd', 3, 3)
+    with pytest.raises(ValueError):
+        wrapper.configure_partitions(None, 0, 0)
+    wrapper.configure_partitions('orvd', 3, 2)
+    assert (wrapper.shared_group, wrapper.partition_count, wrapper.partition_index) == ('orvd', 3, 2)
+
+def test_partition_index_taken_from_wsgi_process_group(monkeypatch):
+    assert wsgi_partition_index() is None
+    monkeypatch.setitem(sys.modules, 'mod_wsgi', SimpleNamespace(process_group='orvd2', maximum_processes=1))
+    assert wsgi_partition_index() == 2
+    # Процессы одной группы получили бы одинаковый номер раздела
+    monkeypatch.setitem(sys.modules, 'mod_wsgi', SimpleNamespace(process_group='orvd2', maximum_processes=4))
+    with pytest.raises(ValueError):
+        wsgi_partition_index()
+    monkeypatch.setitem(sys.modules, 'mod_wsgi', SimpleNamespace(process_group='app', maximum_processes=1))
+    assert wsgi_partition_index() is None
+
+def test_wrapper_records_per_topic_metrics():
+    wrapper = MQTTClientWrapper()
+
+    @wrapper.topic(MQTTTopic.TELEMETRY)
+    def telemetry(client, userdata, msg, **kwargs):
+        if msg.payload == b'bad':
+            raise ValueError('bad payload')
+
+    wrapper._on_message(None, None, SimpleNamespace(topic='api/telemetry/1', payload=b'lat=1&lon=2'))
+    wrapper._on_message(None, None, SimpleNamespace(topic='api/telemetry/2', payload=b'bad'))
+    wrapper._on_message(None, None, SimpleNamespace(topic='api/unknown/1', payload=b''))
+
+    topics, unmatched = wrapper.metrics.snapshot()
+    stats = topics[MQTTTopic.TELEMETRY]
+    assert stats['messages'] == 2
+    assert stats['bytes'] == 14
+    assert stats['errors'] == 1
+    assert sum(stats['buckets']) == 2
+    assert unmatched == 1
+
+def test_metrics_prometheus_format():
+    metrics = MQTTMetrics()
+    metrics.observe(MQTTTopic.TELEMETRY, 10, 0.003)
+    metrics.observe(MQTTTopic.TELEMETRY, 20, 0.2, error=True)
+    text = metrics.to_prometheus()
+    label = f'topic="{MQTTTopic.TELEMETRY}"'
+    assert f'orvd_mqtt_messages_total{{{label}}} 2' in text
+    assert f'orvd_mqtt_received_bytes_total{{{label}}} 30' in text
+    assert f'orvd_mqtt_handler_errors_total{{{label}}} 1' in text
+    assert f'orvd_mqtt_handler_duration_seconds_bucket{{{label},le="0.0025"}} 0' in text
+    assert f'orvd_mqtt_handler_duration_seconds_bucket{{{label},le="0.005"}} 1' in text
+    assert f'orvd_mqtt_handler_duration_seconds_bucket{{{label},le="0.25"}} 2' in text
+    assert f'orvd_mqtt_handler_duration_seconds_bucket{{{label},le="+Inf"}} 2' in text
+    assert 'orvd_mqtt_unmatched_messages_total 0' in text
@@ -0,0 +1,147 @@
+import datetime
+import time
+import pytest
+from extensions import db
+from db.dao import SCHEMA_UPGRADES, create_all, get_entity_by_key, upgrade_schema
+from db.models import Uav, UavTelemetry
+from db.telemetry_writer import TelemetryWriter
+from db.telemetry_cache import LatestTelemetryCache
+from utils.telemetry_filter import TelemetryDecimator
+import handlers.api_handlers as api_handlers
+
+
+@pytest.fixture
+def app(app):
+    """Приложение с зарегистрированным БПЛА '1'."""
+    with app.app_context():
+        db.session.add(Uav(id='1', is_armed=False, state='В сети', kill_switch_state=False))
+        db.session.commit()
+    yield app
+
+
+def _sample(writer, uav_id, seconds):
+    record_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(seconds=seconds)
+    writer.add(uav_id=uav_id, record_time=record_time, lat=1.0, lon=2.0, alt=3.0,
+               azimuth=0.0, dop=1.0, sats=10, speed=float(seconds))
+
+
+def test_writer_flushes_full_batch_in_one_commit(app):
+    writer = TelemetryWriter(batch_size=10, max_latency_ms=60000)
+    writer.init_app(app)
+    for i in range(10):
+        _sample(writer, '1', i)
+    writer.shutdown()
+    with app.app_context():
+        assert UavTelemetry.query.count() == 10
+    stats = writer.stats()
+    assert stats['batches'] == 1
+    assert stats['max_batch_size'] == 10
+    assert stats['pending'] == 0
+
+def test_writer_flushes_after_max_latency(app):
+    writer = TelemetryWriter(batch_size=1000, max_latency_ms=20)
+    writer.init_app(app)
+    _sample(writer, '1', 0)
+    deadline = time.time() + 5
+    while writer.stats()['rows'] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert writer.stats()['rows'] == 1
+    writer.shutdown()
+
+def test_writer_flushes_on_shutdown_and_dedups_keys(app):
+    writer = TelemetryWriter(batch_size=1000, max_latency_ms=60000)
+    writer.init_app(app)
+    _sample(writer, '1', 0)
+    _sample(writer, '1', 0)
+    _sample(writer, '1', 1)
+    writer.shutdown()
+    with app.app_context():
+        assert UavTelemetry.query.count() == 2
+
+def test_writer_drops_oldest_rows_when_buffer_is_full(app):
+    writer = TelemetryWriter(batch_size=1000, max_latency_ms=60000, max_buffer=3)
+    writer.init_app(app)
+    for i in range(5):
+        _sample(writer, '1', i)
+    stats = writer.stats()
+    assert stats['pending'] == 3
+    assert stats['dropped'] == 2
+    writer.shutdown()
+    with app.app_context():
+        assert [row.speed for row in UavTelemetry.query.order_by(UavTelemetry.record_time)] == [2.0, 3.0, 4.0]
+
+def test_cache_falls_back_to_db_on_cold_start(app):
+    writer = TelemetryWriter()
+    with app.app_context():
+        _sample(writer, '1', 0)
+        _sample(writer, '1', 5)
+        cache = LatestTelemetryCache()
+        sample = cache.get('1')
+        assert sample.speed == 5.0
+        assert cache.get('2') is None
+        assert cache.stats()['misses'] == 2
+
+        cache.get('1')
+        cache.get('2')
+        assert cache.stats()['hits'] == 2
+
+def test_cache_update_replaces_sample_without_db(app):
+    cache = LatestTelemetryCache()
+    record_time = datetime.datetime.now(datetime.timezone.utc)
+    cache.update(uav_id='7', record_time=record_time, lat=1.0, lon=2.0, alt=3.0,
+                 azimuth=0.0, dop=1.0, sats=10, speed=4.0)
+    # Контекст приложения не нужен: значение берется из кэша
+    assert cache.get('7').to_dict() == {'lat': 1.0, 'lon': 2.0, 'alt': 3.0, 'azimuth': 0.0,
+                                        'dop': 1.0, 'sats': 10, 'speed': 4.0}
+
+def _at(seconds):
+    return datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(seconds=seconds)
+
+def test_decimator_skips_idle_samples_until_max_interval():
+    decimator = TelemetryDecimator(min_distance_m=5.0, min_alt_delta_m=1.0, min_speed_delta=0.5, max_interval_s=30.0)
+    stored = [decimator.should_store('1', _at(i), 60.0, 30.0, 10.0, 0.0) for i in range(61)]
+    assert stored.count(True) == 3
+    assert stored[0] and stored[30] and stored[60]
+    assert decimator.stats()['skipped'] == 58
+
+def test_decimator_stores_significant_changes():
+    decimator = TelemetryDecimator(min_distance_m=5.0, min_alt_delta_m=1.0, min_speed_delta=0.5, max_interval_s=30.0)
+    assert decimator.should_store('1', _at(0), 60.0, 30.0, 10.0, 0.0)
+    # ~1 м по широте
+    assert not decimator.should_store('1', _at(1), 60.00001, 30.0, 10.0, 0.0)
+    # ~11 м по широте от последнего сохраненного образца
+    assert decimator.should_store('1', _at(2), 60.0001, 30.0, 10.0, 0.0)
+    assert decimator.should_store('1', _at(3), 60.0001, 30.0, 11.5, 0.0)
+    assert decimator.should_store('1', _at(4), 60.0001, 30.0, 11.5, 1.0)
+    # Фильтр ведется отдельно для каждого БПЛА
+    assert decimator.should_store('2', _at(4), 60.0001, 30.0, 11.5, 1.0)
+    # Время образца ушло назад
+    assert decimator.should_store('1', _at(0), 60.0001, 30.0, 11.5, 1.0)
+
+def test_decimator_disabled_with_zero_interval():
+    decimator = TelemetryDecimator(max_interval_s=0)
+    assert all(decimator.should_store('1', _at(0), 60.0, 30.0, 10.0, 0.0) for _ in range(5))
+
+def test_drone_time_is_stored_apart_from_record_time(app, monkeypatch):
+    monkeypatch.setattr(api_handlers, 'telemetry_writer', TelemetryWriter())
+    monkeypatch.setattr(api_handlers, 'telemetry_decimator', TelemetryDecimator(max_interval_s=0))
+    drone_time = datetime.datetime(2001, 1, 1, tzinfo=datetime.timezone.utc)
+    with app.app_context():
+        # БПЛА с неверными часами присылает одно и то же время: образцы не должны затирать друг друга
+        for lat in (600000000, 600010000):
+            api_handlers.telemetry_handler('1', lat, 300000000, 1000, 0, 1.0, 10, 0.0, drone_time=drone_time)
+            time.sleep(0.001)
+        rows = UavTelemetry.query.order_by(UavTelemetry.record_time).all()
+        assert [row.lat for row in rows] == [60.0, 60.001]
+        assert all(row.drone_time.replace(tzinfo=datetime.timezone.utc) == drone_time for row in rows)
+        assert rows[0].record_time.year > 2001
+
+def test_create_all_upgrades_database_of_previous_version(app):
+    with app.app_context():
+        # БД прежней версии сервера: таблицы есть, новых столбцов нет
+        for table, column, _ in SCHEMA_UPGRADES:
+            db.session.execute(db.text(f'ALTER TABLE {table} DROP COLUMN {column}'))
+        db.session.commit()
+        create_all()
+        assert get_entity_by_key(Uav, '1').wire_format == 'text'
+        assert upgrade_schema() == []
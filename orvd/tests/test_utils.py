@@ -1,11 +1,14 @@
 import math
+import random
+import numpy as np
 from hashlib import sha256
 import pytest 
 from utils import (
     generate_keys, get_sha256_hex, parse_mission, read_mission, home_handler,
     takeoff_handler, waypoint_handler, servo_handler, land_handler,
     encode_mission, sign, verify, haversine, cast_wrapper, is_point_in_polygon,
-    get_new_polygon_feature
+    get_new_polygon_feature, encode_telemetry_binary, decode_telemetry,
+    haversine_pointwise, haversine_pairwise, points_in_polygon, segments_intersect_polygon
 )
 from db import get_key
 from constants import ORVD_KEY_SIZE
@@ -20,6 +23,36 @@ TEST_KEY_GROUP = 'orvd'
 generate_keys(ORVD_KEY_SIZE, TEST_KEY_GROUP)
 
 
+# Прежние скалярные реализации, с которыми сравниваются векторные функции utils.geometry
+def _reference_haversine(lat1, lon1, lat2, lon2):
+    R = 6366037
+    phi_1 = math.radians(lat1)
+    phi_2 = math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+    a = math.sin(delta_phi / 2.0) ** 2 + math.cos(phi_1) * math.cos(phi_2) * math.sin(delta_lambda / 2.0) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return round(R * c, 3)
+
+
+def _reference_is_point_in_polygon(point, polygon):
+    x, y = point
+    n = len(polygon)
+    inside = False
+    p1x, p1y = polygon[0]
+    for i in range(n + 1):
+        p2x, p2y = polygon[i % n]
+        if y > min(p1y, p2y):
+            if y <= max(p1y, p2y):
+                if x <= max(p1x, p2x):
+                    if p1y != p2y:
+                        xints = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                    if p1x == p2x or x <= xints:
+                        inside = not inside
+        p1x, p1y = p2x, p2y
+    return inside
+
+
 def test_get_sha256_hex_empty_string():
     message = ""
     expected_hash = sha256(message.encode()).hexdigest()
@@ -154,6 +187,31 @@ def test_haversine_poles():
     expected_distance = 20015086.796
     assert math.isclose(haversine(north_pole_lat, north_pole_lon, south_pole_lat, south_pole_lon), expected_distance, rel_tol=1e-3)
 
+def test_haversine_batch_matches_scalar():
+    rng = random.Random(0)
+    lats1, lons1 = [rng.uniform(-90, 90) for _ in range(5)], [rng.uniform(-180, 180) for _ in range(5)]
+    lats2, lons2 = [rng.uniform(-90, 90) for _ in range(3)], [rng.uniform(-180, 180) for _ in range(3)]
+    pairwise = haversine_pairwise(lats1, lons1, lats2, lons2)
+    assert pairwise.shape == (5, 3)
+    for i in range(5):
+        for j in range(3):
+            expected = _reference_haversine(lats1[i], lons1[i], lats2[j], lons2[j])
+            assert math.isclose(pairwise[i, j], expected, abs_tol=1e-3)
+            assert haversine(lats1[i], lons1[i], lats2[j], lons2[j]) == expected
+    pointwise = haversine_pointwise(lats1[:3], lons1[:3], lats2, lons2)
+    assert np.allclose(pointwise, pairwise.diagonal(), atol=1e-6)
+    # Broadcasting: расстояния от всех точек до одной
+    assert np.allclose(haversine_pointwise(lats1, lons1, lats2[0], lons2[0]), pairwise[:, 0], atol=1e-6)
+
+def test_haversine_matches_reference_on_edge_cases():
+    # Совпадающие точки, полюса, антиподы и переход через 180-й меридиан
+    pairs = [(50, 50, 50, 50), (90, 0, -90, 0), (0, 0, 0, 180), (10, 179.9, 10, -179.9), (-45, -90, 45, 90)]
+    lats1, lons1, lats2, lons2 = (list(column) for column in zip(*pairs))
+    pointwise = haversine_pointwise(lats1, lons1, lats2, lons2)
+    for distance, pair in zip(pointwise, pairs):
+        assert math.isclose(distance, _reference_haversine(*pair), abs_tol=1e-3)
+        assert haversine(*pair) == _reference_haversine(*pair)
+
 
 def test_cast_wrapper_int_success():
     assert cast_wrapper("123", int) == 123
@@ -225,4 +283,77 @@ def test_point_on_horizontal_edge():
 def test_point_on_vertical_edge():
     polygon = [(0, 0), (4, 0), (4, 4), (0, 4)]
     point = (4, 2)
-    assert is_point_in_polygon(point, polygon) is True
\ No newline at end of file
+    assert is_point_in_polygon(point, polygon) is True
+
+def test_decode_telemetry_query_string():
+    payload = b'lat=-353632621&lon=1491652374&alt=58409&azimuth=0&dop=1.2&sats=12&speed=0'
+    telemetry = decode_telemetry(payload)
+    assert telemetry['lat'] == '-353632621'
+    assert telemetry['sats'] == '12'
+
+def test_decode_telemetry_binary_roundtrip():
+    payload = encode_telemetry_binary(lat=-353632621, lon=1491652374, alt=58409, azimuth=0,
+                                      dop=1.2, sats=12, speed=3.45)
+    assert len(payload) == 24
+    telemetry = decode_telemetry(payload)
+    assert telemetry == {'lat': -353632621, 'lon': 1491652374, 'alt': 58409, 'azimuth': 0,
+                         'dop': 1.2, 'sats': 12, 'speed': 3.45}
+
+def test_decode_telemetry_binary_with_timestamp():
+    payload = encode_telemetry_binary(lat=1, lon=2, alt=3, azimuth=4, dop=1.0, sats=5, speed=0.0,
+                                      timestamp_ms=1700000000123)
+    telemetry = decode_telemetry(payload)
+    assert telemetry['drone_time'].timestamp() == 1700000000.123
+
+def test_decode_telemetry_binary_timestamp_out_of_range():
+    payload = encode_telemetry_binary(lat=1, lon=2, alt=3, azimuth=4, dop=1.0, sats=5, speed=0.0,
+                                      timestamp_ms=2 ** 64 - 1)
+    with pytest.raises(ValueError, match='out of range'):
+        decode_telemetry(payload)
+
+def test_decode_telemetry_binary_wrong_version():
+    payload = bytearray(encode_telemetry_binary(lat=1, lon=2, alt=3, azimuth=4, dop=1.0, sats=5, speed=0.0))
+    payload[1] = 99
+    with pytest.raises(ValueError):
+        decode_telemetry(bytes(payload))
+
+def test_points_in_polygon_matches_reference():
+    rng = random.Random(0)
+    polygon = [(0, 0), (4, 0), (4, 4), (2, 6), (0, 4), (1, 2), (0, 0)]
+    # Случайные точки, вершины, точки на ребрах (в том числе горизонтальных и вертикальных)
+    # и на продолжениях ребер
+    points = [(rng.uniform(-1, 5), rng.uniform(-1, 7)) for _ in range(200)] + polygon + \
+        [(2, 0), (4, 2), (0, 4), (3, 5), (0.5, 1), (-1, 0), (5, 0), (4, 7), (-1, 4), (-1, 6), (5, 6), (1, 4)]
+    expected = [_reference_is_point_in_polygon(point, polygon) for point in points]
+    assert any(expected) and not all(expected)
+    assert points_in_polygon(points, polygon).tolist() == expected
+    # Короткий путь без NumPy для малого числа точек
+    assert points_in_polygon(points[-20:], polygon).tolist() == expected[-20:]
+    assert points_in_polygon(np.array(points), np.array(polygon)).tolist() == expected
+    assert [is_point_in_polygon(point, polygon) for point in points] == expected
+
+def test_points_in_polygon_matches_reference_on_random_polygons():
+    rng = random.Random(2)
+    for _ in range(20):
+        # Звездчатый многоугольник с вершинами на целочисленной сетке: точки сетки попадают на вершины и ребра
+        angles = sorted(rng.uniform(0, 2 * math.pi) for _ in range(rng.randint(3, 12)))
+        polygon = [(round(5 + rng.uniform(1, 5) * math.cos(angle)), round(5 + rng.uniform(1, 5) * math.sin(angle)))
+                   for angle in angles]
+        polygon.append(polygon[0])
+        points = [(x / 2, y / 2) for x in range(-1, 22) for y in range(-1, 22)]
+        expected = [_reference_is_point_in_polygon(point, polygon) for point in points]
+        assert points_in_polygon(points, polygon).tolist() == expected
+        assert [is_point_in_polygon(point, polygon) for point in points[::7]] == expected[::7]
+
+def test_segments_intersect_polygon_batch_matches_small_path():
+    rng = random.Random(1)
+    polygon = [(0, 0), (4, 0), (4, 4), (2, 6), (0, 4), (0, 0)]
+    segments = [((rng.uniform(-3, 7), rng.uniform(-3, 9)), (rng.uniform(-3, 7), rng.uniform(-3, 9))) for _ in range(300)]
+    # Пересечение без концов внутри, касание вершины и ребра, отрезок в стороне
+    segments += [((-1, 2), (5, 2)), ((4, 4), (6, 4)), ((-2, 0), (-1, 0)), ((-1, -1), (-1, 5)), ((5, 0), (5, 4))]
+    starts, ends = [start for start, _ in segments], [end for _, end in segments]
+    expected = segments_intersect_polygon(starts[-5:], ends[-5:], polygon).tolist()
+    assert expected == [True, True, False, False, False]
+    small = [segments_intersect_polygon([start], [end], polygon)[0] for start, end in segments]
+    assert segments_intersect_polygon(starts, ends, polygon).tolist() == small
+    assert any(small) and not all(small)
@@ -0,0 +1,126 @@
+import io
+import json
+import math
+import random
+import pytest
+import routes.api_routes as api_routes
+from constants import AdminRoute
+from db.models import User
+from extensions import db
+from routes import bp
+from utils import (
+    ForbiddenZonesStore, get_new_polygon_feature, iter_geojson_features, parse_forbidden_zones_upload, ZonesImportError,
+    ring_self_intersects, simplify_ring_conservative, points_in_polygon
+)
+
+
+def _circle(lat, lon, radius, vertices, noise=0.0, seed=0):
+    rng = random.Random(seed)
+    ring = []
+    for i in range(vertices):
+        angle = 2 * math.pi * i / vertices
+        r = radius * (1 + noise * rng.random())
+        ring.append([round(lon + 2 * r * math.cos(angle), 7), round(lat + r * math.sin(angle), 7)])
+    return ring + [ring[0]]
+
+
+def _geojson(features, **members):
+    return json.dumps({"type": "FeatureCollection", **members, "features": features}).encode('utf-8')
+
+
+def test_streaming_parser_matches_json_load():
+    features = [get_new_polygon_feature(f'зона {i}', _circle(60 + i * 0.1, 30, 0.01, 50)) for i in range(20)]
+    data = json.dumps({"type": "FeatureCollection", "crs": {"features": [1, 2]}, "features": features, "version": 12345})
+    for chunk_size in (7, 1024):
+        assert list(iter_geojson_features(io.BytesIO(data.encode('utf-8')), chunk_size)) == features
+    assert list(iter_geojson_features(io.StringIO(data), 13)) == features
+
+def test_streaming_parser_rejects_non_collections():
+    with pytest.raises(ValueError):
+        list(iter_geojson_features(io.BytesIO(b'{"type": "Feature", "features": []}')))
+    with pytest.raises(ValueError):
+        list(iter_geojson_features(io.BytesIO(b'{"type": "FeatureCollection", "features": [{"a": 1}')))
+
+def test_ring_self_intersection():
+    assert not ring_self_intersects([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
+    assert ring_self_intersects([[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]])
+    # Шип: ребро возвращается назад по предыдущему
+    assert ring_self_intersects([[0, 0], [2, 0], [1, 0], [1, 1], [0, 0]])
+    circle = _circle(60, 30, 0.01, 200)
+    assert not ring_self_intersects(circle)
+    circle[100] = [30.03, 60.0]
+    assert ring_self_intersects(circle)
+
+def test_import_validates_all_zones():
+    bowtie = get_new_polygon_feature('bowtie', [[30, 60], [30.1, 60.1], [30.1, 60], [30, 60.1], [30, 60]])
+    open_ring = get_new_polygon_feature('open', [[30, 60], [30.1, 60], [30.1, 60.1]])
+    good = get_new_polygon_feature('good', _circle(60, 30, 0.01, 10))
+    with pytest.raises(ZonesImportError) as e:
+        parse_forbidden_zones_upload(io.BytesIO(_geojson([good, bowtie, open_ring, good])))
+    assert len(e.value.errors) == 3
+    assert 'intersects itself' in e.value.errors[0]
+    assert 'not closed' in e.value.errors[1]
+    assert 'duplicate' in e.value.errors[2]
+
+def test_import_normalizes_zones():
+    ring = [[30.123456789, 60, 100], [30.2, 60], [30.2, 60], [30.2, 60.1], [30.123456789, 60, 100]]
+    feature = get_new_polygon_feature('zone', ring)
+    feature['properties']['source'] = 'aip'
+    feature['geometry']['coordinates'].append([[30.15, 60.01], [30.16, 60.01], [30.16, 60.02], [30.15, 60.01]])
+    zones, report = parse_forbidden_zones_upload(io.BytesIO(_geojson([feature])))
+    assert zones['features'][0]['properties'] == {'name': 'zone', 'source': 'aip'}
+    assert zones['features'][0]['geometry']['coordinates'] == [[[30.1234568, 60], [30.2, 60], [30.2, 60.1], [30.1234568, 60]]]
+    assert report == {'zones': 1, 'vertices_before': 4, 'vertices_after': 4, 'vertex_reduction': 0.0}
+
+def test_simplification_never_shrinks_zone():
+    ring = _circle(60, 30, 0.01, 1000, noise=0.01)
+    zones, report = parse_forbidden_zones_upload(io.BytesIO(_geojson([get_new_polygon_feature('dense', ring)])), tolerance_m=20)
+    simplified = zones['features'][0]['geometry']['coordinates'][0]
+    assert report['vertices_before'] == 1001
+    assert report['vertices_after'] == len(simplified) < 300
+    assert simplified[0] == simplified[-1] and not ring_self_intersects(simplified)
+    # Все исходные вершины (чуть сдвинутые к центру, чтобы не зависеть от точек на границе) внутри упрощенной зоны
+    shrunk = [[30 + (lon - 30) * (1 - 1e-6), 60 + (lat - 60) * (1 - 1e-6)] for lon, lat in ring]
+    assert points_in_polygon(shrunk, simplified).all()
+    assert simplify_ring_conservative(ring, 0) is ring
+
+@pytest.fixture
+def client(app, tmp_path, monkeypatch):
+    """Тестовый клиент с маршрутами ОРВД, отдельным хранилищем зон и без публикации в MQTT."""
+    path = tmp_path / 'forbidden_zones.json'
+    path.write_text(_geojson([]).decode('utf-8'), encoding='utf-8')
+    store = ForbiddenZonesStore(str(path), str(tmp_path / 'forbidden_zones_delta.json'))
+    published = []
+    monkeypatch.setattr(api_routes, 'forbidden_zones_store', store)
+    monkeypatch.setattr(api_routes, 'mqtt_publish_forbidden_zones', lambda: published.append(store.snapshot().version))
+    app.register_blueprint(bp)
+    with app.app_context():
+        db.session.add(User(username='admin', access_token='token'))
+        db.session.commit()
+    client = app.test_client()
+    client.store, client.published = store, published
+    return client
+
+def test_import_route_replaces_zones(client):
+    data = _geojson([get_new_polygon_feature('zone', _circle(60, 30, 0.01, 10))])
+    response = client.post(AdminRoute.IMPORT_FORBIDDEN_ZONES, content_type='multipart/form-data',
+                           data={'token': 'token', 'file': (io.BytesIO(data), 'zones.json')})
+    assert response.status_code == 200
+    assert response.json['status'] == 'success' and response.json['zones'] == 1
+    assert client.store.snapshot().names == ['zone']
+    assert client.published == [client.store.snapshot().version]
+
+    bowtie = get_new_polygon_feature('bowtie', [[30, 60], [30.1, 60.1], [30.1, 60], [30, 60.1], [30, 60]])
+    response = client.post(AdminRoute.IMPORT_FORBIDDEN_ZONES, content_type='multipart/form-data',
+                           data={'token': 'token', 'file': (io.BytesIO(_geojson([bowtie])), 'zones.json')})
+    assert response.status_code == 400 and 'intersects itself' in response.json['details'][0]
+    assert client.store.snapshot().names == ['zone']
+    response = client.post(AdminRoute.IMPORT_FORBIDDEN_ZONES, content_type='multipart/form-data',
+                           data={'token': 'wrong', 'file': (io.BytesIO(data), 'zones.json')})
+    assert response.status_code == 401
+
+def test_find_forbidden_zones_rejects_malformed_body(client):
+    for kwargs in ({'data': 'not json', 'content_type': 'application/json'}, {'data': 'points=1'},
+                   {'json': [[60.0, 30.0]]}, {'json': {'token': 'token', 'points': [[60.0]]}}):
+        response = client.post(AdminRoute.FIND_FORBIDDEN_ZONES, **kwargs)
+        assert response.status_code == 400 and response.get_data(as_text=True) == 'Wrong points'
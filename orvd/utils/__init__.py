@@ -1,29 +1,69 @@
 from .mission import (
     parse_mission, read_mission, home_handler, takeoff_handler,
     waypoint_handler, servo_handler, land_handler, delay_handler,
-    encode_mission
+    encode_mission, get_mission_legs, get_mission_forbidden_zones, encode_mission_message
 )
 from .keys import (
     get_sha256_hex, sign, verify, mock_verifier,
-    generate_keys, generate_orvd_keys
+    generate_keys, generate_orvd_keys, load_keys, load_orvd_keys, signature_cache,
+    get_orvd_key_group
+)
+from .signature_schemes import (
+    SignatureScheme, RSASignatureScheme, Ed25519SignatureScheme, get_signature_scheme
+)
+from .geometry import (
+    haversine_pointwise, haversine_pairwise, points_in_polygon, segments_intersect_polygon,
+    ring_self_intersects, simplify_ring_conservative
 )
 from .general import (
     haversine, cast_wrapper, get_new_polygon_feature, is_point_in_polygon,
     create_csv_from_telemetry, compute_forbidden_zones_delta, compute_and_save_forbidden_zones_delta,
-    generate_forbidden_zones_string
+    save_forbidden_zones_delta, generate_forbidden_zones_string, generate_forbidden_zones_delta_string,
+    ZoneFragmentCache
+)
+from .telemetry_codec import (
+    encode_telemetry_binary, decode_telemetry_binary, decode_telemetry
+)
+from .compact_codec import (
+    encode_forbidden_zones_compact, decode_forbidden_zones_compact, encode_forbidden_zones_delta_compact,
+    decode_forbidden_zones_delta_compact, encode_mission_compact, decode_mission_compact
+)
+from .telemetry_filter import TelemetryDecimator, telemetry_decimator
+from .crypto_executor import CryptoExecutor, crypto_executor
+from .key_factory import KeyFactory, key_factory
+from .zone_index import ZoneGridIndex, get_polygon_bbox
+from .forbidden_zones import (
+    ZonesSnapshot, ForbiddenZonesStore, forbidden_zones_store
+)
+from .zones_import import (
+    ZonesImportError, iter_geojson_features, validate_zone_feature, parse_forbidden_zones_upload
 )
 from .responses import (
-    bad_request, regular_request, signed_request, authorized_request
+    bad_request, regular_request, signed_request, sign_answer, authorized_request
 )
 
 __all__ = [
     'parse_mission', 'read_mission', 'home_handler', 'takeoff_handler',
     'waypoint_handler', 'servo_handler', 'land_handler', 'delay_handler',
-    'encode_mission',
+    'encode_mission', 'get_mission_legs', 'get_mission_forbidden_zones', 'encode_mission_message',
     'get_sha256_hex', 'sign', 'verify', 'mock_verifier',
-    'generate_keys', 'generate_orvd_keys',
+    'generate_keys', 'generate_orvd_keys', 'load_keys', 'load_orvd_keys', 'signature_cache',
+    'get_orvd_key_group',
+    'SignatureScheme', 'RSASignatureScheme', 'Ed25519SignatureScheme', 'get_signature_scheme',
+    'haversine_pointwise', 'haversine_pairwise', 'points_in_polygon', 'segments_intersect_polygon',
+    'ring_self_intersects', 'simplify_ring_conservative',
     'haversine', 'cast_wrapper', 'get_new_polygon_feature', 'is_point_in_polygon',
     'create_csv_from_telemetry', 'compute_forbidden_zones_delta', 'compute_and_save_forbidden_zones_delta',
-    'generate_forbidden_zones_string',
-    'bad_request', 'regular_request', 'signed_request', 'authorized_request'
+    'save_forbidden_zones_delta', 'generate_forbidden_zones_string', 'generate_forbidden_zones_delta_string',
+    'ZoneFragmentCache',
+    'encode_telemetry_binary', 'decode_telemetry_binary', 'decode_telemetry',
+    'encode_forbidden_zones_compact', 'decode_forbidden_zones_compact', 'encode_forbidden_zones_delta_compact',
+    'decode_forbidden_zones_delta_compact', 'encode_mission_compact', 'decode_mission_compact',
+    'TelemetryDecimator', 'telemetry_decimator',
+    'CryptoExecutor', 'crypto_executor',
+    'KeyFactory', 'key_factory',
+    'ZoneGridIndex', 'get_polygon_bbox',
+    'ZonesSnapshot', 'ForbiddenZonesStore', 'forbidden_zones_store',
+    'ZonesImportError', 'iter_geojson_features', 'validate_zone_feature', 'parse_forbidden_zones_upload',
+    'bad_request', 'regular_request', 'signed_request', 'sign_answer', 'authorized_request'
 ]
\ No newline at end of file
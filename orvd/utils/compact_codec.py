@@ -0,0 +1,280 @@
+import base64
+import zlib
+
+# Компактный формат зон и миссий: '<заголовок> <base64>', где полезная нагрузка состоит из
+# байта версии, байта флагов и тела (при флаге COMPACT_FLAG_ZLIB - сжатого zlib).
+# Координаты передаются целыми числами с шагом 1e-7 градуса, высоты и прочие значения
+# миссии - с шагом 1e-2. Координаты и высоты кодируются разностью с предыдущей точкой
+# сообщения (вначале 0), все числа - zigzag varint (LEB128).
+COMPACT_VERSION = 1
+COMPACT_FLAG_ZLIB = 0x01
+COMPACT_ZONES_HEADER = '$ForbiddenZonesC'
+COMPACT_ZONES_DELTA_HEADER = '$ForbiddenZonesDeltaC'
+COMPACT_MISSION_HEADER = '$FlightMissionC'
+COORD_SCALE = 10 ** 7
+VALUE_SCALE = 100
+
+# Коды типов изменения зон в дельте
+_CHANGE_TYPES = ('added', 'modified', 'deleted')
+# Команды миссии с координатами (lat, lon, alt) и с прочими значениями
+_POSITION_COMMANDS = 'HWLI'
+_VALUE_COMMANDS = {'T': 1, 'S': 2, 'D': 1}
+
+
+def _write_varint(out: bytearray, value: int):
+    # zigzag: 0, -1, 1, -2, ... -> 0, 1, 2, 3, ...
+    value = -2 * value - 1 if value < 0 else 2 * value
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError('Truncated compact message')
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+        shift += 7
+    return (result >> 1) ^ -(result & 1), pos
+
+
+def _write_string(out: bytearray, value: str):
+    encoded = value.encode('utf-8')
+    _write_varint(out, len(encoded))
+    out += encoded
+
+
+def _read_string(data: bytes, pos: int) -> tuple[str, int]:
+    size, pos = _read_varint(data, pos)
+    if size < 0 or pos + size > len(data):
+        raise ValueError('Truncated compact message')
+    return data[pos:pos + size].decode('utf-8'), pos + size
+
+
+def _pack(header: str, body: bytearray, compress: bool) -> str:
+    flags = 0
+    if compress:
+        compressed = zlib.compress(bytes(body), 9)
+        # Короткие сообщения zlib только удлиняет
+        if len(compressed) < len(body):
+            body, flags = compressed, COMPACT_FLAG_ZLIB
+    payload = bytes((COMPACT_VERSION, flags)) + bytes(body)
+    return f'{header} {base64.b64encode(payload).decode("ascii")}'
+
+
+def _unpack(header: str, message: str) -> bytes:
+    prefix = f'{header} '
+    if not message.startswith(prefix):
+        raise ValueError(f'Not a {header} message')
+    try:
+        payload = base64.b64decode(message[len(prefix):], validate=True)
+    except ValueError:
+        raise ValueError('Invalid base64 in compact message')
+    if len(payload) < 2:
+        raise ValueError('Truncated compact message')
+    version, flags = payload[0], payload[1]
+    if version != COMPACT_VERSION:
+        raise ValueError(f'Unsupported compact format version {version}')
+    body = payload[2:]
+    if flags & COMPACT_FLAG_ZLIB:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error as e:
+            raise ValueError(f'Invalid zlib data in compact message: {e}')
+    return body
+
+
+def _encode_zones(zones: dict, header: str, with_change_type: bool, compress: bool) -> str:
+    out = bytearray()
+    _write_varint(out, len(zones['features']))
+    prev_lat = prev_lon = 0
+    for zone in zones['features']:
+        _write_string(out, zone['properties']['name'])
+        if with_change_type:
+            out.append(_CHANGE_TYPES.index(zone['properties']['change_type']))
+        coordinates = zone['geometry']['coordinates'][0]
+        _write_varint(out, len(coordinates))
+        for lon, lat in coordinates:
+            lat, lon = round(lat * COORD_SCALE), round(lon * COORD_SCALE)
+            _write_varint(out, lat - prev_lat)
+            _write_varint(out, lon - prev_lon)
+            prev_lat, prev_lon = lat, lon
+    return _pack(header, out, compress)
+
+
+def _decode_zones(message: str, header: str, with_change_type: bool) -> dict:
+    data = _unpack(header, message)
+    count, pos = _read_varint(data, 0)
+    features = []
+    lat = lon = 0
+    for _ in range(count):
+        name, pos = _read_string(data, pos)
+        properties = {'name': name}
+        if with_change_type:
+            if pos >= len(data) or data[pos] >= len(_CHANGE_TYPES):
+                raise ValueError('Invalid change type in compact message')
+            properties['change_type'] = _CHANGE_TYPES[data[pos]]
+            pos += 1
+        vertices, pos = _read_varint(data, pos)
+        coordinates = []
+        for _ in range(vertices):
+            delta_lat, pos = _read_varint(data, pos)
+            delta_lon, pos = _read_varint(data, pos)
+            lat, lon = lat + delta_lat, lon + delta_lon
+            coordinates.append([lon / COORD_SCALE, lat / COORD_SCALE])
+        features.append({"type": "Feature", "properties": properties,
+                         "geometry": {"type": "Polygon", "coordinates": [coordinates]}})
+    if pos != len(data):
+        raise ValueError('Trailing data in compact message')
+    return {"type": "FeatureCollection", "features": features}
+
+
+def encode_forbidden_zones_compact(forbidden_zones: dict, compress: bool = True) -> str:
+    """
+    Кодирует запрещенные зоны в компактный формат.
+
+    Args:
+        forbidden_zones (dict): GeoJSON запрещенных зон.
+        compress (bool): Сжимать тело zlib, если это его укорачивает.
+
+    Returns:
+        str: Строка '$ForbiddenZonesC <base64>'.
+    """
+    return _encode_zones(forbidden_zones, COMPACT_ZONES_HEADER, False, compress)
+
+
+def decode_forbidden_zones_compact(message: str) -> dict:
+    """
+    Декодирует запрещенные зоны из компактного формата.
+
+    Args:
+        message (str): Строка '$ForbiddenZonesC <base64>' без подписи.
+
+    Returns:
+        dict: GeoJSON запрещенных зон с координатами [lon, lat].
+
+    Raises:
+        ValueError: Если сообщение повреждено или версия формата не поддерживается.
+    """
+    return _decode_zones(message, COMPACT_ZONES_HEADER, False)
+
+
+def encode_forbidden_zones_delta_compact(delta_zones: dict, compress: bool = True) -> str:
+    """
+    Кодирует дельту запрещенных зон в компактный формат.
+
+    Args:
+        delta_zones (dict): GeoJSON дельты, у каждой зоны задано свойство change_type.
+        compress (bool): Сжимать тело zlib, если это его укорачивает.
+
+    Returns:
+        str: Строка '$ForbiddenZonesDeltaC <base64>'.
+    """
+    return _encode_zones(delta_zones, COMPACT_ZONES_DELTA_HEADER, True, compress)
+
+
+def decode_forbidden_zones_delta_compact(message: str) -> dict:
+    """
+    Декодирует дельту запрещенных зон из компактного формата.
+
+    Args:
+        message (str): Строка '$ForbiddenZonesDeltaC <base64>' без подписи.
+
+    Returns:
+        dict: GeoJSON дельты со свойством change_type у каждой зоны.
+
+    Raises:
+        ValueError: Если сообщение повреждено или версия формата не поддерживается.
+    """
+    return _decode_zones(message, COMPACT_ZONES_DELTA_HEADER, True)
+
+
+def encode_mission_compact(mission_steps: list, compress: bool = True) -> str:
+    """
+    Кодирует шаги миссии в компактный формат.
+
+    Args:
+        mission_steps (list): Закодированные команды миссии ('W60.1_30.2_100.0', ...).
+        compress (bool): Сжимать тело zlib, если это его укорачивает.
+
+    Returns:
+        str: Строка '$FlightMissionC <base64>'.
+
+    Raises:
+        ValueError: Если команда миссии неизвестна или имеет неверное число параметров.
+    """
+    out = bytearray()
+    _write_varint(out, len(mission_steps))
+    prev_lat = prev_lon = prev_alt = 0
+    for step in mission_steps:
+        command, params = step[0], step[1:].split('_')
+        out += command.encode('ascii')
+        if command in _POSITION_COMMANDS and len(params) == 3:
+            lat, lon, alt = round(float(params[0]) * COORD_SCALE), round(float(params[1]) * COORD_SCALE), \
+                round(float(params[2]) * VALUE_SCALE)
+            _write_varint(out, lat - prev_lat)
+            _write_varint(out, lon - prev_lon)
+            _write_varint(out, alt - prev_alt)
+            prev_lat, prev_lon, prev_alt = lat, lon, alt
+        elif command == 'T' and len(params) == 1:
+            alt = round(float(params[0]) * VALUE_SCALE)
+            _write_varint(out, alt - prev_alt)
+            prev_alt = alt
+        elif _VALUE_COMMANDS.get(command) == len(params):
+            for param in params:
+                _write_varint(out, round(float(param) * VALUE_SCALE))
+        else:
+            raise ValueError(f'Unsupported mission step {step}')
+    return _pack(COMPACT_MISSION_HEADER, out, compress)
+
+
+def decode_mission_compact(message: str) -> list:
+    """
+    Декодирует шаги миссии из компактного формата.
+
+    Args:
+        message (str): Строка '$FlightMissionC <base64>' без подписи.
+
+    Returns:
+        list: Команды миссии [команда, параметры...] с параметрами типа float.
+
+    Raises:
+        ValueError: Если сообщение повреждено или версия формата не поддерживается.
+    """
+    data = _unpack(COMPACT_MISSION_HEADER, message)
+    count, pos = _read_varint(data, 0)
+    steps = []
+    lat = lon = alt = 0
+    for _ in range(count):
+        if pos >= len(data):
+            raise ValueError('Truncated compact message')
+        command = chr(data[pos])
+        pos += 1
+        if command in _POSITION_COMMANDS:
+            delta_lat, pos = _read_varint(data, pos)
+            delta_lon, pos = _read_varint(data, pos)
+            delta_alt, pos = _read_varint(data, pos)
+            lat, lon, alt = lat + delta_lat, lon + delta_lon, alt + delta_alt
+            steps.append([command, lat / COORD_SCALE, lon / COORD_SCALE, alt / VALUE_SCALE])
+        elif command == 'T':
+            delta_alt, pos = _read_varint(data, pos)
+            alt += delta_alt
+            steps.append([command, alt / VALUE_SCALE])
+        elif command in _VALUE_COMMANDS:
+            params = []
+            for _ in range(_VALUE_COMMANDS[command]):
+                value, pos = _read_varint(data, pos)
+                params.append(value / VALUE_SCALE)
+            steps.append([command, *params])
+        else:
+            raise ValueError(f'Unknown mission command {command!r} in compact message')
+    if pos != len(data):
+        raise ValueError('Trailing data in compact message')
+    return steps
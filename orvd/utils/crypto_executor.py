@@ -0,0 +1,116 @@
+import atexit
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# Наибольшее время ожидания результата из пула, после которого вычисление выполняется в текущем потоке, с
+CRYPTO_PROCESS_TIMEOUT_S = 5.0
+
+
+def default_python_executable():
+    """
+    Возвращает интерпретатор Python для рабочих процессов пула.
+
+    Под mod_wsgi sys.executable - это исполняемый файл Apache, а не python, поэтому
+    в этом случае берется bin/python3 из sys.prefix (виртуального окружения).
+
+    Returns:
+        str: Путь к интерпретатору Python.
+    """
+    if os.path.basename(sys.executable or '').startswith('python'):
+        return sys.executable
+    return os.path.join(sys.prefix, 'bin', 'python3')
+
+
+class CryptoExecutor:
+    """
+    Пул процессов для модульного возведения в степень при подписи сообщений ОРВД.
+
+    Длинная арифметика Python выполняется с удержанием GIL, поэтому одновременные
+    подписанные запросы в потоках mod_wsgi выполняются по очереди. При включенном
+    пуле вызывающий поток ждет результат из другого процесса, не удерживая GIL.
+    Если пул отключен, недоступен или не вернул результат за timeout секунд,
+    вычисление выполняется в текущем потоке.
+    """
+    def __init__(self, workers=0, executable=None, timeout=CRYPTO_PROCESS_TIMEOUT_S):
+        self.workers = workers
+        self.executable = executable
+        self.timeout = timeout
+        self._pool = None
+        self._lock = threading.Lock()
+        self._offloaded = 0
+        self._inline = 0
+        self._fallbacks = 0
+
+    def init_app(self, app):
+        workers = os.environ.get("CRYPTO_PROCESS_WORKERS", str(self.workers))
+        # 'auto' - по числу ядер
+        self.workers = (os.cpu_count() or 1) if workers == 'auto' else int(workers)
+        self.executable = os.environ.get("CRYPTO_PROCESS_PYTHON", self.executable)
+        self.timeout = float(os.environ.get("CRYPTO_PROCESS_TIMEOUT_S", self.timeout))
+        self.start()
+
+    def start(self):
+        with self._lock:
+            if self._pool is None and self.workers > 0:
+                # spawn: дочерние процессы не наследуют потоки и соединения родителя
+                context = multiprocessing.get_context('spawn')
+                context.set_executable(self.executable or default_python_executable())
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                atexit.register(self.shutdown)
+
+    def run(self, func, *args):
+        """
+        Выполняет func(*args) в пуле процессов или в текущем потоке.
+
+        Args:
+            func (callable): Функция уровня модуля, результат которой можно передать между процессами.
+            *args: Аргументы функции.
+
+        Returns:
+            Результат func(*args).
+        """
+        pool = self._pool
+        if pool is not None:
+            future = None
+            try:
+                future = pool.submit(func, *args)
+                result = future.result(timeout=self.timeout)
+                self._offloaded += 1
+                return result
+            except (BrokenProcessPool, FutureTimeoutError) as e:
+                # Рабочий процесс аварийно завершился, не запустился или завис: дальше считаем в текущем потоке
+                if future is not None:
+                    future.cancel()
+                self._fallbacks += 1
+                print(f"Crypto process pool is broken or not responding, computing inline: {e!r}")
+                with self._lock:
+                    if self._pool is pool:
+                        self._pool = None
+                pool.shutdown(wait=False)
+            except RuntimeError as e:
+                # Пул останавливается при завершении процесса
+                self._fallbacks += 1
+                print(f"Crypto process pool is unavailable, computing inline: {e}")
+        self._inline += 1
+        return func(*args)
+
+    def stats(self):
+        return {
+            'workers': self.workers if self._pool is not None else 0,
+            'offloaded': self._offloaded,
+            'inline': self._inline,
+            'fallbacks': self._fallbacks,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+crypto_executor = CryptoExecutor()
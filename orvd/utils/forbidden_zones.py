@@ -0,0 +1,589 @@
+import copy
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from constants import FORBIDDEN_ZONES_PATH, FORBIDDEN_ZONES_DELTA_PATH, KeyGroup, WireFormat
+from db.dao import get_key
+from .general import (
+    generate_forbidden_zones_string, compute_forbidden_zones_delta, compute_and_save_forbidden_zones_delta,
+    save_forbidden_zones_delta, get_new_polygon_feature, ZoneFragmentCache
+)
+from .compact_codec import encode_forbidden_zones_compact
+from .keys import sign, get_sha256_hex
+from .zone_index import ZoneGridIndex
+
+# Количество изменений зон, хранимых для выдачи дельт
+FORBIDDEN_ZONES_HISTORY = 100
+# Количество записей журнала зон, после которого снимок перезаписывается
+FORBIDDEN_ZONES_COMPACT_EVERY = 100
+# Пауза без изменений зон перед публикацией в MQTT и наибольшая задержка публикации, мс
+FORBIDDEN_ZONES_PUBLISH_DELAY_MS = 500
+FORBIDDEN_ZONES_PUBLISH_MAX_DELAY_MS = 5000
+
+
+class ZonesSnapshot:
+    """
+    Неизменяемый снимок запрещенных зон.
+
+    Строка '$ForbiddenZones ...' и ее хеш вычисляются один раз при создании снимка
+    (с кэшем фрагментов хранилища перерисовываются только измененные зоны),
+    компактная строка и подписанные сообщения - при первом обращении. Вместе со снимком
+    строится пространственный индекс зон. Словарь zones (GeoJSON) читатели не должны изменять.
+    """
+    __slots__ = ('version', 'zones', 'zones_by_name', 'names', 'message', 'hash', 'index', '_compact', '_signed',
+                 '_lock')
+
+    def __init__(self, version, zones, fragment_cache=None):
+        self.version = version
+        self.zones = zones
+        self.zones_by_name = {zone['properties'].get('name'): zone for zone in zones['features']}
+        self.names = [zone['properties'].get('name') for zone in zones['features']]
+        self.message = generate_forbidden_zones_string(zones, fragment_cache)
+        self.hash = get_sha256_hex(self.message)
+        self.index = ZoneGridIndex(zones)
+        self._compact = None
+        self._signed = {}
+        self._lock = threading.Lock()
+
+    def encoded_message(self, wire_format=WireFormat.TEXT):
+        """
+        Возвращает строку запрещенных зон в указанном формате.
+
+        Args:
+            wire_format (str): Формат: 'text' ('$ForbiddenZones ...') или 'compact' ('$ForbiddenZonesC ...').
+
+        Returns:
+            str: Строка запрещенных зон без подписи.
+        """
+        if wire_format != WireFormat.COMPACT:
+            return self.message
+        if self._compact is None:
+            with self._lock:
+                if self._compact is None:
+                    self._compact = encode_forbidden_zones_compact(self.zones)
+        return self._compact
+
+    def versioned_message(self, wire_format=WireFormat.TEXT):
+        """
+        Возвращает строку запрещенных зон с номером версии снимка.
+
+        По версии получатель полного списка зон затем запрашивает дельту изменений.
+        Хеш снимка вычисляется по строке зон без версии.
+
+        Args:
+            wire_format (str): Формат строки зон: 'text' или 'compact'.
+
+        Returns:
+            str: Строка '$ForbiddenZonesVersion N$ForbiddenZones ...' без подписи.
+        """
+        return f'$ForbiddenZonesVersion {self.version}{self.encoded_message(wire_format)}'
+
+    def signed_message(self, wire_format=WireFormat.TEXT, key_group=KeyGroup.ORVD):
+        """
+        Возвращает строку запрещенных зон с номером версии и подписью ОРВД.
+
+        Args:
+            wire_format (str): Формат строки зон: 'text' или 'compact'.
+            key_group (str): Ключ ОРВД для подписи: KeyGroup.ORVD (RSA) или KeyGroup.ORVD_ED25519.
+
+        Returns:
+            str: Сообщение '$ForbiddenZonesVersion N$ForbiddenZones ...#<подпись>'
+                (или '$ForbiddenZonesVersion N$ForbiddenZonesC ...#<подпись>');
+                None, если ключа ОРВД этой группы нет.
+        """
+        key = get_key(key_group, private=True)
+        if key is None:
+            return None
+        signed = self._signed.get((wire_format, key_group))
+        # Подпись пересчитывается, только если ключ ОРВД сменился
+        if signed is None or signed[0] is not key:
+            message = self.versioned_message(wire_format)
+            with self._lock:
+                signed = self._signed.get((wire_format, key_group))
+                if signed is None or signed[0] is not key:
+                    signed = (key, f'{message}#{hex(sign(message, key_group))[2:]}')
+                    self._signed[(wire_format, key_group)] = signed
+        return signed[1]
+
+
+class ForbiddenZonesStore:
+    """
+    Хранилище запрещенных зон в памяти с версионированными снимками и журналом на диске.
+
+    Зоны хранятся в файле снимка и в журнале операций (по строке JSON на изменение
+    одной зоны). Изменение зоны дописывает в журнал одну строку с fsync, поэтому
+    запись на диск стоит O(размер зоны), а сбой во время записи теряет не больше
+    недописанной строки, которая отбрасывается при загрузке. Если запись строки не
+    удалась, журнал обрезается до ее начала. Версии записей журнала идут подряд:
+    разрыв, повтор или убывание версии, как и поврежденная строка в середине журнала,
+    означают порчу файла - загрузка прерывается, а журнал остается нетронутым. Каждые
+    compact_every записей журнал уплотняется: снимок атомарно перезаписывается через
+    временный файл, после чего журнал очищается.
+
+    С одними файлами могут работать несколько процессов сервера. Изменение выполняется
+    под файловой блокировкой журнала: сначала процесс дочитывает журнал после последней
+    известной ему записи (или заново загружает снимок, если другой процесс его уплотнил)
+    и применяет чужие изменения, и только затем назначает версию и дописывает свою
+    запись. Читатели замечают изменения на диске по длине журнала и inode файла снимка.
+
+    В памяти изменения применяются к копии текущего снимка и публикуются атомарной
+    заменой снимка, поэтому читатели всегда видят согласованную версию зон и не
+    обращаются к диску. Номер версии растет с каждым изменением и хранится в снимке
+    (поле version коллекции GeoJSON) и в записях журнала. Последние max_history
+    изменений хранятся в истории, по которой строится суммарная дельта от любой
+    из этих версий; более старые записи отбрасываются. После перезапуска история
+    восстанавливается по записям журнала, еще не вошедшим в снимок.
+    """
+    def __init__(self, path=FORBIDDEN_ZONES_PATH, delta_path=FORBIDDEN_ZONES_DELTA_PATH, journal_path=None,
+                 max_history=FORBIDDEN_ZONES_HISTORY, compact_every=FORBIDDEN_ZONES_COMPACT_EVERY,
+                 publish_delay_ms=FORBIDDEN_ZONES_PUBLISH_DELAY_MS, publish_max_delay_ms=FORBIDDEN_ZONES_PUBLISH_MAX_DELAY_MS):
+        self.path = path
+        self.delta_path = delta_path
+        self.journal_path = journal_path or f'{os.path.splitext(path)[0]}.journal'
+        self.max_history = max_history
+        self.compact_every = compact_every
+        self.publish_delay_ms = publish_delay_ms
+        self.publish_max_delay_ms = publish_max_delay_ms
+        self._snapshot = None
+        self._lock = threading.Lock()
+        # Снимки строятся под self._lock, поэтому кэш фрагментов не требует своей блокировки
+        self._fragments = ZoneFragmentCache()
+        self._updates = 0
+        self._journal = None
+        # Причина, по которой журнал нельзя больше дописывать, или None
+        self._journal_error = None
+        self._journal_entries = 0
+        # Длина журнала, уже примененного к снимку в памяти, и inode загруженного файла снимка
+        self._journal_offset = 0
+        self._snapshot_ino = None
+        self._compactions = 0
+        # Записи (версия, {имя зоны: (тип изменения, зона)})
+        self._history = deque()
+        self._history_base = None
+
+    def init_app(self, app):
+        self.max_history = int(os.environ.get("FORBIDDEN_ZONES_HISTORY", self.max_history))
+        self.compact_every = int(os.environ.get("FORBIDDEN_ZONES_COMPACT_EVERY", self.compact_every))
+        self.publish_delay_ms = int(os.environ.get("FORBIDDEN_ZONES_PUBLISH_DELAY_MS", self.publish_delay_ms))
+        self.publish_max_delay_ms = int(os.environ.get("FORBIDDEN_ZONES_PUBLISH_MAX_DELAY_MS", self.publish_max_delay_ms))
+
+    def snapshot(self):
+        """
+        Возвращает текущий снимок запрещенных зон.
+
+        Returns:
+            ZonesSnapshot: Снимок зон.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or self._changed_on_disk():
+            with self._lock, self._journal_locked():
+                self._refresh_locked()
+                snapshot = self._snapshot
+        return snapshot
+
+    def _changed_on_disk(self):
+        if self._journal_error is not None:
+            # Журнал не удалось откатить: хранилище продолжает отдавать снимок из памяти
+            return False
+        try:
+            return os.stat(self.path).st_ino != self._snapshot_ino or \
+                os.stat(self.journal_path).st_size != self._journal_offset
+        except OSError:
+            return False
+
+    @contextmanager
+    def _journal_locked(self):
+        if self._journal_error is not None:
+            raise OSError(self._journal_error)
+        if self._journal is None:
+            # Без буфера: после ошибки записи в нем не останется байтов, которые допишутся позже
+            self._journal = open(self.journal_path, 'ab', buffering=0)
+        fcntl.flock(self._journal, fcntl.LOCK_EX)
+        try:
+            yield self._journal
+        finally:
+            fcntl.flock(self._journal, fcntl.LOCK_UN)
+
+    def _refresh_locked(self):
+        # Вызывается под self._lock и блокировкой журнала: догоняет снимок в памяти до файлов
+        if self._snapshot is None or os.stat(self.path).st_ino != self._snapshot_ino or \
+                os.path.getsize(self.journal_path) < self._journal_offset:
+            self._load_locked()
+            return
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self._journal_offset)
+            lines = f.read().splitlines(keepends=True)
+        if not lines:
+            return
+        version = self._snapshot.version
+        features = self._snapshot.zones['features']
+        changes = []
+        for line in lines:
+            try:
+                entry = json.loads(line) if line.endswith(b'\n') else None
+            except ValueError:
+                entry = None
+            if entry is None or entry['version'] != version + 1:
+                # Недописанная строка или нарушен порядок версий: полная загрузка разберет журнал строго
+                self._load_locked()
+                return
+            changes.append((entry['version'], _journal_entry_delta(features, entry)))
+            features = _apply_journal_entry(features, entry)
+            version = entry['version']
+        self._snapshot = ZonesSnapshot(version, {**self._snapshot.zones, 'features': features}, self._fragments)
+        self._extend_history(changes)
+        self._journal_offset += sum(len(line) for line in lines)
+        self._journal_entries += len(lines)
+
+    def _load_locked(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            zones = json.load(f)
+            snapshot_ino = os.fstat(f.fileno()).st_ino
+        version = zones.pop('version', 1)
+        snapshot_version = version
+        features = zones['features']
+
+        entries = 0
+        changes = []
+        with open(self.journal_path, 'r+b') as f:
+            good_offset = 0
+            previous_version = None
+            for line in f:
+                # Недописанная при сбое строка и все, что после нее, отбрасываются
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    if f.read(1):
+                        raise ValueError(f"Corrupted forbidden zones journal {self.journal_path} "
+                                         f"at byte {good_offset}")
+                    break
+                if entry['version'] > version + 1:
+                    # Отбрасывать записи нельзя: после разрыва могут идти сохраненные изменения
+                    raise ValueError(f"Forbidden zones journal {self.journal_path} skips from version "
+                                     f"{version} to {entry['version']}")
+                if previous_version is not None and entry['version'] != previous_version + 1:
+                    # Повтор версии означает, что две записи сделаны от одного снимка: одну из них потеряли бы
+                    raise ValueError(f"Forbidden zones journal {self.journal_path} has version "
+                                     f"{entry['version']} after {previous_version}")
+                previous_version = entry['version']
+                good_offset += len(line)
+                if entry['version'] <= version:
+                    # Запись уже вошла в снимок при уплотнении
+                    continue
+                changes.append((entry['version'], _journal_entry_delta(features, entry)))
+                features = _apply_journal_entry(features, entry)
+                version = entry['version']
+                entries += 1
+            if good_offset < os.fstat(f.fileno()).st_size:
+                print(f"Truncating forbidden zones journal after {good_offset} bytes")
+                f.truncate(good_offset)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self._snapshot = ZonesSnapshot(version, {**zones, 'features': features}, self._fragments)
+        self._snapshot_ino = snapshot_ino
+        self._journal_offset = good_offset
+        self._journal_entries = entries
+        # История до версии снимка сохраняется, только если она доходит до этой версии без разрыва
+        # (повторная загрузка после уплотнения другим процессом); иначе она начинается с версии снимка
+        last_version = self._history[-1][0] if self._history else self._history_base
+        if self._history_base is None or not self._history_base <= snapshot_version <= last_version:
+            self._history.clear()
+            self._history_base = snapshot_version
+        while self._history and self._history[-1][0] > snapshot_version:
+            self._history.pop()
+        self._extend_history(changes)
+
+    def _write(self, zones, version):
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({**zones, 'version': version}, f, ensure_ascii=False, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        _fsync_directory(directory)
+
+    def _write_snapshot(self, journal, snapshot):
+        # Вызывается под блокировкой журнала. Снимок записывается раньше очистки журнала:
+        # после сбоя между этими шагами записи журнала с версией не выше версии снимка
+        # пропускаются при загрузке
+        self._write(snapshot.zones, snapshot.version)
+        journal.truncate(0)
+        os.fsync(journal.fileno())
+        self._snapshot_ino = os.stat(self.path).st_ino
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self._compactions += 1
+
+    def _append_journal(self, journal, entry):
+        # Вызывается под блокировкой журнала после _refresh_locked
+        line = json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n'
+        offset = os.fstat(journal.fileno()).st_size
+        try:
+            if journal.write(line) != len(line):
+                raise OSError(f'Short write to {self.journal_path}')
+            os.fsync(journal.fileno())
+        except BaseException:
+            # Изменение не публикуется, поэтому его строка не должна остаться в журнале:
+            # иначе она применится после перезапуска или склеится со следующей строкой
+            try:
+                os.ftruncate(journal.fileno(), offset)
+            except OSError as e:
+                self._journal_error = f'Forbidden zones journal {self.journal_path} is read-only ' \
+                                      f'after a failed rollback: {e}'
+            raise
+        self._journal_offset = offset + len(line)
+        self._journal_entries += 1
+
+    def _publish(self, snapshot, delta_zones):
+        self._append_history(snapshot.version, delta_zones)
+        self._snapshot = snapshot
+        self._updates += 1
+
+    def set_zone(self, name, coordinates):
+        """
+        Добавляет зону или заменяет внешнюю границу существующей зоны.
+
+        Args:
+            name (str): Имя зоны.
+            coordinates (list): Координаты вершин зоны [lon, lat].
+
+        Returns:
+            ZonesSnapshot: Новый снимок или None, если зона не изменилась.
+        """
+        with self._lock, self._journal_locked() as journal:
+            self._refresh_locked()
+            old_snapshot = self._snapshot
+            old_zone = old_snapshot.zones_by_name.get(name)
+            if old_zone is None:
+                zone = get_new_polygon_feature(name, coordinates)
+            elif old_zone['geometry']['coordinates'][0] == coordinates:
+                return None
+            else:
+                geometry = old_zone['geometry']
+                zone = {**old_zone, 'geometry': {**geometry, 'coordinates': [coordinates, *geometry['coordinates'][1:]]}}
+            return self._apply(journal, old_snapshot, {'op': 'set', 'zone': zone},
+                               {**zone, 'properties': {**zone['properties'], 'change_type': 'modified' if old_zone else 'added'}})
+
+    def delete_zone(self, name):
+        """
+        Удаляет зону.
+
+        Args:
+            name (str): Имя зоны.
+
+        Returns:
+            ZonesSnapshot: Новый снимок или None, если зоны нет.
+        """
+        with self._lock, self._journal_locked() as journal:
+            self._refresh_locked()
+            old_snapshot = self._snapshot
+            old_zone = old_snapshot.zones_by_name.get(name)
+            if old_zone is None:
+                return None
+            return self._apply(journal, old_snapshot, {'op': 'delete', 'name': name},
+                               {**old_zone, 'properties': {**old_zone['properties'], 'change_type': 'deleted'}})
+
+    def _apply(self, journal, old_snapshot, entry, delta_zone):
+        version = old_snapshot.version + 1
+        zones = {**old_snapshot.zones, 'features': _apply_journal_entry(old_snapshot.zones['features'], entry)}
+        # Снимок строится до записи журнала: некорректные зоны не попадут на диск
+        new_snapshot = ZonesSnapshot(version, zones, self._fragments)
+        self._append_journal(journal, {'version': version, **entry})
+        delta_zones = {"type": "FeatureCollection", "features": [delta_zone]}
+        save_forbidden_zones_delta(delta_zones, self.delta_path)
+        self._publish(new_snapshot, delta_zones)
+        if self.compact_every and self._journal_entries >= self.compact_every:
+            try:
+                self._write_snapshot(journal, new_snapshot)
+            except Exception as e:
+                # Изменение уже сохранено в журнале, уплотнение повторится при следующей записи
+                print(f"Error compacting forbidden zones journal: {e}")
+        return new_snapshot
+
+    def update(self, mutate):
+        """
+        Изменяет набор зон произвольной функцией и публикует новый снимок.
+
+        Изменение записывается на диск новым снимком целиком, поэтому для правки
+        отдельных зон следует использовать set_zone и delete_zone.
+
+        Args:
+            mutate (callable): Функция, изменяющая переданную копию GeoJSON зон.
+                Если она возвращает False, изменения отбрасываются.
+
+        Returns:
+            ZonesSnapshot: Новый снимок или None, если изменений не было.
+        """
+        with self._lock, self._journal_locked() as journal:
+            self._refresh_locked()
+            old_snapshot = self._snapshot
+            zones = copy.deepcopy(old_snapshot.zones)
+            if mutate(zones) is False:
+                return None
+            zones.pop('version', None)
+            # Снимок строится до записи файла: некорректные зоны не попадут на диск
+            new_snapshot = ZonesSnapshot(old_snapshot.version + 1, zones, self._fragments)
+            self._write_snapshot(journal, new_snapshot)
+            # Вычисление дельты дописывает change_type в свойства зон, поэтому ему передаются копии
+            old_zones, new_zones = copy.deepcopy(old_snapshot.zones), copy.deepcopy(zones)
+            delta_zones = compute_and_save_forbidden_zones_delta(old_zones, new_zones, self.delta_path)
+            if delta_zones is None:
+                # Дельту не удалось сохранить в файл, но история версий должна остаться полной
+                delta_zones = compute_forbidden_zones_delta(old_zones, new_zones)
+            self._publish(new_snapshot, delta_zones)
+            return new_snapshot
+
+    def _extend_history(self, changes):
+        # changes: пары (версия, зона дельты записи журнала или None)
+        for entry_version, delta_zone in changes:
+            self._append_history(entry_version, {"type": "FeatureCollection",
+                                                 "features": [delta_zone] if delta_zone else []})
+
+    def _append_history(self, version, delta_zones):
+        changes = {}
+        for zone in delta_zones['features']:
+            properties = {**zone['properties']}
+            change_type = properties.pop('change_type')
+            changes[properties.get('name')] = (change_type, {**zone, 'properties': properties})
+        self._history.append((version, changes))
+        # Уплотнение: самые старые изменения отбрасываются, дельта от их версий недоступна
+        while len(self._history) > self.max_history:
+            self._history_base = self._history.popleft()[0]
+
+    def delta_since(self, version):
+        """
+        Строит суммарную дельту изменений зон начиная с указанной версии.
+
+        Args:
+            version (int): Версия зон, известная получателю.
+
+        Returns:
+            tuple: Текущий снимок и GeoJSON дельты, у каждой зоны которой задано свойство
+                change_type (added, modified или deleted). Вместо дельты возвращается None,
+                если версия старше истории или неизвестна: получателю нужен полный снимок.
+        """
+        self.snapshot()
+        with self._lock:
+            snapshot = self._snapshot
+            if version < self._history_base or version > snapshot.version:
+                return snapshot, None
+            combined = {}
+            for entry_version, changes in self._history:
+                if entry_version <= version:
+                    continue
+                for name, (change_type, zone) in changes.items():
+                    first_change_type = combined[name][0] if name in combined else change_type
+                    combined[name] = (first_change_type, change_type, zone)
+
+        features = []
+        for name, (first_change_type, last_change_type, zone) in combined.items():
+            existed = first_change_type != 'added'
+            exists = last_change_type != 'deleted'
+            if existed and exists:
+                change_type = 'modified'
+            elif existed:
+                change_type = 'deleted'
+            elif exists:
+                change_type = 'added'
+            else:
+                continue
+            features.append({**zone, 'properties': {**zone['properties'], 'change_type': change_type}})
+        return snapshot, {"type": "FeatureCollection", "features": features}
+
+    def replace(self, zones):
+        """
+        Заменяет весь набор зон (импорт файла зон).
+
+        Args:
+            zones (dict): GeoJSON запрещенных зон.
+
+        Returns:
+            ZonesSnapshot: Новый снимок.
+        """
+        def mutate(current):
+            current.clear()
+            current.update(zones)
+        return self.update(mutate)
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version if snapshot else 0,
+            'zones': len(snapshot.names) if snapshot else 0,
+            'updates': self._updates,
+            'history': len(self._history),
+            'journal_entries': self._journal_entries,
+            'compactions': self._compactions,
+            **{f'fragment_{key}': value for key, value in self._fragments.stats().items()},
+            **({f'index_{key}': value for key, value in snapshot.index.stats().items()} if snapshot else {}),
+        }
+
+
+def _apply_journal_entry(features, entry):
+    """
+    Применяет запись журнала к списку зон, не изменяя исходный список.
+
+    Args:
+        features (list): Зоны GeoJSON.
+        entry (dict): Запись журнала: {'op': 'set', 'zone': зона} или {'op': 'delete', 'name': имя}.
+
+    Returns:
+        list: Новый список зон.
+    """
+    if entry['op'] == 'delete':
+        return [zone for zone in features if zone['properties'].get('name') != entry['name']]
+
+    new_zone = entry['zone']
+    name = new_zone['properties'].get('name')
+    features = list(features)
+    for idx, zone in enumerate(features):
+        if zone['properties'].get('name') == name:
+            features[idx] = new_zone
+            return features
+    features.append(new_zone)
+    return features
+
+
+def _journal_entry_delta(features, entry):
+    """
+    Строит зону дельты для записи журнала, применяемой к списку зон.
+
+    Args:
+        features (list): Зоны GeoJSON до применения записи.
+        entry (dict): Запись журнала.
+
+    Returns:
+        dict: Зона со свойством change_type или None, если удаляемой зоны нет.
+    """
+    name = entry['name'] if entry['op'] == 'delete' else entry['zone']['properties'].get('name')
+    old_zone = next((zone for zone in features if zone['properties'].get('name') == name), None)
+    if entry['op'] == 'delete':
+        if old_zone is None:
+            return None
+        return {**old_zone, 'properties': {**old_zone['properties'], 'change_type': 'deleted'}}
+    zone = entry['zone']
+    return {**zone, 'properties': {**zone['properties'], 'change_type': 'modified' if old_zone else 'added'}}
+
+
+def _fsync_directory(directory):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+forbidden_zones_store = ForbiddenZonesStore()
@@ -1,8 +1,8 @@
-import math
 import json
 import csv
 from io import StringIO
 from constants import FORBIDDEN_ZONES_DELTA_PATH
+from .geometry import haversine_pointwise, points_in_polygon
 
 def haversine(lat1, lon1, lat2, lon2):
     """
@@ -15,20 +15,7 @@ def haversine(lat1, lon1, lat2, lon2):
     Returns:
         float: Расстояние в метрах.
     """
-    R = 6366037  # radius of Earth in meters
-    phi_1 = math.radians(lat1)
-    phi_2 = math.radians(lat2)
-
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-
-    a = math.sin(delta_phi / 2.0) ** 2 + math.cos(phi_1) * math.cos(phi_2) * math.sin(delta_lambda / 2.0) ** 2
-    
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-    meters = R * c
-    meters = round(meters, 3)
-    return meters
+    return round(float(haversine_pointwise(lat1, lon1, lat2, lon2)), 3)
 
 
 def cast_wrapper(element, cast_function):
@@ -87,23 +74,7 @@ def is_point_in_polygon(point, polygon):
     Returns:
         bool: True, если точка внутри полигона, иначе False.
     """
-    x, y = point
-    n = len(polygon)
-    inside = False
-
-    p1x, p1y = polygon[0]
-    for i in range(n + 1):
-        p2x, p2y = polygon[i % n]
-        if y > min(p1y, p2y):
-            if y <= max(p1y, p2y):
-                if x <= max(p1x, p2x):
-                    if p1y != p2y:
-                        xints = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                    if p1x == p2x or x <= xints:
-                        inside = not inside
-        p1x, p1y = p2x, p2y
-
-    return inside
+    return bool(points_in_polygon([point], polygon)[0])
 
 
 def create_csv_from_telemetry(telemetry_data):
@@ -161,29 +132,119 @@ def compute_forbidden_zones_delta(old_zones, new_zones):
     return delta_zones
 
 
-def compute_and_save_forbidden_zones_delta(old_zones, new_zones):
+def save_forbidden_zones_delta(delta_zones, path=FORBIDDEN_ZONES_DELTA_PATH):
     try:
-        delta_zones = compute_forbidden_zones_delta(old_zones, new_zones)
-        
-        with open(FORBIDDEN_ZONES_DELTA_PATH, 'w', encoding='utf-8') as f:
+        with open(path, 'w', encoding='utf-8') as f:
             json.dump(delta_zones, f, ensure_ascii=False, indent=4)
+    except Exception as e:
+        print(f"Error saving forbidden zones delta: {e}")
+
+
+def compute_and_save_forbidden_zones_delta(old_zones, new_zones, path=FORBIDDEN_ZONES_DELTA_PATH):
+    try:
+        delta_zones = compute_forbidden_zones_delta(old_zones, new_zones)
     except Exception as e:
         print(f"Error computing and saving forbidden zones delta: {e}")
+        return None
+    save_forbidden_zones_delta(delta_zones, path)
+    return delta_zones
         
         
-def generate_forbidden_zones_string(forbidden_zones):
+def _render_zone_coordinates(coordinates):
+    return '&'.join([f'{point[1]:.7f}_{point[0]:.7f}' for point in coordinates])
+
+
+def _render_zone_fragment(name, coordinates):
+    return f'&{name}&{len(coordinates)}&{_render_zone_coordinates(coordinates)}'
+
+
+class ZoneFragmentCache:
+    """
+    Кэш фрагментов строки '$ForbiddenZones' для отдельных зон.
+
+    Фрагмент '&<имя>&<количество вершин>&<вершины>' хранится по имени зоны вместе с
+    списком ее координат. Неизмененные зоны переходят в новый снимок тем же списком
+    координат, поэтому для них координаты даже не сравниваются; для остальных фрагмент
+    перерисовывается, только если координаты не равны сохраненным. После каждой сборки
+    строки в кэше остаются только фрагменты ее зон, так что кэш не растет при удалении зон.
+    """
+    def __init__(self):
+        # Имя зоны -> (список координат, фрагмент)
+        self._fragments = {}
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, features):
+        """
+        Возвращает фрагменты строки для списка зон, перерисовывая только новые и измененные зоны.
+
+        Args:
+            features (list): Зоны GeoJSON.
+
+        Returns:
+            list: Фрагменты строки в порядке зон.
+        """
+        fragments = []
+        used = {}
+        for zone in features:
+            name = zone['properties']['name']
+            coordinates = zone['geometry']['coordinates'][0]
+            cached = self._fragments.get(name)
+            if cached is None or cached[0] is not coordinates and cached[0] != coordinates:
+                cached = (coordinates, _render_zone_fragment(name, coordinates))
+                self.misses += 1
+            else:
+                # Храним новый список, чтобы в следующий раз хватило проверки тождества
+                cached = (coordinates, cached[1])
+                self.hits += 1
+            used[name] = cached
+            fragments.append(cached[1])
+        self._fragments = used
+        return fragments
+
+    def stats(self):
+        return {
+            'fragments': len(self._fragments),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+def generate_forbidden_zones_string(forbidden_zones, fragment_cache=None):
     """
     Генерирует строку запрещенных зон из JSON данных.
 
     Args:
         forbidden_zones (dict): JSON данные запрещенных зон.
+        fragment_cache (ZoneFragmentCache, optional): Кэш фрагментов зон; без него все зоны
+            отрисовываются заново.
 
     Returns:
         str: Строка запрещенных зон.
     """
-    result_str = f'$ForbiddenZones {len(forbidden_zones["features"])}'
-    for zone in forbidden_zones['features']:
+    features = forbidden_zones['features']
+    if fragment_cache is not None:
+        fragments = fragment_cache.render(features)
+    else:
+        fragments = [_render_zone_fragment(zone['properties']['name'], zone['geometry']['coordinates'][0])
+                     for zone in features]
+    return f'$ForbiddenZones {len(features)}' + ''.join(fragments)
+
+
+def generate_forbidden_zones_delta_string(delta_zones):
+    """
+    Генерирует строку дельты запрещенных зон из JSON данных.
+
+    Args:
+        delta_zones (dict): JSON данные дельты, у каждой зоны задано свойство change_type.
+
+    Returns:
+        str: Строка дельты запрещенных зон.
+    """
+    fragments = [f'$ForbiddenZonesDelta {len(delta_zones["features"])}']
+    for zone in delta_zones['features']:
         name = zone['properties']['name']
+        change_type = zone['properties']['change_type']
         coordinates = zone['geometry']['coordinates'][0]
-        result_str += f'&{name}&{len(coordinates)}&{"&".join(list(map(lambda e: f"{e[1]:.7f}_{e[0]:.7f}", coordinates)))}'
-    return result_str
+        fragments.append(f'&{name}&{change_type}&{len(coordinates)}&{_render_zone_coordinates(coordinates)}')
+    return ''.join(fragments)
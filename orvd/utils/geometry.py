@@ -0,0 +1,300 @@
+import numpy as np
+
+# Радиус Земли в метрах, используемый при расчете расстояний
+EARTH_RADIUS = 6366037
+# До этого количества точек накладные расходы NumPy превышают выигрыш от векторизации
+SMALL_BATCH = 32
+# Количество ребер кольца, рамки которых сравниваются со всеми ребрами за одну операцию
+RING_CHUNK = 256
+
+
+def haversine_pointwise(lat1, lon1, lat2, lon2):
+    """
+    Вычисляет расстояния между соответствующими точками двух наборов по формуле гаверсинуса.
+
+    Args:
+        lat1, lon1 (array_like): Координаты первых точек в градусах.
+        lat2, lon2 (array_like): Координаты вторых точек; формы массивов должны
+            согласовываться по правилам broadcasting NumPy.
+
+    Returns:
+        ndarray: Расстояния в метрах.
+    """
+    phi_1 = np.radians(lat1)
+    phi_2 = np.radians(lat2)
+    delta_phi = np.radians(np.subtract(lat2, lat1))
+    delta_lambda = np.radians(np.subtract(lon2, lon1))
+
+    a = np.sin(delta_phi / 2.0) ** 2 + np.cos(phi_1) * np.cos(phi_2) * np.sin(delta_lambda / 2.0) ** 2
+    # Ошибки округления могут дать a чуть больше 1 для противоположных точек
+    a = np.clip(a, 0.0, 1.0)
+    return EARTH_RADIUS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def haversine_pairwise(lat1, lon1, lat2, lon2):
+    """
+    Вычисляет матрицу расстояний между всеми точками первого и второго наборов.
+
+    Args:
+        lat1, lon1 (array_like): Координаты N точек первого набора в градусах.
+        lat2, lon2 (array_like): Координаты M точек второго набора в градусах.
+
+    Returns:
+        ndarray: Матрица N x M расстояний в метрах.
+    """
+    lat1 = np.asarray(lat1, dtype=float).reshape(-1, 1)
+    lon1 = np.asarray(lon1, dtype=float).reshape(-1, 1)
+    lat2 = np.asarray(lat2, dtype=float).reshape(1, -1)
+    lon2 = np.asarray(lon2, dtype=float).reshape(1, -1)
+    return haversine_pointwise(lat1, lon1, lat2, lon2)
+
+
+def points_in_polygon(points, polygon):
+    """
+    Проверяет, какие из точек находятся внутри полигона (метод трассировки луча).
+
+    Результат для каждой точки совпадает с is_point_in_polygon, включая точки на границе.
+
+    Args:
+        points (array_like): Массив K x 2 координат точек (x, y).
+        polygon (array_like): Массив N x 2 координат вершин полигона.
+
+    Returns:
+        ndarray: Массив K значений bool.
+    """
+    if len(points) < SMALL_BATCH:
+        return np.array([_is_point_in_polygon(point, polygon) for point in points], dtype=bool)
+
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    polygon = np.asarray(polygon, dtype=float).reshape(-1, 2)
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    if not len(polygon):
+        return inside
+
+    # Ребра (i - 1, i), включая замыкающее ребро от последней вершины к первой
+    p1 = np.roll(polygon, 1, axis=0)
+    p2 = polygon
+    for (p1x, p1y), (p2x, p2y) in zip(p1.tolist(), p2.tolist()):
+        if p1y == p2y:
+            # Горизонтальное ребро не пересекает луч
+            continue
+        crossing = (y > min(p1y, p2y)) & (y <= max(p1y, p2y)) & (x <= max(p1x, p2x))
+        if p1x != p2x:
+            crossing &= x <= (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+        inside ^= crossing
+    return inside
+
+
+def _is_point_in_polygon(point, polygon):
+    x, y = point
+    inside = False
+    if not len(polygon):
+        return inside
+
+    p1x, p1y = polygon[-1]
+    for p2x, p2y in polygon:
+        if p1y != p2y and min(p1y, p2y) < y <= max(p1y, p2y) and x <= max(p1x, p2x):
+            if p1x == p2x or x <= (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x:
+                inside = not inside
+        p1x, p1y = p2x, p2y
+    return inside
+
+
+def segments_intersect_polygon(starts, ends, polygon):
+    """
+    Проверяет, какие из отрезков пересекают полигон или лежат внутри него.
+
+    Касание границы считается пересечением. Координаты рассматриваются как
+    плоские, как и в points_in_polygon.
+
+    Args:
+        starts (array_like): Массив K x 2 координат начал отрезков (x, y).
+        ends (array_like): Массив K x 2 координат концов отрезков (x, y).
+        polygon (array_like): Массив N x 2 координат вершин полигона.
+
+    Returns:
+        ndarray: Массив K значений bool.
+    """
+    if len(starts) < SMALL_BATCH:
+        return np.array([_segment_intersects_polygon(start, end, polygon) for start, end in zip(starts, ends)],
+                        dtype=bool)
+
+    starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+    result = points_in_polygon(starts, polygon) | points_in_polygon(ends, polygon)
+    polygon = np.asarray(polygon, dtype=float).reshape(-1, 2)
+    ax, ay, bx, by = starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+    for (cx, cy), (dx, dy) in zip(np.roll(polygon, 1, axis=0).tolist(), polygon.tolist()):
+        result |= _segments_intersect_edge(ax, ay, bx, by, cx, cy, dx, dy)
+    return result
+
+
+def ring_self_intersects(ring):
+    """
+    Проверяет, пересекает ли замкнутое кольцо полигона само себя.
+
+    Пересечением считаются общие точки несмежных ребер и возврат смежного ребра
+    назад по предыдущему (шип нулевой ширины).
+
+    Args:
+        ring (array_like): Массив N x 2 координат вершин кольца, первая вершина
+            совпадает с последней, соседние вершины различны.
+
+    Returns:
+        bool: True, если кольцо самопересекающееся.
+    """
+    ring = np.asarray(ring, dtype=float).reshape(-1, 2)
+    edges = len(ring) - 1
+    starts, ends = ring[:-1], ring[1:]
+
+    # Шипы: следующая вершина лежит на предыдущем ребре или ребро возвращается назад
+    nxt = np.roll(ends, -1, axis=0)
+    cross = (ends[:, 0] - starts[:, 0]) * (nxt[:, 1] - starts[:, 1]) - (ends[:, 1] - starts[:, 1]) * (nxt[:, 0] - starts[:, 0])
+    dot = (ends[:, 0] - starts[:, 0]) * (nxt[:, 0] - ends[:, 0]) + (ends[:, 1] - starts[:, 1]) * (nxt[:, 1] - ends[:, 1])
+    if np.any((cross == 0) & (dot < 0)):
+        return True
+
+    if edges < SMALL_BATCH:
+        coords = ring.tolist()
+        for i in range(edges):
+            (ax, ay), (bx, by) = coords[i], coords[i + 1]
+            for j in range(i + 2, edges - (i == 0)):
+                (cx, cy), (dx, dy) = coords[j], coords[j + 1]
+                if _segments_intersect(ax, ay, bx, by, cx, cy, dx, dy):
+                    return True
+        return False
+
+    # Точная проверка только для пар несмежных ребер с пересекающимися рамками
+    min_x, max_x = np.minimum(starts[:, 0], ends[:, 0]), np.maximum(starts[:, 0], ends[:, 0])
+    min_y, max_y = np.minimum(starts[:, 1], ends[:, 1]), np.maximum(starts[:, 1], ends[:, 1])
+    columns = np.arange(edges)
+    for chunk in range(0, edges, RING_CHUNK):
+        rows = columns[chunk:chunk + RING_CHUNK, None]
+        overlap = ((min_x[rows] <= max_x) & (max_x[rows] >= min_x) & (min_y[rows] <= max_y) & (max_y[rows] >= min_y)
+                   & (columns >= rows + 2) & ~((rows == 0) & (columns == edges - 1)))
+        i, j = np.nonzero(overlap)
+        i += chunk
+        if len(i) and np.any(_segments_intersect_edge(starts[i, 0], starts[i, 1], ends[i, 0], ends[i, 1],
+                                                      starts[j, 0], starts[j, 1], ends[j, 0], ends[j, 1])):
+            return True
+    return False
+
+
+def simplify_ring_conservative(ring, tolerance_m):
+    """
+    Упрощает кольцо полигона методом Дугласа-Пекера, не уменьшая площадь полигона.
+
+    Цепочка вершин заменяется хордой, только если все вершины цепочки лежат внутри
+    полигона относительно хорды и не дальше tolerance_m от нее. Поэтому упрощенный
+    полигон содержит исходный и отклоняется от него не более чем на tolerance_m.
+    Если упрощенное кольцо получилось самопересекающимся, возвращается исходное.
+
+    Args:
+        ring (list): Замкнутое кольцо вершин [lon, lat] без самопересечений.
+        tolerance_m (float): Допустимое отклонение в метрах.
+
+    Returns:
+        list: Замкнутое кольцо вершин [lon, lat].
+    """
+    points = ring[:-1]
+    n = len(points)
+    if tolerance_m <= 0 or n <= 3:
+        return ring
+
+    # Локальная равнопромежуточная проекция в метрах
+    coords = np.asarray(points, dtype=float)
+    meters_per_degree = EARTH_RADIUS * np.pi / 180
+    x = coords[:, 0] * meters_per_degree * np.cos(np.radians(coords[:, 1].mean()))
+    y = coords[:, 1] * meters_per_degree
+    # Для обхода против часовой стрелки внутренняя сторона ребра - слева
+    area = np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))
+    side = 1.0 if area > 0 else -1.0
+
+    x, y = np.append(x, x[0]), np.append(y, y[0])
+    first = int(np.argmax((x[:n] - x[0]) ** 2 + (y[:n] - y[0]) ** 2))
+    keep = np.zeros(n + 1, dtype=bool)
+    keep[[0, first, n]] = True
+    stack = [(0, first), (first, n)]
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        dx, dy = x[j] - x[i], y[j] - y[i]
+        length = np.hypot(dx, dy)
+        qx, qy = x[i + 1:j] - x[i], y[i + 1:j] - y[i]
+        if length == 0:
+            # Хорда вырождена: ее нельзя использовать, цепочка делится в самой дальней вершине
+            violation = np.hypot(qx, qy)
+        else:
+            inner = side * (dx * qy - dy * qx) / length
+            violation = np.maximum(-inner, inner - tolerance_m)
+        k = int(np.argmax(violation))
+        if violation[k] > 0:
+            keep[i + 1 + k] = True
+            stack.append((i, i + 1 + k))
+            stack.append((i + 1 + k, j))
+
+    kept = np.flatnonzero(keep[:n])
+    if len(kept) < 3:
+        return ring
+    simplified = [list(points[idx]) for idx in kept.tolist()]
+    simplified.append(list(points[0]))
+    if len(simplified) < len(ring) and ring_self_intersects(simplified):
+        return ring
+    return simplified
+
+
+def _segments_intersect_edge(ax, ay, bx, by, cx, cy, dx, dy):
+    # Отрезки (a, b) - массивы, ребра (c, d) - одно или массив той же длины; касание считается пересечением
+    o1 = np.sign((bx - ax) * (cy - ay) - (by - ay) * (cx - ax))
+    o2 = np.sign((bx - ax) * (dy - ay) - (by - ay) * (dx - ax))
+    o3 = np.sign((dx - cx) * (ay - cy) - (dy - cy) * (ax - cx))
+    o4 = np.sign((dx - cx) * (by - cy) - (dy - cy) * (bx - cx))
+    min_x, max_x = np.minimum(ax, bx), np.maximum(ax, bx)
+    min_y, max_y = np.minimum(ay, by), np.maximum(ay, by)
+    result = (o1 * o2 < 0) & (o3 * o4 < 0)
+    # Вершина ребра на отрезке или конец отрезка на ребре
+    result |= (o1 == 0) & (min_x <= cx) & (cx <= max_x) & (min_y <= cy) & (cy <= max_y)
+    result |= (o2 == 0) & (min_x <= dx) & (dx <= max_x) & (min_y <= dy) & (dy <= max_y)
+    edge_min_x, edge_max_x = np.minimum(cx, dx), np.maximum(cx, dx)
+    edge_min_y, edge_max_y = np.minimum(cy, dy), np.maximum(cy, dy)
+    result |= (o3 == 0) & (edge_min_x <= ax) & (ax <= edge_max_x) & (edge_min_y <= ay) & (ay <= edge_max_y)
+    result |= (o4 == 0) & (edge_min_x <= bx) & (bx <= edge_max_x) & (edge_min_y <= by) & (by <= edge_max_y)
+    return result
+
+
+def _orientation(ax, ay, bx, by, cx, cy):
+    value = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    return (value > 0) - (value < 0)
+
+
+def _on_segment(ax, ay, bx, by, cx, cy):
+    return min(ax, bx) <= cx <= max(ax, bx) and min(ay, by) <= cy <= max(ay, by)
+
+
+def _segment_intersects_polygon(start, end, polygon):
+    if _is_point_in_polygon(start, polygon) or _is_point_in_polygon(end, polygon):
+        return True
+    ax, ay = start
+    bx, by = end
+    if not len(polygon):
+        return False
+
+    cx, cy = polygon[-1]
+    for dx, dy in polygon:
+        if _segments_intersect(ax, ay, bx, by, cx, cy, dx, dy):
+            return True
+        cx, cy = dx, dy
+    return False
+
+
+def _segments_intersect(ax, ay, bx, by, cx, cy, dx, dy):
+    o1 = _orientation(ax, ay, bx, by, cx, cy)
+    o2 = _orientation(ax, ay, bx, by, dx, dy)
+    o3 = _orientation(cx, cy, dx, dy, ax, ay)
+    o4 = _orientation(cx, cy, dx, dy, bx, by)
+    if o1 * o2 < 0 and o3 * o4 < 0:
+        return True
+    return (o1 == 0 and _on_segment(ax, ay, bx, by, cx, cy)) or (o2 == 0 and _on_segment(ax, ay, bx, by, dx, dy)) \
+        or (o3 == 0 and _on_segment(cx, cy, dx, dy, ax, ay)) or (o4 == 0 and _on_segment(cx, cy, dx, dy, bx, by))
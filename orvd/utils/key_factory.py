@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import deque
+from Cryptodome import Random
+from Cryptodome.PublicKey import RSA
+from constants import ORVD_KEY_SIZE
+
+
+class KeyFactory:
+    """
+    Пул заранее сгенерированных пар ключей RSA.
+
+    Фоновый поток поддерживает в пуле pool_size готовых ключей, поэтому при первом
+    обмене ключами с Mission Sender ключ выдается без генерации в потоке запроса.
+    Если пул пуст или отключен (pool_size = 0), ключ генерируется сразу.
+    """
+    def __init__(self, keysize=ORVD_KEY_SIZE, pool_size=2):
+        self.keysize = keysize
+        self.pool_size = pool_size
+        self._keys = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._generated = 0
+        self._handed_out = 0
+        self._misses = 0
+        self._generation_time_total = 0.0
+        self._generation_time_max = 0.0
+        self._refill_started = None
+        self._last_refill_ms = 0.0
+
+    def init_app(self, app):
+        self.pool_size = int(os.environ.get("KEY_POOL_SIZE", self.pool_size))
+        self.start()
+
+    def start(self):
+        if self._thread is None and self.pool_size > 0:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='key_factory', daemon=True)
+            self._thread.start()
+
+    def _generate(self):
+        started = time.perf_counter()
+        key = RSA.generate(self.keysize, Random.new().read)
+        elapsed = time.perf_counter() - started
+        with self._cond:
+            self._generated += 1
+            self._generation_time_total += elapsed
+            self._generation_time_max = max(self._generation_time_max, elapsed)
+        return key
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while len(self._keys) >= self.pool_size and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                if self._refill_started is None:
+                    self._refill_started = time.perf_counter()
+            key = self._generate()
+            with self._cond:
+                self._keys.append(key)
+                if len(self._keys) >= self.pool_size:
+                    self._last_refill_ms = (time.perf_counter() - self._refill_started) * 1e3
+                    self._refill_started = None
+
+    def take(self):
+        """
+        Выдает пару ключей RSA из пула или генерирует ее, если пул пуст.
+
+        Returns:
+            RsaKey: Приватный ключ RSA.
+        """
+        with self._cond:
+            if self._keys:
+                key = self._keys.popleft()
+                self._handed_out += 1
+                self._cond.notify()
+                return key
+            self._misses += 1
+            self._cond.notify()
+        key = self._generate()
+        with self._cond:
+            self._handed_out += 1
+        return key
+
+    def stats(self):
+        with self._cond:
+            return {
+                'depth': len(self._keys),
+                'pool_size': self.pool_size,
+                'generated': self._generated,
+                'handed_out': self._handed_out,
+                'misses': self._misses,
+                'generation_avg_ms': round(self._generation_time_total / self._generated * 1e3, 3)
+                if self._generated else 0.0,
+                'generation_max_ms': round(self._generation_time_max * 1e3, 3),
+                'last_refill_ms': round(self._last_refill_ms, 3),
+            }
+
+    def stop(self):
+        if self._thread is not None:
+            with self._cond:
+                self._stopping = True
+                self._cond.notify()
+            self._thread.join()
+            self._thread = None
+
+
+key_factory = KeyFactory()
@@ -2,8 +2,13 @@ from hashlib import sha256
 from Cryptodome import Random
 from Cryptodome.PublicKey import RSA
 from db.dao import get_key
+from db.keystore import keystore
 from context import context
 from constants import ORVD_KEY_SIZE, KeyGroup
+from .signature_schemes import (
+    signature_cache, get_signature_scheme, rsa_scheme, ed25519_scheme
+)
+
 
 def get_sha256_hex(message: str) -> str:
     """
@@ -30,12 +35,7 @@ def sign(message: str, key_group: str) -> int:
         int: Цифровая подпись.
     """
     key = get_key(key_group, private=True)
-    n, d = key.n, key.d
-    msg_bytes = message.encode()
-    hash = int.from_bytes(sha256(msg_bytes).digest(), byteorder='big', signed=False)
-    signature = pow(hash, d, n)
-    
-    return signature
+    return get_signature_scheme(key).sign(message.encode(), key, key_group)
 
 
 def verify(message: str, signature: int, key_group: str) -> bool:
@@ -51,15 +51,10 @@ def verify(message: str, signature: int, key_group: str) -> bool:
         bool: True, если подпись верна, иначе False.
     """
     try:
-        key_set = get_key(key_group, private=False)
-        if len(key_set) == 2:
-            n, e = key_set
-        else:
+        key = get_key(key_group, private=False)
+        if key is None or key == -1:
             return False
-        msg_bytes = message.encode()
-        hash = int.from_bytes(sha256(msg_bytes).digest(), byteorder='big', signed=False)
-        hashFromSignature = pow(signature, e, n)
-        return hash == hashFromSignature
+        return get_signature_scheme(key).verify(message.encode(), signature, key)
     except Exception:
         return False
 
@@ -86,7 +81,45 @@ def generate_keys(keysize: int, key_group: str) -> list:
     """
     random_generator = Random.new().read
     key = RSA.generate(keysize, random_generator)
+    load_keys(key, key_group)
+
+
+def load_keys(key, key_group: str) -> None:
+    """
+    Делает приватный ключ текущим для группы ключей.
+
+    Args:
+        key (RsaKey | EccKey): Приватный ключ RSA или Ed25519.
+        key_group (str): Группа ключей.
+    """
     context.loaded_keys[key_group] = key
+    signature_cache.invalidate(key_group)
 
 def generate_orvd_keys() -> list:
-    return generate_keys(ORVD_KEY_SIZE, KeyGroup.ORVD)
\ No newline at end of file
+    return generate_keys(ORVD_KEY_SIZE, KeyGroup.ORVD)
+
+
+def load_orvd_keys() -> None:
+    """
+    Загружает ключи ОРВД из хранилища ключей, создавая их при первом запуске.
+    Ключ Ed25519 загружается, если установленная версия pycryptodome поддерживает EdDSA.
+    """
+    load_keys(keystore.load_or_create(KeyGroup.ORVD, rsa_scheme.generate), KeyGroup.ORVD)
+    if ed25519_scheme.available:
+        load_keys(keystore.load_or_create(KeyGroup.ORVD_ED25519, ed25519_scheme.generate), KeyGroup.ORVD_ED25519)
+
+
+def get_orvd_key_group(key_group: str) -> str:
+    """
+    Выбирает ключ ОРВД для подписи сообщений абоненту.
+
+    Args:
+        key_group (str): Группа ключей абонента (например, 'kos1').
+
+    Returns:
+        str: KeyGroup.ORVD_ED25519, если БПЛА при обмене ключами выбрал Ed25519, иначе KeyGroup.ORVD.
+    """
+    if KeyGroup.KOS in key_group and get_signature_scheme(get_key(key_group, private=False)) is ed25519_scheme:
+        if get_key(KeyGroup.ORVD_ED25519, private=True) is not None:
+            return KeyGroup.ORVD_ED25519
+    return KeyGroup.ORVD
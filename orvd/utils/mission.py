@@ -1,5 +1,6 @@
 
-from constants import MissionVerificationStatus
+from constants import MissionVerificationStatus, WireFormat
+from .compact_codec import encode_mission_compact
 
 def parse_mission(mission: str) -> list:
     """
@@ -84,6 +85,41 @@ def read_mission(file_str: str) -> tuple[list | None, str]:
     return missionlist, MissionVerificationStatus.OK
 
 
+def get_mission_legs(mission_list: list) -> list:
+    """
+    Возвращает участки маршрута миссии между последовательными точками H, W и L.
+
+    Args:
+        mission_list (list): Список команд миссии.
+
+    Returns:
+        list: Список участков [[lat1, lon1], [lat2, lon2]]. Миссия из одной точки
+            дает один вырожденный участок.
+    """
+    positions = [[float(cmd[1]), float(cmd[2])] for cmd in mission_list if cmd[0] in ('H', 'W', 'L')]
+    if len(positions) == 1:
+        return [[positions[0], positions[0]]]
+    return [[start, end] for start, end in zip(positions, positions[1:])]
+
+
+def get_mission_forbidden_zones(mission_list: list, zone_index) -> list:
+    """
+    Находит запрещенные зоны, которые пересекает маршрут миссии.
+
+    Args:
+        mission_list (list): Список команд миссии.
+        zone_index (ZoneGridIndex): Индекс текущего снимка запрещенных зон.
+
+    Returns:
+        list: Имена пересекаемых зон в порядке их появления на маршруте.
+    """
+    names = {}
+    for leg_zones in zone_index.crossed_zones(get_mission_legs(mission_list)):
+        for name in leg_zones:
+            names[name] = True
+    return list(names)
+
+
 def home_handler(lat: float, lon: float, alt: float) -> list:
     """
     Обрабатывает команду установки домашней позиции.
@@ -221,4 +257,19 @@ def encode_mission(mission_list: list) -> list:
     for idx, cmd in enumerate(mission_list):
         mission_list[idx] = f'{cmd[0]}' + '_'.join(cmd[1:])
     
-    return mission_list
\ No newline at end of file
+    return mission_list
+
+def encode_mission_message(mission_steps: list, wire_format: str = WireFormat.TEXT) -> str:
+    """
+    Формирует сообщение с полетным заданием для БПЛА.
+
+    Args:
+        mission_steps (list): Закодированные команды миссии.
+        wire_format (str): Формат сообщения: 'text' или 'compact'.
+
+    Returns:
+        str: Строка '$FlightMission ...' или '$FlightMissionC ...' без подписи.
+    """
+    if wire_format == WireFormat.COMPACT:
+        return encode_mission_compact(mission_steps)
+    return f'$FlightMission {"&".join(mission_steps)}'
@@ -1,5 +1,6 @@
 import sys
 from db.dao import check_user_token
+from .keys import get_orvd_key_group
 
 def bad_request(message: str):
     """
@@ -14,6 +15,21 @@ def bad_request(message: str):
     return message, 400
 
 
+def sign_answer(answer: str, key_group: str, signer_func) -> str:
+    """
+    Подписывает ответ ключом ОРВД, соответствующим группе ключей запроса.
+
+    Args:
+        answer (str): Ответ.
+        key_group (str): Группа ключей запроса.
+        signer_func (callable): Функция для подписи ответа.
+
+    Returns:
+        str: Ответ с подписью после '#'.
+    """
+    return f'{answer}#{hex(signer_func(answer, get_orvd_key_group(key_group)))[2:]}'
+
+
 def signed_request(handler_func, verifier_func, signer_func, query_str: str, key_group: str, sig: str, **kwargs):
     """
     Обрабатывает подписанный запрос, проверяя подпись и выполняя указанную функцию-обработчик.
@@ -28,17 +44,19 @@ def signed_request(handler_func, verifier_func, signer_func, query_str: str, key
         **kwargs: Дополнительные аргументы для функции-обработчика.
 
     Returns:
-        tuple: Кортеж с ответом и кодом состояния.
+        tuple: Кортеж с ответом и кодом состояния. Если обработчик вернул None
+            (ответ будет отправлен позже), возвращается (None, 202).
     """
     if sig is not None and verifier_func(query_str, int(sig, 16), key_group):
         answer = handler_func(**kwargs)
+        if answer is None:
+            return None, 202
         ret_code = 200
     else:
         print(f'failed to verify {query_str}', file=sys.stderr)
         answer = '$Signature verification fail'
         ret_code = 403
-    answer = f'{answer}#{hex(signer_func(answer, "orvd"))[2:]}'
-    return answer, ret_code
+    return sign_answer(answer, key_group, signer_func), ret_code
 
 
 def authorized_request(handler_func, token: str, **kwargs):
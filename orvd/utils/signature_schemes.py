@@ -0,0 +1,220 @@
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from hashlib import sha256
+from Cryptodome import Random
+from Cryptodome.PublicKey import RSA, ECC
+from constants import ORVD_KEY_SIZE, SignatureSchemeName
+from .crypto_executor import crypto_executor
+
+try:
+    from Cryptodome.Signature import eddsa
+except ImportError:
+    # EdDSA появилась в pycryptodome 3.15
+    eddsa = None
+
+# Количество подписей, хранимых в кэше повторяющихся сообщений
+SIGNATURE_CACHE_SIZE = 1024
+
+
+class _SignatureCache:
+    """
+    LRU-кэш подписей по (группа ключей, открытый ключ, хеш сообщения) и разобранные
+    параметры приватных ключей.
+
+    Большинство подписываемых ОРВД сообщений ('$Flight 1', '$Delay 5', '$Arm: ...')
+    повторяются, поэтому повторная подпись сводится к поиску в словаре.
+    """
+    def __init__(self, maxsize=SIGNATURE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._signatures = OrderedDict()
+        self._key_params = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cache_key):
+        with self._lock:
+            signature = self._signatures.get(cache_key)
+            if signature is None:
+                self.misses += 1
+            else:
+                self._signatures.move_to_end(cache_key)
+                self.hits += 1
+            return signature
+
+    def put(self, cache_key, signature):
+        with self._lock:
+            self._signatures[cache_key] = signature
+            if len(self._signatures) > self.maxsize:
+                self._signatures.popitem(last=False)
+
+    def key_params(self, key_group, key, scheme):
+        """
+        Возвращает параметры приватного ключа, подготовленные схемой подписи.
+
+        Параметры ключа Cryptodome хранятся как числа GMP, и их преобразование в int
+        стоит дороже поиска подписи в кэше, поэтому оно выполняется один раз на ключ.
+        """
+        params = self._key_params.get(key_group)
+        if params is None or params[0] is not key:
+            params = (key, scheme.key_params(key))
+            self._key_params[key_group] = params
+        return params[1]
+
+    def invalidate(self, key_group):
+        with self._lock:
+            self._key_params.pop(key_group, None)
+            for cache_key in [cache_key for cache_key in self._signatures if cache_key[0] == key_group]:
+                del self._signatures[cache_key]
+
+    def stats(self):
+        return {
+            'size': len(self._signatures),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+signature_cache = _SignatureCache()
+
+
+def sign_hash_crt(hash: int, p: int, q: int, dp: int, dq: int, u: int) -> int:
+    """
+    Вычисляет hash^d mod n по китайской теореме об остатках (схема Гарнера).
+
+    Args:
+        hash (int): Хеш сообщения, меньший модуля ключа.
+        p, q (int): Простые множители модуля.
+        dp, dq (int): d mod (p-1) и d mod (q-1).
+        u (int): p^-1 mod q.
+
+    Returns:
+        int: Цифровая подпись, совпадающая с pow(hash, d, p * q).
+    """
+    m1 = pow(hash, dp, p)
+    m2 = pow(hash, dq, q)
+    return m1 + p * ((m2 - m1) * u % q)
+
+
+class SignatureScheme(ABC):
+    """
+    Схема цифровой подписи сообщений ОРВД.
+
+    Подпись любой схемы передается как целое число, которое в сообщениях
+    записывается в шестнадцатеричном виде после '#'.
+    """
+    name = None
+
+    @abstractmethod
+    def generate(self):
+        pass
+
+    @abstractmethod
+    def key_params(self, private_key):
+        pass
+
+    @abstractmethod
+    def sign(self, message: bytes, private_key, key_group: str) -> int:
+        pass
+
+    @abstractmethod
+    def verify(self, message: bytes, signature: int, public_key) -> bool:
+        pass
+
+    @abstractmethod
+    def public_key_string(self, private_key) -> str:
+        pass
+
+
+class RSASignatureScheme(SignatureScheme):
+    """
+    RSA без дополнения: подпись - sha256(сообщение)^d mod n. Открытый ключ - кортеж (n, e).
+    """
+    name = SignatureSchemeName.RSA
+
+    def generate(self):
+        return RSA.generate(ORVD_KEY_SIZE, Random.new().read)
+
+    def key_params(self, private_key):
+        p, q = int(private_key.p), int(private_key.q)
+        d = int(private_key.d)
+        return int(private_key.n), p, q, d % (p - 1), d % (q - 1), int(private_key.u)
+
+    def sign(self, message, private_key, key_group):
+        n, *crt_params = signature_cache.key_params(key_group, private_key, self)
+        hash = int.from_bytes(sha256(message).digest(), byteorder='big', signed=False)
+        cache_key = (key_group, n, hash)
+        signature = signature_cache.get(cache_key)
+        if signature is None:
+            signature = crypto_executor.run(sign_hash_crt, hash, *crt_params)
+            signature_cache.put(cache_key, signature)
+        return signature
+
+    def verify(self, message, signature, public_key):
+        n, e = public_key
+        hash = int.from_bytes(sha256(message).digest(), byteorder='big', signed=False)
+        # Открытая экспонента мала (обычно 65537): проверка дешевле передачи задачи в пул процессов
+        return hash == pow(signature, e, n)
+
+    def public_key_string(self, private_key):
+        return f'{hex(private_key.n)[2:]} {hex(private_key.e)[2:]}'
+
+
+class Ed25519SignatureScheme(SignatureScheme):
+    """
+    Ed25519 (RFC 8032). Подпись - 64 байта, передаваемые как целое число (big-endian).
+    Открытый ключ - EccKey; при обмене ключами передается 32 байтами в шестнадцатеричном виде.
+    """
+    name = SignatureSchemeName.ED25519
+    SIGNATURE_SIZE = 64
+
+    @property
+    def available(self):
+        return eddsa is not None
+
+    def generate(self):
+        return ECC.generate(curve='Ed25519')
+
+    def key_params(self, private_key):
+        return private_key.public_key().export_key(format='raw'), eddsa.new(private_key, 'rfc8032')
+
+    def sign(self, message, private_key, key_group):
+        public_key, signer = signature_cache.key_params(key_group, private_key, self)
+        cache_key = (key_group, public_key, sha256(message).digest())
+        signature = signature_cache.get(cache_key)
+        if signature is None:
+            signature = int.from_bytes(signer.sign(message), byteorder='big', signed=False)
+            signature_cache.put(cache_key, signature)
+        return signature
+
+    def verify(self, message, signature, public_key):
+        if signature < 0 or signature.bit_length() > self.SIGNATURE_SIZE * 8:
+            return False
+        try:
+            eddsa.new(public_key, 'rfc8032').verify(message, signature.to_bytes(self.SIGNATURE_SIZE, byteorder='big'))
+            return True
+        except ValueError:
+            return False
+
+    def public_key_string(self, private_key):
+        return private_key.public_key().export_key(format='raw').hex()
+
+
+rsa_scheme = RSASignatureScheme()
+ed25519_scheme = Ed25519SignatureScheme()
+
+
+def get_signature_scheme(key) -> SignatureScheme:
+    """
+    Определяет схему подписи по ключу.
+
+    Args:
+        key: Приватный ключ (RsaKey, EccKey), кортеж (n, e) или открытый ключ EccKey.
+
+    Returns:
+        SignatureScheme: Схема подписи.
+    """
+    if isinstance(key, ECC.EccKey):
+        return ed25519_scheme
+    return rsa_scheme
@@ -0,0 +1,94 @@
+import datetime
+import struct
+from urllib.parse import parse_qs
+
+# Первый байт бинарного сообщения. Текстовый формат всегда начинается с ASCII-символа,
+# поэтому формат определяется по первому байту каждого сообщения.
+TELEMETRY_BINARY_MAGIC = 0xA5
+TELEMETRY_BINARY_VERSION = 1
+TELEMETRY_FLAG_TIMESTAMP = 0x01
+
+# magic, version, flags, lat (1e-7 град.), lon (1e-7 град.), alt (1e-2 м), azimuth (1e-7 град.),
+# dop (1e-2), sats, speed (1e-2 м/с)
+_HEADER = struct.Struct('<BBB')
+_BODY_V1 = struct.Struct('<iiiiHBH')
+# Время БПЛА в миллисекундах от начала эпохи Unix
+_TIMESTAMP = struct.Struct('<Q')
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def encode_telemetry_binary(lat: int, lon: int, alt: int, azimuth: int, dop: float, sats: int,
+                            speed: float, timestamp_ms: int = None) -> bytes:
+    """
+    Кодирует телеметрию в бинарный формат версии 1.
+
+    Args:
+        lat (int): Широта, умноженная на 1e7.
+        lon (int): Долгота, умноженная на 1e7.
+        alt (int): Высота, умноженная на 1e2.
+        azimuth (int): Азимут, умноженный на 1e7.
+        dop (float): Снижение точности.
+        sats (int): Количество спутников.
+        speed (float): Скорость.
+        timestamp_ms (int, optional): Время БПЛА в миллисекундах от начала эпохи Unix.
+
+    Returns:
+        bytes: Бинарное сообщение (24 байта, 32 байта с временем БПЛА).
+    """
+    flags = TELEMETRY_FLAG_TIMESTAMP if timestamp_ms is not None else 0
+    message = _HEADER.pack(TELEMETRY_BINARY_MAGIC, TELEMETRY_BINARY_VERSION, flags) + \
+        _BODY_V1.pack(lat, lon, alt, azimuth, round(dop * 100), sats, round(speed * 100))
+    if timestamp_ms is not None:
+        message += _TIMESTAMP.pack(timestamp_ms)
+    return message
+
+
+def decode_telemetry_binary(payload: bytes) -> dict:
+    """
+    Декодирует телеметрию из бинарного формата.
+
+    Args:
+        payload (bytes): Бинарное сообщение.
+
+    Returns:
+        dict: Поля телеметрии в тех же единицах, что и в текстовом формате.
+
+    Raises:
+        ValueError: Если версия формата не поддерживается или сообщение повреждено.
+    """
+    magic, version, flags = _HEADER.unpack_from(payload)
+    if magic != TELEMETRY_BINARY_MAGIC:
+        raise ValueError('Not a binary telemetry message')
+    if version != TELEMETRY_BINARY_VERSION:
+        raise ValueError(f'Unsupported binary telemetry version {version}')
+    expected_size = _HEADER.size + _BODY_V1.size + (_TIMESTAMP.size if flags & TELEMETRY_FLAG_TIMESTAMP else 0)
+    if len(payload) != expected_size:
+        raise ValueError(f'Wrong binary telemetry size {len(payload)}, expected {expected_size}')
+    lat, lon, alt, azimuth, dop, sats, speed = _BODY_V1.unpack_from(payload, _HEADER.size)
+    telemetry = {
+        'lat': lat, 'lon': lon, 'alt': alt, 'azimuth': azimuth,
+        'dop': dop / 100, 'sats': sats, 'speed': speed / 100
+    }
+    if flags & TELEMETRY_FLAG_TIMESTAMP:
+        timestamp_ms, = _TIMESTAMP.unpack_from(payload, _HEADER.size + _BODY_V1.size)
+        try:
+            telemetry['drone_time'] = _EPOCH + datetime.timedelta(milliseconds=timestamp_ms)
+        except OverflowError:
+            raise ValueError(f'Binary telemetry timestamp {timestamp_ms} ms is out of range')
+    return telemetry
+
+
+def decode_telemetry(payload: bytes) -> dict:
+    """
+    Декодирует сообщение телеметрии в текстовом ('lat=...&lon=...') или бинарном формате.
+
+    Args:
+        payload (bytes): Полезная нагрузка MQTT-сообщения.
+
+    Returns:
+        dict: Поля телеметрии.
+    """
+    if payload and payload[0] == TELEMETRY_BINARY_MAGIC:
+        return decode_telemetry_binary(payload)
+    query_params = parse_qs(payload.decode())
+    return {k: v[0] for k, v in query_params.items()}
@@ -0,0 +1,81 @@
+import os
+import threading
+from .general import haversine
+
+
+class TelemetryDecimator:
+    """
+    Прореживание телеметрии перед записью в БД.
+
+    Образец БПЛА сохраняется, только если с момента последнего сохраненного
+    образца БПЛА сместился дальше min_distance_m, изменил высоту больше чем на
+    min_alt_delta_m, скорость больше чем на min_speed_delta или прошло не менее
+    max_interval_s секунд. Значение max_interval_s = 0 отключает прореживание.
+    """
+    def __init__(self, min_distance_m=5.0, min_alt_delta_m=1.0, min_speed_delta=0.5, max_interval_s=30.0):
+        self.min_distance_m = min_distance_m
+        self.min_alt_delta_m = min_alt_delta_m
+        self.min_speed_delta = min_speed_delta
+        self.max_interval_s = max_interval_s
+        self._last_stored = {}
+        self._lock = threading.Lock()
+        self._stored = 0
+        self._skipped = 0
+
+    def init_app(self, app):
+        self.min_distance_m = float(os.environ.get("TELEMETRY_MIN_DISTANCE_M", self.min_distance_m))
+        self.min_alt_delta_m = float(os.environ.get("TELEMETRY_MIN_ALT_DELTA_M", self.min_alt_delta_m))
+        self.min_speed_delta = float(os.environ.get("TELEMETRY_MIN_SPEED_DELTA", self.min_speed_delta))
+        self.max_interval_s = float(os.environ.get("TELEMETRY_MAX_INTERVAL_S", self.max_interval_s))
+
+    def _is_significant(self, last, record_time, lat, lon, alt, speed):
+        last_time, last_lat, last_lon, last_alt, last_speed = last
+        elapsed = (record_time - last_time).total_seconds()
+        # Время назад (перезапуск БПЛА, смена источника времени) считаем новым отсчетом
+        if elapsed < 0 or elapsed >= self.max_interval_s:
+            return True
+        if None in (lat, lon, alt, speed, last_lat, last_lon, last_alt, last_speed):
+            return True
+        if abs(alt - last_alt) > self.min_alt_delta_m or abs(speed - last_speed) > self.min_speed_delta:
+            return True
+        return haversine(last_lat, last_lon, lat, lon) > self.min_distance_m
+
+    def should_store(self, uav_id, record_time, lat, lon, alt, speed):
+        """
+        Решает, нужно ли записать образец телеметрии в БД.
+
+        Args:
+            uav_id (str): Идентификатор БПЛА.
+            record_time (datetime): Время образца.
+            lat (float): Широта.
+            lon (float): Долгота.
+            alt (float): Высота.
+            speed (float): Скорость.
+
+        Returns:
+            bool: True, если образец нужно сохранить.
+        """
+        with self._lock:
+            last = self._last_stored.get(uav_id)
+            if last is not None and not self._is_significant(last, record_time, lat, lon, alt, speed):
+                self._skipped += 1
+                return False
+            self._last_stored[uav_id] = (record_time, lat, lon, alt, speed)
+            self._stored += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._last_stored.clear()
+
+    def stats(self):
+        total = self._stored + self._skipped
+        return {
+            'uavs': len(self._last_stored),
+            'stored': self._stored,
+            'skipped': self._skipped,
+            'skip_ratio': round(self._skipped / total, 3) if total else 0.0,
+        }
+
+
+telemetry_decimator = TelemetryDecimator()
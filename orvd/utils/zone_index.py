@@ -0,0 +1,180 @@
+import math
+from collections import defaultdict
+import numpy as np
+from .general import is_point_in_polygon
+from .geometry import points_in_polygon, segments_intersect_polygon
+
+# Зоны, покрывающие больше ячеек сетки, хранятся отдельным списком и проверяются по рамке
+MAX_CELLS_PER_ZONE = 256
+# Минимальный размер ячейки в градусах (около 10 м)
+MIN_CELL_SIZE = 1e-4
+# Количество отрезков, рамки которых сравниваются с рамками всех зон за одну операцию
+SEGMENT_CHUNK = 256
+
+
+def get_polygon_bbox(polygon):
+    """
+    Вычисляет ограничивающую рамку полигона.
+
+    Args:
+        polygon (list): Список координат вершин [lon, lat].
+
+    Returns:
+        tuple: (min_lon, min_lat, max_lon, max_lat).
+    """
+    lons = [point[0] for point in polygon]
+    lats = [point[1] for point in polygon]
+    return min(lons), min(lats), max(lons), max(lats)
+
+
+class ZoneGridIndex:
+    """
+    Равномерная сетка над ограничивающими рамками запрещенных зон.
+
+    Каждая зона заносится во все ячейки, которые пересекает ее рамка; размер ячейки
+    равен среднему размеру рамки зоны. Запрос точки проверяет только зоны своей
+    ячейки: сначала по рамке, затем лучом по вершинам полигона. Отрезки (участки
+    маршрута) отбираются сравнением их рамок с рамками всех зон сразу.
+    Индекс неизменяем и строится вместе со снимком зон.
+    """
+    def __init__(self, zones):
+        self.names = []
+        self.polygons = []
+        self.bboxes = []
+        for zone in zones['features']:
+            polygon = zone['geometry']['coordinates'][0]
+            if not polygon:
+                continue
+            self.names.append(zone['properties'].get('name'))
+            self.polygons.append(polygon)
+            self.bboxes.append(get_polygon_bbox(polygon))
+
+        if self.bboxes:
+            extent = sum(max(bbox[2] - bbox[0], bbox[3] - bbox[1]) for bbox in self.bboxes) / len(self.bboxes)
+        else:
+            extent = 0
+        self.cell_size = max(extent, MIN_CELL_SIZE)
+
+        self._cells = defaultdict(list)
+        self._large = []
+        for idx, (min_lon, min_lat, max_lon, max_lat) in enumerate(self.bboxes):
+            x0, y0 = self._cell(min_lon, min_lat)
+            x1, y1 = self._cell(max_lon, max_lat)
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_CELLS_PER_ZONE:
+                self._large.append(idx)
+                continue
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    self._cells[(x, y)].append(idx)
+        self._cells = dict(self._cells)
+        self._bbox_array = np.array(self.bboxes, dtype=float).reshape(-1, 4)
+
+    def _cell(self, lon, lat):
+        return math.floor(lon / self.cell_size), math.floor(lat / self.cell_size)
+
+    def candidates(self, lat, lon):
+        """
+        Возвращает индексы зон, рамки которых содержат точку.
+
+        Args:
+            lat (float): Широта точки.
+            lon (float): Долгота точки.
+
+        Returns:
+            list: Индексы зон в порядке их следования в GeoJSON.
+        """
+        result = []
+        for idx in self._cells.get(self._cell(lon, lat), ()):
+            min_lon, min_lat, max_lon, max_lat = self.bboxes[idx]
+            if min_lon <= lon <= max_lon and min_lat <= lat <= max_lat:
+                result.append(idx)
+        for idx in self._large:
+            min_lon, min_lat, max_lon, max_lat = self.bboxes[idx]
+            if min_lon <= lon <= max_lon and min_lat <= lat <= max_lat:
+                result.append(idx)
+        if self._large:
+            result.sort()
+        return result
+
+    def zones_containing(self, lat, lon):
+        """
+        Возвращает имена зон, внутри которых находится точка.
+
+        Args:
+            lat (float): Широта точки.
+            lon (float): Долгота точки.
+
+        Returns:
+            list: Имена зон.
+        """
+        return [self.names[idx] for idx in self.candidates(lat, lon)
+                if is_point_in_polygon((lon, lat), self.polygons[idx])]
+
+    def query(self, points):
+        """
+        Пакетный запрос: для каждой точки возвращает имена содержащих ее зон.
+
+        Args:
+            points (list): Список точек [lat, lon].
+
+        Returns:
+            list: Списки имен зон в порядке точек.
+        """
+        # Точки группируются по зонам-кандидатам, и каждая зона проверяется одним векторным вызовом
+        by_zone = defaultdict(list)
+        for point_idx, (lat, lon) in enumerate(points):
+            for idx in self.candidates(lat, lon):
+                by_zone[idx].append(point_idx)
+
+        result = [[] for _ in points]
+        for idx in sorted(by_zone):
+            point_indexes = by_zone[idx]
+            inside = points_in_polygon([(points[i][1], points[i][0]) for i in point_indexes], self.polygons[idx])
+            for point_idx, is_inside in zip(point_indexes, inside.tolist()):
+                if is_inside:
+                    result[point_idx].append(self.names[idx])
+        return result
+
+    def crossed_zones(self, segments):
+        """
+        Пакетный запрос: для каждого отрезка возвращает имена зон, которые он пересекает
+        или которых касается.
+
+        Args:
+            segments (list): Список отрезков [[lat1, lon1], [lat2, lon2]].
+
+        Returns:
+            list: Списки имен зон в порядке отрезков.
+        """
+        result = [[] for _ in segments]
+        if not segments or not self.bboxes:
+            return result
+        coords = np.array(segments, dtype=float).reshape(-1, 4)
+        min_lat, max_lat = np.minimum(coords[:, 0], coords[:, 2]), np.maximum(coords[:, 0], coords[:, 2])
+        min_lon, max_lon = np.minimum(coords[:, 1], coords[:, 3]), np.maximum(coords[:, 1], coords[:, 3])
+
+        by_zone = defaultdict(list)
+        bboxes = self._bbox_array
+        for chunk in range(0, len(segments), SEGMENT_CHUNK):
+            part = slice(chunk, chunk + SEGMENT_CHUNK)
+            overlap = ((bboxes[:, 0] <= max_lon[part, None]) & (bboxes[:, 2] >= min_lon[part, None])
+                       & (bboxes[:, 1] <= max_lat[part, None]) & (bboxes[:, 3] >= min_lat[part, None]))
+            for segment_idx, idx in zip(*np.nonzero(overlap)):
+                by_zone[int(idx)].append(chunk + int(segment_idx))
+
+        for idx in sorted(by_zone):
+            segment_indexes = by_zone[idx]
+            segment_coords = coords[segment_indexes]
+            crossed = segments_intersect_polygon(segment_coords[:, [1, 0]].tolist(), segment_coords[:, [3, 2]].tolist(),
+                                                 self.polygons[idx])
+            for segment_idx, is_crossed in zip(segment_indexes, crossed.tolist()):
+                if is_crossed:
+                    result[segment_idx].append(self.names[idx])
+        return result
+
+    def stats(self):
+        return {
+            'cells': len(self._cells),
+            'cell_size_deg': self.cell_size,
+            'large_zones': len(self._large),
+        }
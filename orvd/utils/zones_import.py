@@ -0,0 +1,241 @@
+import codecs
+import json
+import math
+from .general import get_new_polygon_feature
+from .geometry import ring_self_intersects, simplify_ring_conservative
+
+# Размер порции чтения загружаемого файла зон
+READ_CHUNK_SIZE = 64 * 1024
+# Количество ошибок, возвращаемых в ответе на импорт
+MAX_REPORTED_ERRORS = 20
+
+
+class ZonesImportError(ValueError):
+    """
+    Ошибка импорта запрещенных зон со списком ошибок отдельных зон.
+    """
+    def __init__(self, errors):
+        super().__init__('; '.join(errors[:MAX_REPORTED_ERRORS]))
+        self.errors = errors[:MAX_REPORTED_ERRORS]
+
+
+class _JsonStreamReader:
+    """
+    Последовательное чтение значений JSON из потока без загрузки файла целиком.
+    """
+    def __init__(self, stream, chunk_size=READ_CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size):
+        if self.eof:
+            return False
+        data = self.stream.read(size)
+        if self.pos > len(self.buf) // 2:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        if not data:
+            self.eof = True
+            self.buf += self.text_decoder.decode(b'', final=True)
+            return False
+        self.buf += data if isinstance(data, str) else self.text_decoder.decode(data)
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill(self.chunk_size):
+                return None
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f'Expected {char!r} at offset {self.pos}')
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # Значение еще не прочитано целиком; при больших значениях порции растут
+                if not self._fill(size):
+                    raise ValueError(f'Invalid JSON: {e}')
+                size *= 2
+                continue
+            # Число в конце буфера может продолжаться в следующей порции
+            if end == len(self.buf) and self._fill(size):
+                continue
+            self.pos = end
+            return value
+
+
+def iter_geojson_features(stream, chunk_size=READ_CHUNK_SIZE):
+    """
+    Потоково разбирает GeoJSON FeatureCollection и возвращает зоны по одной.
+
+    В памяти одновременно находится только текущая зона и непрочитанная порция файла.
+
+    Args:
+        stream: Файловый объект (байты в UTF-8 или текст).
+        chunk_size (int): Размер порции чтения.
+
+    Yields:
+        dict: Объекты Feature из массива features.
+
+    Raises:
+        ValueError: Если файл не является корректным GeoJSON FeatureCollection.
+    """
+    reader = _JsonStreamReader(stream, chunk_size)
+    collection_type = None
+    has_features = False
+    reader.expect('{')
+    if reader.peek() == '}':
+        raise ValueError('No features')
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError('Invalid JSON object key')
+        reader.expect(':')
+        if key == 'features':
+            has_features = True
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    char = reader.peek()
+                    reader.pos += 1
+                    if char == ']':
+                        break
+                    if char != ',':
+                        raise ValueError(f'Expected \',\' or \']\' at offset {reader.pos - 1}')
+        elif key == 'type':
+            collection_type = reader.value()
+        else:
+            reader.value()
+        char = reader.peek()
+        reader.pos += 1
+        if char == '}':
+            break
+        if char != ',':
+            raise ValueError(f'Expected \',\' or \'}}\' at offset {reader.pos - 1}')
+    if collection_type != 'FeatureCollection' or not has_features:
+        raise ValueError('File is not a GeoJSON FeatureCollection')
+
+
+def validate_zone_feature(feature):
+    """
+    Проверяет зону GeoJSON и приводит ее к виду, в котором зоны хранит ОРВД.
+
+    Координаты округляются до 7 знаков, повторяющиеся подряд вершины удаляются,
+    отверстия полигона отбрасываются (это только увеличивает запрещенную область).
+
+    Args:
+        feature (dict): Объект Feature.
+
+    Returns:
+        dict: Зона с единственным кольцом координат [lon, lat].
+
+    Raises:
+        ValueError: Если зона некорректна: нет имени, геометрия не Polygon, координаты
+            вне допустимых диапазонов, кольцо не замкнуто, содержит меньше трех вершин
+            или самопересекается.
+    """
+    if not isinstance(feature, dict) or feature.get('type') != 'Feature':
+        raise ValueError('Not a GeoJSON Feature')
+    properties = feature.get('properties')
+    if not isinstance(properties, dict) or not isinstance(properties.get('name'), str) or not properties['name']:
+        raise ValueError('Zone has no name')
+    name = properties['name']
+    geometry = feature.get('geometry')
+    if not isinstance(geometry, dict) or geometry.get('type') != 'Polygon' \
+            or not isinstance(geometry.get('coordinates'), list) or not geometry['coordinates'] \
+            or not isinstance(geometry['coordinates'][0], list):
+        raise ValueError(f'Zone {name}: geometry is not a Polygon')
+
+    ring = []
+    for point in geometry['coordinates'][0]:
+        if not isinstance(point, list) or len(point) < 2 \
+                or not all(isinstance(coord, (int, float)) and not isinstance(coord, bool) and math.isfinite(coord)
+                           for coord in point[:2]):
+            raise ValueError(f'Zone {name}: invalid coordinates')
+        lon, lat = round(point[0], 7), round(point[1], 7)
+        if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+            raise ValueError(f'Zone {name}: coordinates out of range')
+        if not ring or ring[-1] != [lon, lat]:
+            ring.append([lon, lat])
+
+    if len(ring) < 2 or ring[0] != ring[-1]:
+        raise ValueError(f'Zone {name}: ring is not closed')
+    if len(ring) < 4:
+        raise ValueError(f'Zone {name}: ring has less than 3 vertices')
+    if ring_self_intersects(ring):
+        raise ValueError(f'Zone {name}: ring intersects itself')
+
+    zone = get_new_polygon_feature(name, ring)
+    zone['properties'] = {**properties}
+    return zone
+
+
+def parse_forbidden_zones_upload(stream, tolerance_m=0.0):
+    """
+    Потоково читает, проверяет и при необходимости упрощает запрещенные зоны.
+
+    Args:
+        stream: Файловый объект с GeoJSON FeatureCollection.
+        tolerance_m (float): Допустимое отклонение упрощения в метрах; 0 - без упрощения.
+
+    Returns:
+        tuple: GeoJSON зон и отчет: количество зон и вершин до и после упрощения.
+
+    Raises:
+        ZonesImportError: Если файл или хотя бы одна зона некорректны. Зоны импортируются
+            только все вместе.
+    """
+    features = []
+    names = set()
+    errors = []
+    vertices_before = 0
+    vertices_after = 0
+    try:
+        for idx, feature in enumerate(iter_geojson_features(stream)):
+            try:
+                zone = validate_zone_feature(feature)
+            except ValueError as e:
+                errors.append(f'Feature {idx}: {e}')
+                continue
+            name = zone['properties']['name']
+            if name in names:
+                errors.append(f'Feature {idx}: duplicate zone name {name}')
+                continue
+            names.add(name)
+            ring = zone['geometry']['coordinates'][0]
+            vertices_before += len(ring)
+            if tolerance_m > 0:
+                ring = simplify_ring_conservative(ring, tolerance_m)
+                zone['geometry']['coordinates'][0] = ring
+            vertices_after += len(ring)
+            features.append(zone)
+    except ValueError as e:
+        errors.append(str(e))
+    if errors:
+        raise ZonesImportError(errors)
+
+    report = {
+        'zones': len(features),
+        'vertices_before': vertices_before,
+        'vertices_after': vertices_after,
+        'vertex_reduction': round(1 - vertices_after / vertices_before, 4) if vertices_before else 0.0,
+    }
+    return {"type": "FeatureCollection", "features": features}, report